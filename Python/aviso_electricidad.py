@@ -5,8 +5,8 @@
 # Title         : aviso_electricidad.py
 # Description   : Sistema de aviso en caso de corte de electricidad
 # Author        : Veltys
-# Date          : 2021-04-30
-# Version       : 1.1.4
+# Date          : 2026-10-18
+# Version       : 1.1.5
 # Usage         : python3 aviso_electricidad.py
 # Notes         :
 
@@ -30,7 +30,7 @@ def main(argv):
     sleep(config.PAUSA * 6)                                                                                                         # Pausa inicial para esperar a que se levante la red
 
     for reintentos in range(config.REINTENTOS):
-        if mandar_correo(config.DE, config.PARA, config.ASUNTO, config.CORREO):                                                     # Si se ha podido mandar el correo
+        if mandar_correo(config.DE, config.PARA, config.ASUNTO, str(config.CORREO)):                                                # Si se ha podido mandar el correo
             print('El correo ha podido ser enviado')                                                                                #     Se informa de ello
 
             enviado = True                                                                                                          #     Bandera de estado
@@ -5,8 +5,8 @@
 # Title         : comun.py
 # Description   : Módulo de funciones comunes a varios sistemas
 # Author        : Veltys
-# Date          : 2021-04-30
-# Version       : 0.7.0
+# Date          : 2026-10-18
+# Version       : 0.23.2
 # Usage         : import comun | from comun import <clase>
 # Notes         : ...
 
@@ -15,15 +15,63 @@ DEBUG           = False
 
 
 from abc import ABCMeta, abstractmethod                                                 # Clases abstractas
+import asyncio                                                                          # Bucle de eventos y corrutinas
+from collections import namedtuple                                                      # Tuplas con nombre
+from contextlib import ExitStack                                                        # Gestión de varios contextos a la vez
 import errno                                                                            # Códigos de error
+from math import floor                                                                  # Redondeo hacia abajo
 import os                                                                               # Funcionalidades varias del sistema operativo
 import signal                                                                           # Manejo de señales
 import socket                                                                           # Tratamiento de sockets
 import sys                                                                              # Funcionalidades varias del sistema
+from threading import Lock, current_thread, main_thread                                 # Capacidades multihilo
 from time import sleep                                                                  # Para hacer pausas
+from weakref import WeakKeyDictionary                                                   # Diccionarios que no retienen a sus claves
 
-import RPi.GPIO as GPIO                                                                 # Acceso a los pines GPIO
+import configuracion                                                                    # Recarga y comparación de configuraciones
+import hardware                                                                         # Acceso a los pines GPIO, a través del controlador configurado
 from pid import bloqueo                                                                 # Módulo propio para bloquear la ejecución de más de una instancia
+import protocolo                                                                        # Enmarcado de mensajes
+
+
+PRIMER_DESCRIPTOR_HEREDADO = 3                                                          # Primer descriptor de archivo de los sockets heredados (SD_LISTEN_FDS_START en systemd)
+
+
+def direccion_unix(ruta):
+    ''' Devuelve la dirección de un socket de dominio UNIX a partir de su ruta
+        - Una ruta que empiece por "@" se refiere al espacio de nombres abstracto de Linux, que no crea ningún archivo
+    '''
+
+    return '\0' + ruta[1:] if ruta[:1] == '@' else ruta
+
+
+def sockets_heredados():
+    ''' Devuelve los sockets a la escucha heredados del proceso padre, según el protocolo de activación por sockets de systemd:
+        - LISTEN_PID debe coincidir con el PID propio y LISTEN_FDS indica cuántos descriptores, a partir del 3, se heredan
+        - Las variables se eliminan del entorno para que no las hereden, a su vez, los procesos hijos
+        - Así, quien lance el proceso puede mantener los sockets abiertos entre reinicios, sin rechazar ninguna conexión mientras tanto
+    '''
+
+    try:
+        if int(os.environ.get('LISTEN_PID', 0)) != os.getpid():
+            return []
+
+        cantidad = int(os.environ.get('LISTEN_FDS', 0))
+
+    except ValueError:
+        return []
+
+    for variable in ('LISTEN_PID', 'LISTEN_FDS', 'LISTEN_FDNAMES'):
+        os.environ.pop(variable, None)
+
+    heredados = []
+
+    for descriptor in range(PRIMER_DESCRIPTOR_HEREDADO, PRIMER_DESCRIPTOR_HEREDADO + cantidad):
+        os.set_inheritable(descriptor, False)
+
+        heredados.append(socket.socket(fileno = descriptor))                            # La familia y el tipo se averiguan a partir del propio descriptor
+
+    return heredados
 
 
 class estados_conexion():
@@ -34,13 +82,625 @@ class estados_conexion():
     LISTA_EXTENDIDA =  3
 
 
+puerto = namedtuple('puerto', ('gpio', 'tipo', 'acceso', 'activacion', 'descripcion'))  # Registro inmutable (y sin __dict__, ya que sus __slots__ están vacíos) de un puerto GPIO, con los mismos campos que la configuración
+
+mascara = namedtuple('mascara', ('encendido', 'apagado'))                               # Niveles (puerto ➡ nivel) que encienden y apagan a la vez todos los puertos de un tipo
+
+
+class indice_puertos(object):
+    ''' Clase que compila, una única vez, los puertos GPIO de una configuración:
+        - Valida cada puerto y lo convierte en un registro inmutable
+        - Los indexa para buscarlos sin recorrer las listas anidadas
+        - Precalcula las tuplas de puertos de cada clase, para que los bucles de los sistemas no tengan que comparar tipos en cada vuelta:
+            - "salidas": relés, leds y ventiladores simples
+            - "salidas_pwm": leds y ventiladores controlados por PWM
+            - "botones", "sondas" y "ventiladores" (simples y PWM)
+    '''
+
+    def __init__(self, config, accesos = None):
+        ''' Constructor de la clase:
+            - "config" es la configuración del sistema, con sus puertos GPIOS y las constantes de cada tipo
+            - "accesos" es, opcionalmente, un diccionario puerto ➡ objeto de control (por ejemplo, el de PWM) que sustituirá al de la configuración
+            - Lanza ValueError, con la descripción del problema, si algún puerto no es válido
+        '''
+
+        self._grupos            = tuple(tuple(self._compilar(config, datos, accesos) for datos in grupo) for grupo in config.GPIOS)
+        self._por_descripcion   = {}
+        self._por_gpio          = {}
+        self._por_tipo          = {}
+
+        for i, grupo in enumerate(self._grupos):
+            for j, actual in enumerate(grupo):
+                if actual.gpio in self._por_gpio:
+                    raise ValueError(f'el puerto GPIO{actual.gpio} está repetido')
+
+                self._por_gpio[actual.gpio] = (actual, i, j)                            # Puerto, grupo y posición dentro del grupo
+                self._por_descripcion.setdefault(actual.descripcion.lower(), actual)
+                self._por_tipo[actual.tipo] = self._por_tipo.get(actual.tipo, ()) + (actual, )
+
+        self.botones            = self.buscar_tipo(config.BOTON)
+        self.salidas            = self.buscar_tipo(config.RELE, config.LED, config.VENTILADOR)
+        self.salidas_pwm        = self.buscar_tipo(config.LED_PWM, config.VENTILADOR_PWM)
+        self.sondas             = self.buscar_tipo(config.SONDA)
+        self.ventiladores       = self.buscar_tipo(config.VENTILADOR, config.VENTILADOR_PWM)
+
+        if self.salidas_pwm and not(getattr(config, 'FRECUENCIA', 0) > 0):
+            raise ValueError('hay puertos controlados por PWM, pero no una FRECUENCIA válida')
+
+
+    @staticmethod                                                                       # Método estático
+    def _compilar(config, datos, accesos):
+        ''' Valida los datos de un puerto de la configuración y devuelve su registro inmutable
+        '''
+
+        if len(datos) != 5:
+            raise ValueError(f'el puerto {datos} no tiene cinco elementos')
+
+        gpio, tipo, acceso, activacion, descripcion = datos
+
+        if not(isinstance(gpio, int)) or isinstance(gpio, bool) or gpio < 0:
+            raise ValueError(f'el número de puerto {gpio!r} no es válido')
+
+        if tipo not in (config.RELE, config.LED, config.LED_PWM, config.VENTILADOR, config.VENTILADOR_PWM, config.BOTON, config.SONDA):
+            raise ValueError(f'el tipo {tipo!r} del puerto GPIO{gpio} no existe')
+
+        if not(isinstance(activacion, bool)):
+            raise ValueError(f'la activación del puerto GPIO{gpio} no es True ni False')
+
+        if not(isinstance(descripcion, str)):
+            raise ValueError(f'la descripción del puerto GPIO{gpio} no es un texto')
+
+        if accesos and gpio in accesos:
+            acceso = accesos[gpio]
+
+        return puerto(gpio, tipo, acceso, activacion, descripcion)
+
+
+    def buscar(self, gpio):
+        ''' Devuelve el registro del puerto GPIO dado o False si no está gestionado
+        '''
+
+        encontrado = self._por_gpio.get(gpio)
+
+        return encontrado[0] if encontrado else False
+
+
+    def buscar_descripcion(self, descripcion):
+        ''' Devuelve el registro del puerto GPIO con la descripción dada (sin distinguir mayúsculas) o False si no existe
+        '''
+
+        return self._por_descripcion.get(descripcion.lower(), False)
+
+
+    def buscar_tipo(self, *tipos):
+        ''' Devuelve, en el orden de la configuración, los registros de los puertos de los tipos dados
+        '''
+
+        if len(tipos) == 1:
+            return self._por_tipo.get(tipos[0], ())
+
+        return tuple(actual for grupo in self._grupos for actual in grupo if actual.tipo in tipos)
+
+
+    def grupo(self, i):
+        ''' Devuelve los registros de los puertos del grupo dado
+        '''
+
+        return self._grupos[i]
+
+
+    def grupos(self):
+        ''' Devuelve todos los grupos de registros, en el orden de la configuración
+        '''
+
+        return self._grupos
+
+
+    def ubicar(self, gpio):
+        ''' Devuelve el grupo y la posición dentro de él del puerto GPIO dado o False si no está gestionado
+        '''
+
+        encontrado = self._por_gpio.get(gpio)
+
+        return encontrado[1:] if encontrado else False
+
+
+class gestor_salidas(object):
+    ''' Clase que centraliza las escrituras en los puertos GPIO de salida:
+        - Cada puerto tiene su propio semáforo, por lo que escrituras en puertos distintos no se esperan entre sí
+        - Se mantiene una copia en memoria (sombra) del nivel de cada puerto, actualizada en cada escritura, para consultarlo sin leer el puerto
+        - Sólo se escribe en los puertos cuyo nivel cambia: las escrituras del mismo nivel que la sombra se suprimen y se cuentan
+        - Los sistemas de un mismo proceso comparten el gestor de su controlador (compartido()), al igual que comparten éste
+    '''
+
+    _compartidos        = WeakKeyDictionary()                                           # Controlador ➡ gestor compartido por todos los sistemas que lo usan
+    _semaforo_compartidos = Lock()                                                      # Los sistemas del supervisor se construyen cada uno en su hilo
+
+    def __init__(self, gpio):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+            - "gpio" es el módulo (o el objeto equivalente) de acceso a los puertos GPIO
+        '''
+
+        self._gpio              = gpio
+        self._discrepancias     = 0                                                     # Diferencias entre la sombra y los puertos halladas al releerlos
+        self._escritas          = 0                                                     # Escrituras que han llegado a los puertos, simples y PWM
+        self._escritas_pwm      = 0
+        self._observador        = None                                                  # Función a la que se avisará de cada cambio de nivel
+        self._semaforos         = {}
+        self._sombra            = {}
+        self._suprimidas        = 0                                                     # Escrituras ahorradas por no cambiar el nivel (o el ciclo de trabajo, más allá del margen)
+        self._suprimidas_pwm    = 0
+
+
+    @classmethod
+    def compartido(cls, gpio):
+        ''' Devuelve el gestor de salidas del controlador dado, creándolo la primera vez
+        '''
+
+        with cls._semaforo_compartidos:
+            if gpio not in cls._compartidos:
+                cls._compartidos[gpio] = cls(gpio)
+
+            return cls._compartidos[gpio]
+
+
+    def _anotar_pwm(self, escrita):
+        ''' Cuenta un cambio del ciclo de trabajo de una salida PWM, escrito o suprimido
+        '''
+
+        if escrita:
+            self._escritas_pwm += 1
+
+        else:
+            self._suprimidas_pwm += 1
+
+
+    def conmutar(self, canal):
+        ''' Invierte el nivel de un puerto y devuelve el nuevo nivel
+        '''
+
+        with self._semaforos[canal]:
+            nivel = self._gpio.LOW if self._sombra[canal] else self._gpio.HIGH
+
+            self._gpio.output(canal, nivel)
+            self._sombra[canal] = nivel
+
+            if self._observador:
+                self._observador(canal, nivel)
+
+        return nivel
+
+
+    def discrepancias(self):
+        ''' Observador de la cantidad de diferencias entre la sombra y los puertos halladas al releerlos
+        '''
+
+        return self._discrepancias
+
+
+    def escribir(self, canal, nivel):
+        ''' Establece el nivel de un puerto, si es distinto del que ya tiene
+        '''
+
+        with self._semaforos[canal]:
+            if self._sombra[canal] == nivel:
+                self._suprimidas += 1
+
+                return
+
+            self._gpio.output(canal, nivel)
+            self._sombra[canal] = nivel
+            self._escritas += 1
+
+            if self._observador:
+                self._observador(canal, nivel)
+
+
+    def escribir_varios(self, niveles):
+        ''' Establece a la vez el nivel de varios puertos, dados como diccionario puerto ➡ nivel, en una única operación del controlador
+            - Se toman los semáforos de todos ellos, siempre en el mismo orden, para no bloquearse con otra escritura múltiple
+            - Sólo se escriben los puertos cuyo nivel cambia; si no cambia ninguno, no se llega al controlador
+        '''
+
+        if not(niveles):
+            return
+
+        with ExitStack() as semaforos:
+            for canal in sorted(niveles):
+                semaforos.enter_context(self._semaforos[canal])
+
+            cambios = {canal: nivel for canal, nivel in niveles.items() if self._sombra[canal] != nivel}
+
+            self._suprimidas += len(niveles) - len(cambios)
+
+            if cambios:
+                self._gpio.escribir_varios(cambios)
+                self._sombra.update(cambios)
+                self._escritas += len(cambios)
+
+                if self._observador:
+                    for canal, nivel in cambios.items():
+                        self._observador(canal, nivel)
+
+
+    def estadisticas(self):
+        ''' Devuelve las escrituras que han llegado a los puertos y las suprimidas por no cambiar nada, simples y PWM
+        '''
+
+        return {
+            'escritas'      : self._escritas,
+            'escritas_pwm'  : self._escritas_pwm,
+            'suprimidas'    : self._suprimidas,
+            'suprimidas_pwm': self._suprimidas_pwm,
+        }
+
+
+    def gestiona(self, canal):
+        ''' Indica si un puerto está registrado como salida
+        '''
+
+        return canal in self._semaforos
+
+
+    def leer(self, canal):
+        ''' Devuelve el último nivel escrito en un puerto, sin leerlo, o None si no está registrado
+        '''
+
+        return self._sombra.get(canal)
+
+
+    def olvidar(self, canal):
+        ''' Deja de gestionar un puerto, por ejemplo, porque ha desaparecido de la configuración
+        '''
+
+        with self._semaforos.pop(canal):
+            del self._sombra[canal]
+
+
+    def observar(self, observador):
+        ''' Establece la función a la que se avisará, con el puerto y su nuevo nivel, de cada cambio de nivel (None para ninguna)
+            - Se le llama con el semáforo del puerto tomado, por lo que los avisos de un mismo puerto llegan en orden
+        '''
+
+        self._observador = observador
+
+
+    def pwm(self, acceso, margen = 0.0):
+        ''' Envuelve un objeto de control PWM para que sólo cambie su ciclo de trabajo cuando difiera del último escrito en más del margen dado (en puntos porcentuales), contando aquí sus escrituras
+        '''
+
+        return salida_pwm(acceso, self, margen)
+
+
+    def registrar(self, canal, nivel = None):
+        ''' Registra un puerto de salida, con su nivel actual; si no se da, se lee del propio puerto
+        '''
+
+        self._semaforos[canal] = Lock()
+        self._sombra[canal] = self._gpio.input(canal) if nivel is None else nivel
+
+
+    def releer(self):
+        ''' Relee todos los puertos y corrige la sombra donde no coincida con ellos (por ejemplo, si otro proceso los ha modificado)
+            - Devuelve la cantidad de diferencias halladas
+        '''
+
+        halladas = 0
+
+        for canal, semaforo in self._semaforos.items():
+            with semaforo:
+                nivel = self._gpio.input(canal)
+
+                if nivel != self._sombra[canal]:
+                    self._sombra[canal] = nivel
+
+                    halladas += 1
+
+                    if self._observador:
+                        self._observador(canal, nivel)
+
+        self._discrepancias += halladas
+
+        return halladas
+
+
+class salida_pwm(object):
+    ''' Envoltorio de un objeto de control PWM que recuerda el último ciclo de trabajo escrito y no vuelve a escribirlo si no cambia (más allá del margen)
+        - Los ciclos extremos (0 y 100) se escriben siempre que cambien, por pequeño que sea el cambio, para poder apagar y poner al máximo
+        - El resto de métodos y atributos (ChangeFrequency()...) son los del objeto envuelto
+    '''
+
+    def __init__(self, acceso, gestor, margen = 0.0):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self._acceso            = acceso
+        self._ciclo             = None                                                  # Último ciclo de trabajo escrito, o None si no se conoce
+        self._gestor            = gestor
+        self._margen            = margen
+
+
+    def ChangeDutyCycle(self, ciclo):
+        ''' Cambia el ciclo de trabajo, si difiere del último escrito
+        '''
+
+        escrita = self._ciclo is None or (ciclo != self._ciclo and (ciclo in (0, 100) or abs(ciclo - self._ciclo) > self._margen))
+
+        if escrita:
+            self._acceso.ChangeDutyCycle(ciclo)
+            self._ciclo = ciclo
+
+        self._gestor._anotar_pwm(escrita)
+
+
+    def start(self, ciclo):
+        ''' Arranca la salida con el ciclo de trabajo dado
+        '''
+
+        self._acceso.start(ciclo)
+        self._ciclo = ciclo
+
+
+    def stop(self):
+        ''' Detiene la salida, tras lo cual se desconoce su ciclo de trabajo
+        '''
+
+        self._acceso.stop()
+        self._ciclo = None
+
+
+    def __getattr__(self, nombre):
+        ''' Todo lo no definido en esta clase se busca en el objeto envuelto
+        '''
+
+        return getattr(self._acceso, nombre)
+
+
+class trabajo_periodico(object):
+    ''' Clase que guarda un trabajo periódico del planificador, junto con sus estadísticas
+    '''
+
+    def __init__(self, nombre, funcion, periodo, alinear):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+            - "periodo" es un número de segundos o una función sin parámetros que lo devuelva, que se evalúa en cada vuelta (por ejemplo, para seguir a la configuración tras una recarga)
+            - "alinear" indica si los plazos se alinean con los múltiplos del periodo
+        '''
+
+        self.alinear            = alinear
+        self.desbordes          = 0                                                     # Vueltas que han durado más que el periodo
+        self.duracion_maxima    = 0.0
+        self.duracion_total     = 0.0
+        self.ejecuciones        = 0
+        self.fin                = None                                                  # Futuro que termina con el error del trabajo, si falla
+        self.funcion            = funcion
+        self.manejador          = None                                                  # Manejador de call_at() del próximo plazo
+        self.nombre             = nombre
+        self.perdidos           = 0                                                     # Plazos vencidos sin ejecutarse, por seguir en curso la vuelta anterior o por un bucle de eventos bloqueado
+        self.periodo            = periodo
+        self.plazo              = 0.0                                                   # Próximo plazo, en el reloj monotónico del bucle de eventos
+        self.plazo_vuelta       = 0.0                                                   # Plazo de la vuelta en curso
+        self.retraso_cuadrados  = 0.0
+        self.retraso_maximo     = 0.0
+        self.retraso_total      = 0.0
+        self.tarea              = None                                                  # Tarea de la vuelta en curso
+
+
+    def duracion_periodo(self):
+        ''' Devuelve el periodo actual del trabajo
+        '''
+
+        return self.periodo() if callable(self.periodo) else self.periodo
+
+
+    def siguiente_plazo(self, plazo):
+        ''' Devuelve el plazo que sigue al dado: el siguiente múltiplo del periodo, si se alinea, o el dado más el periodo, si no
+            - Se calcula siempre a partir del plazo anterior y no del momento actual, por lo que la duración de cada vuelta no desplaza a las siguientes
+        '''
+
+        periodo = self.duracion_periodo()
+
+        if self.alinear:
+            return (floor(plazo / periodo + 1e-9) + 1) * periodo                        # El margen evita que un plazo ya alineado se redondee al múltiplo anterior
+
+        return plazo + periodo
+
+
+    def estadisticas(self):
+        ''' Devuelve las estadísticas del trabajo: ejecuciones, retraso (medio, máximo y su desviación o jitter) respecto a cada plazo, duración (media y máxima) de cada vuelta, plazos perdidos y desbordes
+        '''
+
+        ejecuciones = self.ejecuciones or 1
+        retraso_medio = self.retraso_total / ejecuciones
+
+        return {
+            'desbordes'         : self.desbordes,
+            'duracion_maxima'   : self.duracion_maxima,
+            'duracion_media'    : self.duracion_total / ejecuciones,
+            'ejecuciones'       : self.ejecuciones,
+            'jitter'            : max(self.retraso_cuadrados / ejecuciones - retraso_medio ** 2, 0.0) ** 0.5,
+            'perdidos'          : self.perdidos,
+            'periodo'           : self.duracion_periodo(),
+            'retraso_maximo'    : self.retraso_maximo,
+            'retraso_medio'     : retraso_medio,
+        }
+
+
+class planificador(object):
+    ''' Clase que ejecuta trabajos periódicos en un bucle de eventos, por plazos y no por pausas:
+        - Cada plazo se calcula a partir del anterior, en el reloj monotónico del bucle de eventos, por lo que la duración de cada vuelta no desplaza a las siguientes
+        - Los plazos se alinean con su periodo y, con una holgura, con los de otros trabajos, de forma que varios trabajos comparten un mismo despertar
+        - Cada vuelta es una tarea propia, así que un trabajo lento no retrasa al resto; si aún sigue en curso cuando vence su siguiente plazo, éste se pierde
+        - Lleva las estadísticas de cada trabajo (retrasos, plazos perdidos y desbordes) y los despertares de todos ellos
+    '''
+
+    _compartidos        = WeakKeyDictionary()                                           # Bucle de eventos ➡ planificador compartido por todos los sistemas que se ejecutan en él
+
+    def __init__(self, holgura = 0.0):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+            - "holgura" es el margen (en segundos) que un plazo puede moverse para coincidir con el de otro trabajo
+        '''
+
+        self._despertares       = 0
+        self._holgura           = holgura
+        self._trabajos          = {}
+        self._ultimo_despertar  = None
+
+
+    @classmethod
+    def compartido(cls, holgura = 0.0):
+        ''' Devuelve el planificador del bucle de eventos en ejecución, creándolo la primera vez
+        '''
+
+        bucle = asyncio.get_running_loop()
+
+        if bucle not in cls._compartidos:
+            cls._compartidos[bucle] = cls(holgura)
+
+        return cls._compartidos[bucle]
+
+
+    def _agrupar(self, plazo, actual):
+        ''' Devuelve el plazo dado o, si hay otro trabajo con un plazo a menos de la holgura, el de éste, para despertar a la vez
+        '''
+
+        cercanos = [trabajo.plazo for trabajo in self._trabajos.values() if trabajo is not actual and trabajo.manejador and abs(trabajo.plazo - plazo) <= self._holgura]
+
+        return min(cercanos, key = lambda otro: abs(otro - plazo)) if cercanos else plazo
+
+
+    async def _correr(self, trabajo, inicio):
+        ''' Ejecuta una vuelta del trabajo y anota su duración
+            - Si la función devuelve un número, el siguiente plazo será ése número de segundos tras el de esta vuelta, en lugar del periodo
+            - Si la función falla, el trabajo termina con su error
+        '''
+
+        plazo = trabajo.plazo_vuelta
+
+        try:
+            resultado = trabajo.funcion()
+
+            if asyncio.iscoroutine(resultado):
+                resultado = await resultado
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            if not(trabajo.fin.done()):
+                trabajo.fin.set_exception(e)
+
+            return
+
+        duracion = asyncio.get_running_loop().time() - inicio
+
+        trabajo.duracion_total += duracion
+        trabajo.duracion_maxima = max(trabajo.duracion_maxima, duracion)
+
+        if duracion > trabajo.duracion_periodo():
+            trabajo.desbordes += 1
+
+        if isinstance(resultado, (int, float)) and not(isinstance(resultado, bool)) and trabajo.nombre in self._trabajos:    # El propio trabajo pide otro plazo para su siguiente vuelta
+            trabajo.manejador.cancel()
+
+            self._programar(trabajo, plazo + resultado)
+
+
+    def _programar(self, trabajo, plazo, agrupar = True):
+        ''' Programa el siguiente plazo del trabajo, agrupándolo (si se pide) con el de otro trabajo cercano
+            - Un plazo alineado que se agrupa vuelve a su rejilla en el siguiente, ya que éste se calcula como múltiplo del periodo
+        '''
+
+        trabajo.plazo = self._agrupar(plazo, trabajo) if agrupar else plazo
+        trabajo.manejador = asyncio.get_running_loop().call_at(trabajo.plazo, self._vencer, trabajo)
+
+
+    def _vencer(self, trabajo):
+        ''' Atiende el vencimiento de un plazo: lanza la vuelta del trabajo (salvo que siga en curso la anterior) y programa el siguiente plazo
+        '''
+
+        bucle = asyncio.get_running_loop()
+        ahora = bucle.time()
+        plazo = trabajo.plazo
+        periodo = trabajo.duracion_periodo()
+
+        if plazo != self._ultimo_despertar:                                             # Los trabajos con el mismo plazo comparten el despertar
+            self._despertares += 1
+            self._ultimo_despertar = plazo
+
+        if trabajo.tarea and not(trabajo.tarea.done()):                                 # La vuelta anterior aún no ha terminado
+            trabajo.perdidos += 1
+
+        else:
+            retraso = ahora - plazo
+
+            trabajo.ejecuciones += 1
+            trabajo.retraso_total += retraso
+            trabajo.retraso_cuadrados += retraso * retraso
+            trabajo.retraso_maximo = max(trabajo.retraso_maximo, retraso)
+
+            trabajo.plazo_vuelta = plazo
+            trabajo.tarea = bucle.create_task(self._correr(trabajo, ahora))
+
+        siguiente = trabajo.siguiente_plazo(plazo)
+
+        if siguiente <= ahora:                                                          # Si el bucle de eventos ha estado bloqueado más de un periodo, se saltan los plazos vencidos
+            saltados = int((ahora - siguiente) // periodo) + 1
+
+            trabajo.perdidos += saltados
+            siguiente += saltados * periodo
+
+        self._programar(trabajo, siguiente)
+
+
+    def estadisticas(self):
+        ''' Devuelve las estadísticas de todos los trabajos y los despertares del planificador
+        '''
+
+        return {
+            'despertares'       : self._despertares,
+            'trabajos'          : {nombre: trabajo.estadisticas() for nombre, trabajo in list(self._trabajos.items())},
+        }
+
+
+    async def periodico(self, nombre, funcion, periodo, inicio = 0.0, alinear = True):
+        ''' Ejecuta periódicamente la función (normal o corrutina) dada, hasta que se cancele o falle, en cuyo caso lanza su error
+            - "inicio" es el tiempo (en segundos) hasta la primera vuelta; por defecto, se ejecuta en el acto
+            - "alinear" indica si los plazos, tras la primera vuelta, se alinean con los múltiplos del periodo, para que los trabajos de periodos iguales o múltiplos despierten a la vez
+        '''
+
+        if nombre in self._trabajos:
+            raise ValueError(f'Ya hay un trabajo periódico llamado "{nombre}"')
+
+        bucle = asyncio.get_running_loop()
+        trabajo = trabajo_periodico(nombre, funcion, periodo, alinear)
+        trabajo.fin = bucle.create_future()
+
+        self._trabajos[nombre] = trabajo
+        self._programar(trabajo, bucle.time() + inicio, agrupar = False)
+
+        try:
+            await trabajo.fin
+
+        finally:
+            del self._trabajos[nombre]
+
+            trabajo.manejador.cancel()
+
+            if trabajo.tarea and not(trabajo.tarea.done()):
+                trabajo.tarea.cancel()
+
+
 class app(object):
     ''' Clase abstracta que contiene todos los métodos comunes para una app de este sistema
     '''
 
     __metaclass__       = ABCMeta
 
-    _VERSION_PROTOCOLO  = 1.1
+    _VERSION_PROTOCOLO  = 1.6
 
 
     def __init__(self, config, nombre):
@@ -50,15 +710,29 @@ class app(object):
             - Asigna señales a sus correspondientes funciones
         '''
 
+        self._alojado           = False                                                 # El supervisor lo activa en los sistemas que aloja, cuyas señales son las suyas
         self._bloqueo           = bloqueo(nombre) if nombre else False                  # No siempre va a ser necesario realizar un bloqueo
         self._config            = config
+        self._entrada           = protocolo.bufer_entrada()                             # Búfer de recepción de mensajes
         self._estado_conexion   = estados_conexion.DESCONECTADO
+        self._gpio              = hardware.controlador(getattr(config, 'CONTROLADOR_GPIO', None)) # Controlador de los puertos GPIO, compartido por todo el proceso
+        self._indice            = False                                                 # El índice de puertos GPIO se construirá en el arranque
+        self._mascaras          = {}                                                    # Las máscaras de cada tipo de puerto se calcularán en el arranque
+        self._salidas           = gestor_salidas.compartido(self._gpio)                 # Gestor de escrituras en los puertos GPIO de salida, compartido por todo el proceso
         self._modo_apagado      = False
         self._socket            = False
 
         self.asignar_senyales()
 
 
+    def _completar_recarga(self, anterior, cambios):                                    # @UnusedVariable
+        ''' Función que los sistemas pueden sobrescribir para aplicar, ya con la nueva configuración y los puertos reconfigurados, los cambios que les afecten
+            - "anterior" es la configuración anterior y "cambios", el conjunto de opciones que han cambiado
+        '''
+
+        pass
+
+
     def _conectar(self, salida = True):
         ''' Realiza una conexión contra el servidor local
             - Comprueba el estado de la conexión
@@ -72,20 +746,36 @@ class app(object):
             if salida:
                 print('Info: Conectando al servidor...')
 
-            try:
-                self._socket.connect(('localhost', self._config.puerto))
+            conectado = False
 
-            except TimeoutError:
-                print('Error: Tiempo de espera agotado al conectar al servidor', file = sys.stderr)
+            for familia, direccion in self._direcciones_servidor():                     # Se prueban las direcciones del servidor por orden de preferencia
+                try:
+                    if self._socket.family != familia:                                  #     Si el socket no es de la familia adecuada, se sustituye
+                        self._socket.close()
+                        self._socket = socket.socket(familia, socket.SOCK_STREAM)
 
-                return False
+                    self._socket.connect(direccion)
 
-            except ConnectionRefusedError:
-                print('Error: Imposible conectar al servidor', file = sys.stderr)
+                except TimeoutError:
+                    print('Error: Tiempo de espera agotado al conectar al servidor', file = sys.stderr)
 
-                return False
+                    return False
+
+                except (ConnectionRefusedError, FileNotFoundError):                     # Si no hay nadie escuchando en esta dirección, se prueba con la siguiente
+                    self._socket.close()
+                    self._socket = socket.socket(familia, socket.SOCK_STREAM)
+
+                except AttributeError:
+                    return False
+
+                else:
+                    conectado = True
+
+                    break
+
+            if not(conectado):
+                print('Error: Imposible conectar al servidor', file = sys.stderr)
 
-            except AttributeError:
                 return False
 
             else:
@@ -94,83 +784,314 @@ class app(object):
 
                 self._estado_conexion = estados_conexion.CONECTADO
 
-                mensaje = self._enviar_y_recibir('hola ' + str(self._VERSION_PROTOCOLO))
+                mensaje = self._saludar()
 
                 if not(mensaje):                                                        # Si hay algún fallo al conectar con el servidor
                     return False                                                        #     Se informa del fallo
 
-                elif(mensaje[:2] == 'ok'):                                              # Si el servidor devuelve un "ok" (significa que la versión del protocolo del servidor es la misma)
-                    return True                                                         #     Se informa del éxito
+                elif(mensaje[:2] == 'ok'):                                              # Si el servidor devuelve un "ok" (significa que la versión del protocolo del servidor es la misma)
+                    return True                                                         #     Se informa del éxito
+
+                elif(mensaje[:4] == 'info'):                                            # Si el servidor devuelve un "info" (significa que el servidor usa una versión distinta)
+                    self._VERSION_PROTOCOLO = float(mensaje[5:])                        #     Se informa del éxito
+
+                    return True
+
+                else:                                                                   # Si el servidor devuelve otra cosa (el protocolo es incompatible, ha sucedido algún problema, el servidor no responde, etc.)
+                    self._desconectar()                                                 #     Se desconecta
+
+                    return False                                                        #     Se informa del fallo
+
+        else:
+            print('Error: Imposible conectar al servidor, ya hay una conexión activa', file = sys.stderr)
+
+            return False
+
+
+    def _configurar_puertos(self, puertos):
+        ''' Configura como salida o entrada los puertos dados, en función de su tipo:
+            - Las salidas simples se registran en el gestor de salidas y se llevan a su reposo en una única escritura
+            - Las salidas PWM se arrancan con un ciclo de trabajo nulo, por hardware si están en la variable de configuración PWM_HARDWARE y su chip está disponible, y si no, por software
+            - Devuelve un diccionario puerto ➡ objeto de control de las salidas PWM
+        '''
+
+        apagados = {}                                                                   # Nivel de reposo de las salidas simples, que se escribirá de una sola vez
+        pwm = {}                                                                        # Objetos de control PWM, que se guardan en el índice y no en la configuración
+
+        for puerto in puertos:
+            if puerto.tipo == self._config.BOTON or puerto.tipo == self._config.SONDA:
+                if DEBUG:
+                    print(f"Proceso  #{os.getpid()}\tConfigurando el puerto GPIO{puerto.gpio} como entrada")
+
+                self._gpio.setup(puerto.gpio, self._gpio.IN, pull_up_down = self._gpio.PUD_DOWN)
+
+            elif puerto.tipo == self._config.LED_PWM or puerto.tipo == self._config.VENTILADOR_PWM:
+                acceso = hardware.pwm_hardware(puerto.gpio, self._config.FRECUENCIA, getattr(self._config, 'PWM_HARDWARE', None))
+
+                if acceso is not None:                                                  # Por hardware, el puerto ha de quedar asignado al periférico PWM, sin configurarlo como salida
+                    pwm[puerto.gpio] = self._salidas.pwm(acceso, getattr(self._config, 'MARGEN_PWM', 0.0))
+
+                    try:
+                        pwm[puerto.gpio].start(0)
+
+                    except OSError as e:                                                # El núcleo aún puede rechazar el canal (EBUSY, EACCES...), y no por ello ha de fallar el arranque
+                        print(f'Aviso: PWM por hardware no disponible en el puerto GPIO{puerto.gpio} ({e}); se usará por software', file = sys.stderr)
+
+                        acceso = None
+
+                if acceso is None:                                                      # Por software, el puerto es una salida GPIO más
+                    self._gpio.setup(puerto.gpio, self._gpio.OUT, initial = self._gpio.LOW if puerto.activacion else self._gpio.HIGH)
+
+                    pwm[puerto.gpio] = self._salidas.pwm(self._gpio.PWM(puerto.gpio, self._config.FRECUENCIA), getattr(self._config, 'MARGEN_PWM', 0.0))
+
+                    pwm[puerto.gpio].start(0)
+
+                if DEBUG:
+                    print(f"Proceso  #{os.getpid()}\tConfigurando el puerto GPIO{puerto.gpio} como salida PWM por {'software' if acceso is None else 'hardware'}")
+
+            else:
+                if DEBUG:
+                    print(f"Proceso  #{os.getpid()}\tConfigurando el puerto GPIO{puerto.gpio} como salida")
+
+                self._gpio.setup(puerto.gpio, self._gpio.OUT, initial = self._gpio.LOW if puerto.activacion else self._gpio.HIGH)  # Cada salida arranca ya en reposo, sin encenderse ni un instante
+
+                apagados[puerto.gpio] = self._gpio.LOW if puerto.activacion else self._gpio.HIGH
+
+                self._salidas.registrar(puerto.gpio, apagados[puerto.gpio])
+
+        self._salidas.escribir_varios(apagados)                                         # Se fija el reposo de todas las salidas simples en una única escritura
+
+        return pwm
+
+
+    def _direcciones_servidor(self):
+        ''' Devuelve, por orden de preferencia, las familias y direcciones en las que buscar al servidor local
+            - Si hay configurado un socket de dominio UNIX, se prefiere, ya que evita la pila TCP
+            - Si no o si no responde, se usa el puerto TCP
+        '''
+
+        direcciones = []
+
+        if getattr(self._config, 'SOCKET_UNIX', None):
+            direcciones.append((socket.AF_UNIX, direccion_unix(self._config.SOCKET_UNIX)))
+
+        direcciones.append((socket.AF_INET, ('localhost', self._config.puerto)))
+
+        return direcciones
+
+
+    def _desconectar(self):
+        ''' Desconecta, si se está conectado, una conexión existente contra un servidor
+            - Comprueba el estado de la conexión
+            - Si el estado es >= 1 (hay una conexión activa), la desconecta
+            - Si no, no hace nada
+        '''
+
+        if self._estado_conexion >= estados_conexion.CONECTADO:
+            try:
+                self._socket.sendall(protocolo.enmarcar('desconectar', self._entrada.enmarcado))
+
+            except OSError:                                                             # Si el servidor ya se ha ido, no hay nada de lo que despedirse
+                pass
+
+            self._socket.close()
+            self._entrada.vaciar()
+            self._socket = socket.socket(self._socket.family, socket.SOCK_STREAM)
+
+            self._estado_conexion = estados_conexion.DESCONECTADO
+
+
+    def _enviar_y_recibir(self, comando, normalizar = True):
+        ''' Envía un comando dado en el parámetro "comando", previamente normalizado a petición y recibe la respuesta correspondiente
+            - Comprueba si existe el socket e intenta utilizarlo
+                - Si no, retorna "False"
+                - Si sí, recibe el mensaje y lo retorna
+        '''
+
+        if self._socket:
+            try:                                                                        # Bloque try
+                self._socket.sendall(protocolo.enmarcar(comando, self._entrada.enmarcado))  # Se manda el mensaje, enmarcado si el protocolo lo permite
+
+            except (BrokenPipeError, ConnectionResetError, OSError):                    # Error de tubería rota, de conexión reiniciada o del sistema operativo
+                mensaje = 'desconectar'                                                 #     Se precarga el comando de desconexión para que sea ejecutado en la siguiente vuelta
+
+            else:                                                                       # Si todo ha ido bien
+                mensaje = self._recibir_mensaje()                                       #     Se recibe la respuesta
+
+            if normalizar:                                                              # Si se ha solicitado la normalización
+                mensaje = mensaje.lower()                                               #     Se normaliza
+
+            return mensaje
+
+        else:
+            return False
+
+
+    def _enviar_y_recibir_varios(self, comandos, normalizar = True):
+        ''' Envía de una sola vez todos los comandos dados y recibe, en orden, sus respuestas
+            - Si el protocolo no enmarca los mensajes, se envían uno a uno
+            - Si no existe el socket, retorna "False"
+        '''
+
+        if not(self._socket):
+            return False
+
+        elif not(self._entrada.enmarcado):                                              # Sin enmarcado es imposible separar las respuestas, así que se envían uno a uno
+            return [self._enviar_y_recibir(comando, normalizar) for comando in comandos]
+
+        else:
+            try:                                                                        # Bloque try
+                self._socket.sendall(b''.join(protocolo.enmarcar(comando) for comando in comandos))  # Se mandan todos los mensajes en una única escritura
+
+            except (BrokenPipeError, ConnectionResetError, OSError):                    # Error de tubería rota, de conexión reiniciada o del sistema operativo
+                return ['desconectar'] * len(comandos)
+
+            mensajes = [self._recibir_mensaje() for _ in comandos]                      # Las respuestas llegan en el mismo orden que los comandos
+
+            if normalizar:                                                              # Si se ha solicitado la normalización
+                mensajes = [mensaje.lower() for mensaje in mensajes]                    #     Se normalizan
+
+            return mensajes
+
+
+    def _encender_pruebas(self):
+        ''' Enciende todas las salidas, como parte del modo de pruebas
+            - Devuelve si hay puertos GPIO que encender
+        '''
+
+        try:                                                                            # Bloque try
+            self._config.GPIOS                                                          #     Se comprueba la existencia de puertos GPIO
+
+        except AttributeError:                                                          # Si no los hay
+            return False                                                                #     Sin problema
+
+        else:                                                                           # Si sí los hay
+            if DEBUG:
+                print('Encendiendo leds')
+
+            encendidos = {}
+
+            for tipo in (self._config.RELE, self._config.LED):                          #     Los relés y leds normales se "encienden" de modo normal, todos a la vez
+                if tipo in self._mascaras:
+                    encendidos.update(self._mascaras[tipo].encendido)
+
+            self._salidas.escribir_varios(encendidos)
+
+            for puerto in self._indice.buscar_tipo(self._config.LED_PWM) if self._indice else ():   # Los leds controlados por PWM se "encienden" de modo ciclo de trabajo
+                puerto.acceso.ChangeDutyCycle(100)
+
+            return True
+
+
+    def _preparar_mascaras(self):
+        ''' Calcula, a partir del índice, las máscaras de encendido y apagado de cada tipo de puerto de salida simple
+            - Así, encender o apagar todos los puertos de un tipo es una única escritura múltiple, sin recorrer la configuración
+        '''
+
+        self._mascaras = {}
+
+        for tipo in (self._config.RELE, self._config.LED, self._config.VENTILADOR):
+            puertos = self._indice.buscar_tipo(tipo)
+
+            if puertos:
+                self._mascaras[tipo] = mascara(
+                    {actual.gpio: self._gpio.HIGH if actual.activacion else self._gpio.LOW for actual in puertos},
+                    {actual.gpio: self._gpio.LOW if actual.activacion else self._gpio.HIGH for actual in puertos},
+                )
+
+
+    def _preparar_recarga(self, cambios):                                               # @UnusedVariable
+        ''' Función que los sistemas pueden sobrescribir para detener, antes de reconfigurar los puertos, lo que dependa de las opciones que han cambiado
+        '''
+
+        pass
+
+
+    def _reconfigurar_puertos(self, indice, frecuencia = False):
+        ''' Pasa de los puertos del índice actual a los del dado, tocando sólo los que cambian:
+            - Los que conservan su tipo y su activación siguen como están, con su nivel y su objeto PWM (al que se le cambia la frecuencia si es necesario)
+            - Los que desaparecen o cambian se detienen y se liberan
+            - Los que aparecen o cambian se configuran de nuevo
+            - "frecuencia" indica si ha cambiado la frecuencia de las salidas PWM
+        '''
+
+        conservados = {}                                                                # Puerto ➡ objeto de control de los puertos que no cambian
+        retirados = []
 
-                elif(mensaje[:4] == 'info'):                                            # Si el servidor devuelve un "info" (significa que el servidor usa una versión distinta)
-                    self._VERSION_PROTOCOLO = float(mensaje[5:])                        #     Se informa del éxito
+        for grupo in self._indice.grupos():
+            for puerto in grupo:
+                nuevo = indice.buscar(puerto.gpio)
 
-                    return True
+                if nuevo and (nuevo.tipo, nuevo.activacion) == (puerto.tipo, puerto.activacion):
+                    conservados[puerto.gpio] = puerto.acceso
 
-                else:                                                                   # Si el servidor devuelve otra cosa (el protocolo es incompatible, ha sucedido algún problema, el servidor no responde, etc.)
-                    self._desconectar()                                                 #     Se desconecta
+                else:
+                    retirados.append(puerto)
 
-                    return False                                                        #     Se informa del fallo
+        for puerto in retirados:
+            if DEBUG:
+                print(f"Proceso  #{os.getpid()}\tLiberando el puerto GPIO{puerto.gpio}")
 
-        else:
-            print('Error: Imposible conectar al servidor, ya hay una conexión activa', file = sys.stderr)
+            if puerto.tipo == self._config.LED_PWM or puerto.tipo == self._config.VENTILADOR_PWM:
+                puerto.acceso.stop()
 
-            return False
+            elif self._salidas.gestiona(puerto.gpio):
+                self._salidas.olvidar(puerto.gpio)
 
+            self._gpio.cleanup(puerto.gpio)
 
-    def _desconectar(self):
-        ''' Desconecta, si se está conectado, una conexión existente contra un servidor
-            - Comprueba el estado de la conexión
-            - Si el estado es >= 1 (hay una conexión activa), la desconecta
-            - Si no, no hace nada
-        '''
+        pwm = {gpio: acceso for gpio, acceso in conservados.items() if acceso is not None}
 
-        if self._estado_conexion >= estados_conexion.CONECTADO:
-            self._socket.sendall('desconectar'.encode('utf-8'))
-            self._socket.close()
-            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if frecuencia:                                                                  # Si ha cambiado la frecuencia, se aplica a las salidas PWM conservadas
+            for acceso in pwm.values():
+                acceso.ChangeFrequency(self._config.FRECUENCIA)
 
-            self._estado_conexion = estados_conexion.DESCONECTADO
+        pwm.update(self._configurar_puertos(puerto for grupo in indice.grupos() for puerto in grupo if puerto.gpio not in conservados))
 
+        self._indice = indice_puertos(self._config, pwm)
+        self._preparar_mascaras()
 
-    def _enviar_y_recibir(self, comando, normalizar = True):
-        ''' Envía un comando dado en el parámetro "comando", previamente normalizado a petición y recibe la respuesta correspondiente
-            - Comprueba si existe el socket e intenta utilizarlo
-                - Si no, retorna "False"
-                - Si sí, recibe el mensaje y lo retorna
+
+    def _recibir_mensaje(self):
+        ''' Recibe el siguiente mensaje completo del servidor, leyendo del socket tanto como sea necesario
+            - Si el servidor cierra la conexión, retorna una cadena vacía
         '''
 
-        if self._socket:
-            try:                                                                        # Bloque try
-                self._socket.send(comando.encode('utf-8'))                              #     Se manda el mensaje
+        mensaje = self._entrada.mensaje()                                               # Puede que ya se haya recibido junto con un mensaje anterior
 
-            except BrokenPipeError:                                                     # Error de tubería rota
-                comando = 'desconectar'                                                 #     Se precarga el comando de desconexión para que sea ejecutado en la siguiente vuelta
+        while mensaje is None:
+            try:                                                                        # Bloque try
+                datos = self._socket.recv(protocolo.TAMANYO_BUFER)                      #     Se recibe lo que haya disponible
 
             except ConnectionResetError:                                                # Error de conexión reiniciada
-                comando = 'desconectar'                                                 #     Se precarga el comando de desconexión para que sea ejecutado en la siguiente vuelta
+                return 'desconectar'                                                    #     Se precarga el comando de desconexión para que sea ejecutado en la siguiente vuelta
 
-            except OSError:                                                             # Error del sistema operativo
-                comando = 'desconectar'                                                 #     Se precarga el comando de desconexión para que sea ejecutado en la siguiente vuelta
+            if not(datos):                                                              # El servidor ha cerrado la conexión
+                return ''
 
-            else:                                                                       # Si todo ha ido bien (nótese la duplicidad de código; ¡gracias, Python, por no implementar la estructura do - while!)
-                try:                                                                    #     Bloque try
-                    mensaje = self._socket.recv(1024)                                   #         Ante un evento, se recibe el contenido
+            self._entrada.anyadir(datos)
+            mensaje = self._entrada.mensaje()
 
-                except ConnectionResetError:                                            #     Error de conexión reiniciada
-                    mensaje = 'desconectar'                                             #         Se precarga el comando de desconexión para que sea ejecutado en la siguiente vuelta
+        return mensaje
 
-                else:                                                                   #     Si todo ha ido bien
-                    mensaje = mensaje.decode('utf_8')                                   #         Se decodifica el mensaje recibido
 
-            if normalizar:                                                              # Si se ha solicitado la normalización
-                mensaje = mensaje.lower()                                               #     Se normaliza
+    def _saludar(self):
+        ''' Manda el saludo con la versión del protocolo propia y devuelve, normalizada, la respuesta del servidor
+            - El saludo siempre se manda enmarcado, ya que los servidores antiguos ignoran el terminador
+            - Si la respuesta viene enmarcada, el resto de la conversación también lo estará
+        '''
 
-            return mensaje
+        try:                                                                            # Bloque try
+            self._socket.sendall(protocolo.enmarcar('hola ' + str(self._VERSION_PROTOCOLO)))
+            datos = self._socket.recv(protocolo.TAMANYO_BUFER)
 
-        else:
+        except (BrokenPipeError, ConnectionResetError, OSError):                        # Error de tubería rota, de conexión reiniciada o del sistema operativo
             return False
 
+        self._entrada.enmarcado = datos.endswith(protocolo.SEPARADOR)                   # Un servidor que enmarca su respuesta al saludo enmarcará todas las demás
+
+        return datos.decode('utf_8').strip().lower()
+
 
     def _sig_apagado(self, signum, frame):                                              # @UnusedVariable
         ''' Funcion "wrapper" para el procesamiento de la señal de apagado
@@ -187,6 +1108,13 @@ class app(object):
         os._exit(0)
 
 
+    def _sig_recargar(self, signum, frame):                                             # @UnusedVariable
+        ''' Funcion "wrapper" para el procesamiento de la señal de recarga de la configuración
+        '''
+
+        self.recargar()
+
+
     def _sig_test(self, signum, frame):                                                 # @UnusedVariable
         ''' Funcion "wrapper" para el procesamiento de la señal de pruebas
         '''
@@ -202,13 +1130,11 @@ class app(object):
 
         self._modo_apagado = not(self._modo_apagado)                                    # Se comuta el modo apagado
 
-        for puertos in self._config.GPIOS:                                              # Se recorre la lista de puertos GPIO
-            for gpio, tipo, acceso, activacion, _ in puertos:
-                if tipo == self._config.LED:                                            #     Si se está ante un led
-                    GPIO.output(gpio, GPIO.LOW if activacion else GPIO.HIGH)            #         Se "apaga" de modo simple
+        if self._config.LED in self._mascaras:                                          # Los leds se "apagan" de modo simple, todos a la vez
+            self._salidas.escribir_varios(self._mascaras[self._config.LED].apagado)
 
-                elif tipo == self._config.LED_PWM:                                      #     Si se está ante un led controlado por PWM
-                    acceso.ChangeDutyCycle(0)                                           #         Se "apaga" de modo ciclo de trabajo
+        for puerto in self._indice.buscar_tipo(self._config.LED_PWM) if self._indice else ():   # Los leds controlados por PWM se "apagan" de modo ciclo de trabajo
+            puerto.acceso.ChangeDutyCycle(0)
 
 
     def arranque(self):
@@ -216,6 +1142,7 @@ class app(object):
             - Comprueba si hay otra instancia en ejecución
                 - Si no, establece un bloqueo para evitar otras ejecuciones
                 - Si sí, sale
+            - Valida y compila la configuración de los puertos GPIO
             - Configura los puertos GPIO
         '''
 
@@ -228,38 +1155,22 @@ class app(object):
                     pass
 
                 else:
-                    GPIO.setmode(GPIO.BCM)                                              # Establecemos el sistema de numeración BCM
-
-                    GPIO.setwarnings(DEBUG)                                             # De esta forma alertará de los problemas sólo cuando se esté depurando
+                    try:
+                        indice = indice_puertos(self._config)                           # La configuración se valida y se compila una única vez, antes de tocar ningún puerto
 
-                    for i, puertos in enumerate(self._config.GPIOS):                    # Se configuran los pines GPIO como salida o entrada en función de lo leído en la configuración
-                        for j, puerto in enumerate(puertos):
-                            if DEBUG:
-                                print(f"Proceso  #{os.getpid()}\tPreparando el puerto GPIO{puerto[0]}")
+                    except ValueError as e:
+                        print(f'Error: Configuración incorrecta: {e}', file = sys.stderr)
 
-                            if puerto[1] == self._config.RELE           \
-                            or puerto[1] == self._config.LED            \
-                            or puerto[1] == self._config.LED_PWM        \
-                            or puerto[1] == self._config.VENTILADOR     \
-                            or puerto[1] == self._config.VENTILADOR_PWM :
-                                if DEBUG:
-                                    print(f"Proceso  #{os.getpid()}\tConfigurando el puerto GPIO{puerto[0]} como salida")
+                        return errno.EINVAL
 
-                                GPIO.setup(puerto[0], GPIO.OUT, initial = GPIO.LOW if puerto[2] else GPIO.HIGH)
+                    self._gpio.setmode(self._gpio.BCM)                                  # Establecemos el sistema de numeración BCM
 
-                                if puerto[1] == self._config.LED_PWM or puerto[1] == self._config.VENTILADOR_PWM:
-                                    self._config.GPIOS[i][j][2] = GPIO.PWM(puerto[0], self._config.FRECUENCIA)
+                    self._gpio.setwarnings(DEBUG)                                       # De esta forma alertará de los problemas sólo cuando se esté depurando
 
-                                    self._config.GPIOS[i][j][2].start(0)
+                    pwm = self._configurar_puertos(puerto for grupo in indice.grupos() for puerto in grupo)  # Se configuran los pines GPIO como salida o entrada en función de lo leído en la configuración
 
-                                else:
-                                    GPIO.output(puerto[0], GPIO.LOW if puerto[3] else GPIO.HIGH)
-
-                            else:
-                                if DEBUG:
-                                    print(f"Proceso  #{os.getpid()}\tConfigurando el puerto GPIO{puerto[0]} como entrada")
-
-                                GPIO.setup(puerto[0], GPIO.IN, pull_up_down = GPIO.PUD_DOWN)
+                    self._indice = indice_puertos(self._config, pwm) if pwm else indice # Una vez creados los objetos PWM, se incorporan a los registros de sus puertos
+                    self._preparar_mascaras()
 
                 return 0
 
@@ -289,7 +1200,7 @@ class app(object):
 
         else:
             for senyal, funcion in self._config.senyales.items():
-                signal.signal(eval('signal.' + senyal), eval('self._' + funcion))
+                signal.signal(getattr(signal, senyal), getattr(self, '_' + funcion))
 
 
     @abstractmethod                                                                     # Método abstracto
@@ -302,25 +1213,22 @@ class app(object):
 
     def cerrar(self):
         ''' Realiza las operaciones necesarias para el cierre del sistema:
-            - "Limpia" los puertos GPIO que hayan podido usarse
+            - "Limpia" los puertos GPIO que hayan podido usarse (sólo los suyos)
             - Desbloquea la posible ejecución de otra futura instancia del mismo sistema
         '''
 
         self._desconectar()
 
-        try:                                                                            # Bloque try
-            self._config.GPIOS                                                          #     Se comprueba la existencia de puertos GPIO
-
-        except AttributeError:                                                          # Si no los hay
-            pass                                                                        #     Sin problema
+        if self._indice:                                                                # Si los puertos GPIO han llegado a configurarse
+            for puerto in self._indice.salidas_pwm:                                     #     Se recorren los pines controlados por PWM
+                puerto.acceso.stop()                                                    #         Y se les ordena parar
 
-        else:                                                                           # Si sí los hay
-            for puertos in self._config.GPIOS:                                          #     Se recorren los pines GPIO
-                for _, tipo, acceso, _, _ in puertos:
-                    if tipo == self._config.LED_PWM:                                    #         Si el pin es un led controlado por PWM
-                        acceso.stop()                                                   #             Se le ordena parar
+            for grupo in self._indice.grupos():                                         #     Se liberan sólo los pines GPIO propios, ya que el controlador puede estar compartido con otros sistemas del mismo proceso
+                for puerto in grupo:
+                    if self._salidas.gestiona(puerto.gpio):                             #         Y se retiran del gestor de salidas, también compartido
+                        self._salidas.olvidar(puerto.gpio)
 
-                GPIO.cleanup()                                                          #     Se liberan los pines GPIO
+                    self._gpio.cleanup(puerto.gpio)
 
         if self._bloqueo:                                                               # Si hay un boqueo
             self._bloqueo.desbloquear()                                                 #     Se desbloquea
@@ -368,31 +1276,71 @@ class app(object):
             return retorno
 
 
-    def test(self):
-        ''' Ejecuta el modo de pruebas
+    def recargar(self):
+        ''' Recarga la configuración sin reiniciar el sistema:
+            - Vuelve a leer la configuración y la compara con la actual; si no es válida, se conserva la actual
+            - Reconfigura sólo los puertos que han cambiado, conservando el estado de los demás
+            - Reasigna las señales, si han cambiado
+            - Deja que cada sistema aplique los cambios que le afecten (_preparar_recarga() y _completar_recarga())
+            - Devuelve el conjunto de opciones que han cambiado o None si no se ha podido recargar
         '''
 
+        try:
+            nueva = configuracion.recargar(self._config)
+
+        except (OSError, ValueError) as e:
+            print(f'Error: Imposible recargar la configuración: {e}', file = sys.stderr)
+
+            return None
+
+        cambios = configuracion.diferencias(self._config, nueva)
+
         if DEBUG:
-            print('Entrando en modo de pruebas')
+            print(f"Proceso  #{os.getpid()}\tOpciones cambiadas: {sorted(cambios)}")
 
-        try:                                                                            # Bloque try
-            self._config.GPIOS                                                          #     Se comprueba la existencia de puertos GPIO
+        indice = False
 
-        except AttributeError:                                                          # Si no los hay
-            pass                                                                        #     Sin problema
+        if self._indice and cambios & {'GPIOS', 'FRECUENCIA'}:                          # Los puertos se validan antes de tocar nada
+            try:
+                indice = indice_puertos(nueva)
 
-        else:                                                                           # Si sí los hay
-            if DEBUG:
-                print('Encendiendo leds')
+            except ValueError as e:
+                print(f'Error: Configuración incorrecta: {e}', file = sys.stderr)
+
+                return None
+
+        for opcion in sorted(cambios & {'CONTROLADOR_GPIO', 'MARGEN_PWM', 'PWM_HARDWARE'}):     # Las salidas PWM ya arrancadas conservan su generador y su margen
+            print(f'Aviso: El cambio de {opcion} no se aplicará hasta reiniciar', file = sys.stderr)
+
+        anterior = self._config
+
+        self._preparar_recarga(cambios)
+
+        self._config = nueva
+
+        if indice:
+            self._reconfigurar_puertos(indice, 'FRECUENCIA' in cambios)
 
-            for puertos in self._config.GPIOS:                                          #     Se recorre la lista de puertos GPIO
-                for gpio, tipo, acceso, activacion, _ in puertos:
-                    if tipo == self._config.RELE or tipo == self._config.LED:           #         Si se está ante un relé o un led normal
-                        GPIO.output(gpio, GPIO.HIGH if activacion else GPIO.LOW)        #             Se "enciende" de modo normal
+        if 'senyales' in cambios:
+            if self._alojado or current_thread() is not main_thread():                  # Las señales sólo se pueden asignar desde el hilo principal, y las de un sistema alojado las reparte el supervisor
+                print('Aviso: El cambio de senyales no se aplicará hasta reiniciar', file = sys.stderr)
+
+            else:
+                self.asignar_senyales()
+
+        self._completar_recarga(anterior, cambios)
+
+        return cambios
+
+
+    def test(self):
+        ''' Ejecuta el modo de pruebas
+        '''
 
-                    elif tipo == self._config.LED_PWM:                                  #         Si se está ante un led controlado por PWM
-                        acceso.ChangeDutyCycle(100)                                     #             Se "enciende" de modo ciclo de trabajo
+        if DEBUG:
+            print('Entrando en modo de pruebas')
 
+        if self._encender_pruebas():                                                    # Si hay puertos GPIO, se encienden
             if DEBUG:
                 print(f'Esperando {self._config.PAUSA} segundos')
 
@@ -407,3 +1355,337 @@ class app(object):
         '''
 
         pass
+
+
+class app_asincrona(app):
+    ''' Clase abstracta, variante de app, para los sistemas cuyo bucle es una corrutina:
+        - Las señales se atienden dentro del bucle de eventos (add_signal_handler()), sin interrumpir al sistema en mitad de una operación
+        - La conexión con el servidor es asíncrona, por lo que varios sistemas pueden compartir un mismo bucle de eventos
+        - El cierre es cooperativo: se cancela la tarea del bucle y se cierra el sistema, en lugar de salir del proceso con os._exit()
+        - Las tareas periódicas se ejecutan por plazos con un planificador, compartido por todos los sistemas del mismo bucle de eventos
+    '''
+
+    def __init__(self, config, nombre):
+        ''' Constructor de la clase:
+            - Inicializa variables
+            - Llama al constructor de la clase padre, que no asigna las señales, ya que aún no hay un bucle de eventos
+        '''
+
+        self._bucle_eventos     = None                                                  # Bucle de eventos en el que se ejecuta el sistema
+        self._escritor          = None                                                  # Flujos de la conexión con el servidor
+        self._lector            = None
+        self._planificador      = None                                                  # Planificador de los trabajos periódicos, compartido con los sistemas del mismo bucle de eventos
+        self._senyales          = []                                                    # Señales asignadas en el bucle de eventos
+        self._sin_pruebas       = None                                                  # Evento que se borra mientras dura el modo de pruebas
+        self._tarea             = None                                                  # Tarea del bucle del sistema
+
+        super().__init__(config, nombre)
+
+
+    async def _conectar(self, salida = True):
+        ''' Realiza una conexión asíncrona contra el servidor local, igual que la de app:
+            - Prueba las direcciones del servidor por orden de preferencia
+            - Retorna "True" si se ha conectado y saludado al servidor y "False" si no
+        '''
+
+        if self._estado_conexion != estados_conexion.DESCONECTADO:
+            print('Error: Imposible conectar al servidor, ya hay una conexión activa', file = sys.stderr)
+
+            return False
+
+        if salida:
+            print('Info: Conectando al servidor...')
+
+        for familia, direccion in self._direcciones_servidor():                         # Se prueban las direcciones del servidor por orden de preferencia
+            try:
+                if familia == socket.AF_UNIX:
+                    self._lector, self._escritor = await asyncio.open_unix_connection(direccion)
+
+                else:
+                    self._lector, self._escritor = await asyncio.open_connection(*direccion)
+
+            except (TimeoutError, asyncio.TimeoutError):
+                print('Error: Tiempo de espera agotado al conectar al servidor', file = sys.stderr)
+
+                return False
+
+            except (ConnectionRefusedError, FileNotFoundError):                         # Si no hay nadie escuchando en esta dirección, se prueba con la siguiente
+                continue
+
+            break
+
+        else:
+            print('Error: Imposible conectar al servidor', file = sys.stderr)
+
+            return False
+
+        if salida:
+            print('Ok: Conectado al servidor')
+
+        self._estado_conexion = estados_conexion.CONECTADO
+
+        mensaje = await self._saludar()
+
+        if not(mensaje):                                                                # Si hay algún fallo al conectar con el servidor
+            return False
+
+        elif mensaje[:2] == 'ok':                                                       # Si el servidor usa la misma versión del protocolo
+            return True
+
+        elif mensaje[:4] == 'info':                                                     # Si el servidor usa una versión distinta
+            self._VERSION_PROTOCOLO = float(mensaje[5:])
+
+            return True
+
+        else:                                                                           # Si el protocolo es incompatible o el servidor no responde
+            self._desconectar()
+
+            return False
+
+
+    def _desconectar(self):
+        ''' Desconecta, si se está conectado, la conexión con el servidor
+            - No necesita ser una corrutina, ya que la despedida se queda en el búfer del flujo, que la envía antes de cerrarse
+        '''
+
+        if self._estado_conexion >= estados_conexion.CONECTADO:
+            try:
+                self._escritor.write(protocolo.enmarcar('desconectar', self._entrada.enmarcado))
+                self._escritor.close()
+
+            except (OSError, RuntimeError):                                             # Si el servidor ya se ha ido o el bucle de eventos está cerrado, no hay nada de lo que despedirse
+                pass
+
+            self._entrada.vaciar()
+            self._escritor = self._lector = None
+
+            self._estado_conexion = estados_conexion.DESCONECTADO
+
+
+    async def _enviar_y_recibir(self, comando, normalizar = True):
+        ''' Envía un comando y espera su respuesta, sin bloquear el bucle de eventos
+            - Si no hay conexión, retorna "False"
+        '''
+
+        if not(self._escritor):
+            return False
+
+        try:
+            self._escritor.write(protocolo.enmarcar(comando, self._entrada.enmarcado))
+            await self._escritor.drain()
+
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            mensaje = 'desconectar'
+
+        else:
+            mensaje = await self._recibir_mensaje()
+
+        return mensaje.lower() if normalizar else mensaje
+
+
+    async def _enviar_y_recibir_varios(self, comandos, normalizar = True):
+        ''' Envía de una sola vez todos los comandos dados y espera, en orden, sus respuestas
+            - Si el protocolo no enmarca los mensajes, se envían uno a uno
+            - Si no hay conexión, retorna "False"
+        '''
+
+        if not(self._escritor):
+            return False
+
+        elif not(self._entrada.enmarcado):                                              # Sin enmarcado es imposible separar las respuestas, así que se envían uno a uno
+            return [await self._enviar_y_recibir(comando, normalizar) for comando in comandos]
+
+        try:
+            self._escritor.write(b''.join(protocolo.enmarcar(comando) for comando in comandos))
+            await self._escritor.drain()
+
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            return ['desconectar'] * len(comandos)
+
+        mensajes = [await self._recibir_mensaje() for _ in comandos]
+
+        return [mensaje.lower() for mensaje in mensajes] if normalizar else mensajes
+
+
+    async def _esperar(self, segundos):
+        ''' Pausa del bucle del sistema, que se alarga mientras dure el modo de pruebas para que éste no se vea interrumpido
+        '''
+
+        await asyncio.sleep(segundos)
+        await self._sin_pruebas.wait()
+
+
+    def _periodico(self, funcion, periodo, inicio = 0.0, nombre = None):
+        ''' Devuelve la corrutina que ejecuta periódicamente, con el planificador, la función (normal o corrutina) dada
+            - Las vueltas que venzan durante el modo de pruebas se saltan, para no interrumpirlo
+            - Por defecto, el trabajo se llama como la clase del sistema
+        '''
+
+        def vuelta():
+            if self._sin_pruebas.is_set():
+                return funcion()
+
+        return self._planificador.periodico(nombre or type(self).__name__, vuelta, periodo, inicio)
+
+
+    async def _principal(self):
+        ''' Corrutina principal: asigna las señales, ejecuta el bucle del sistema como tarea y, cuando termine o se cancele, cierra el sistema
+        '''
+
+        self._bucle_eventos = asyncio.get_running_loop()
+        self._planificador = planificador.compartido(getattr(self._config, 'HOLGURA', 0.0))
+        self._sin_pruebas = asyncio.Event()
+        self._sin_pruebas.set()
+
+        self.asignar_senyales()
+
+        self._tarea = asyncio.ensure_future(self.bucle())
+
+        try:
+            await self._tarea
+
+        except asyncio.CancelledError:                                                  # Condición de parada: cancelación de la tarea
+            pass
+
+        finally:
+            for senyal in self._senyales:
+                self._bucle_eventos.remove_signal_handler(senyal)
+
+            self._senyales = []
+
+            self.cerrar()
+
+
+    async def _probar(self):
+        ''' Modo de pruebas asíncrono: enciende todo y, durante la pausa programada, retiene el bucle del sistema
+        '''
+
+        self._sin_pruebas.clear()
+
+        try:
+            if self._encender_pruebas():
+                await asyncio.sleep(self._config.PAUSA)
+
+        finally:
+            self._sin_pruebas.set()
+
+
+    async def _recibir_mensaje(self):
+        ''' Espera el siguiente mensaje completo del servidor
+            - Si el servidor cierra la conexión, retorna una cadena vacía
+        '''
+
+        mensaje = self._entrada.mensaje()                                               # Puede que ya se haya recibido junto con un mensaje anterior
+
+        while mensaje is None:
+            try:
+                datos = await self._lector.read(protocolo.TAMANYO_BUFER)
+
+            except ConnectionResetError:
+                return 'desconectar'
+
+            if not(datos):                                                              # El servidor ha cerrado la conexión
+                return ''
+
+            self._entrada.anyadir(datos)
+            mensaje = self._entrada.mensaje()
+
+        return mensaje
+
+
+    async def _saludar(self):
+        ''' Manda el saludo con la versión del protocolo propia y devuelve, normalizada, la respuesta del servidor
+        '''
+
+        try:
+            self._escritor.write(protocolo.enmarcar('hola ' + str(self._VERSION_PROTOCOLO)))
+            await self._escritor.drain()
+
+            datos = await self._lector.read(protocolo.TAMANYO_BUFER)
+
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            return False
+
+        self._entrada.enmarcado = datos.endswith(protocolo.SEPARADOR)                   # Un servidor que enmarca su respuesta al saludo enmarcará todas las demás
+
+        return datos.decode('utf_8').strip().lower()
+
+
+    def _sig_cerrar(self, signum, frame):                                               # @UnusedVariable
+        ''' Funcion "wrapper" para el procesamiento de la señal de cierre: cancela el bucle, que cerrará el sistema al terminar
+        '''
+
+        self.detener()
+
+
+    def _sig_test(self, signum, frame):                                                 # @UnusedVariable
+        ''' Funcion "wrapper" para el procesamiento de la señal de pruebas: las pruebas se ejecutan como una tarea más, sin bloquear el bucle de eventos
+        '''
+
+        self._bucle_eventos.create_task(self._probar())
+
+
+    def asignar_senyales(self):
+        ''' Asigna señales a sus correspondientes funciones, en el bucle de eventos:
+            - Si aún no hay bucle de eventos o no se está en el hilo principal (por ejemplo, dentro del supervisor), no hace nada
+            - Si no, sustituye las señales asignadas anteriormente por las de la configuración
+        '''
+
+        if self._bucle_eventos is None or current_thread() is not main_thread():
+            return
+
+        for senyal in self._senyales:
+            self._bucle_eventos.remove_signal_handler(senyal)
+
+        self._senyales = []
+
+        for senyal, funcion in getattr(self._config, 'senyales', {}).items():
+            numero = getattr(signal, senyal)
+
+            self._bucle_eventos.add_signal_handler(numero, getattr(self, '_' + funcion), numero, None)
+            self._senyales.append(numero)
+
+
+    @abstractmethod                                                                     # Método abstracto
+    async def bucle(self):
+        ''' Corrutina abstracta que será especificada en el sistema que la incluya
+            - Sus tareas periódicas deben hacerse con _periodico(), sus pausas con _esperar() y sus operaciones largas, con await, para no bloquear el bucle de eventos
+        '''
+
+        pass
+
+
+    def detener(self):
+        ''' Solicita, desde cualquier hilo, el cierre cooperativo del sistema: cancela la tarea de su bucle
+        '''
+
+        if self._tarea and self._bucle_eventos and not(self._bucle_eventos.is_closed()):
+            self._bucle_eventos.call_soon_threadsafe(self._tarea.cancel)
+
+
+    def estadisticas(self):
+        ''' Devuelve las estadísticas del planificador de los trabajos periódicos o None si aún no se ha iniciado
+        '''
+
+        return self._planificador.estadisticas() if self._planificador else None
+
+
+    def ejecutar(self):
+        ''' Ejecuta el sistema en un bucle de eventos propio hasta que se detenga
+        '''
+
+        try:
+            asyncio.run(self._principal())
+
+        except KeyboardInterrupt:                                                       # Si la interrupción de teclado llega fuera del bucle del sistema, éste ya se ha cerrado
+            pass
+
+
+    def recibir_senyal(self, signum):
+        ''' Atiende, desde cualquier hilo, una señal recibida por otro (por ejemplo, por el supervisor), ejecutando su función dentro del bucle de eventos
+        '''
+
+        funcion = getattr(self._config, 'senyales', {}).get(signal.Signals(signum).name)
+
+        if funcion and self._bucle_eventos and not(self._bucle_eventos.is_closed()):
+            self._bucle_eventos.call_soon_threadsafe(getattr(self, '_' + funcion), signum, None)
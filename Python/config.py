@@ -5,36 +5,53 @@
 # Title         : config.py
 # Description   : Módulo configurador para ser importado en el resto de módulos o sistemas que lo necesiten
 # Author        : Veltys
-# Date          : 2021-04-30
-# Version       : 1.13.0
+# Date          : 2026-10-18
+# Version       : 1.30.1
 # Usage         : import config | from config import <clase>
 # Notes         : A título ilustrativo, a se ofrece una configuración por defecto (la mía, para ser exactos)
+#                 Cualquiera de sus opciones puede cambiarse, sin tocar este archivo, con un config.toml o config.json (véase configuracion.py)
 
 
+import errno                                                                                                    # Códigos de error
 import os                                                                                                       # Funcionalidades varias del sistema operativo
+import sys                                                                                                      # Funcionalidades varias del sistema
 
-from time import strftime                                                                                       # Formato de fecha y hora
+import configuracion                                                                                            # Carga de la configuración declarativa
+from configuracion import plantilla                                                                             # Textos generados en el momento de usarlos
 
 
 class config_global(object):                                                                                    # Configuración común
+    CAPACIDAD_HISTORIAL = 10080                                                                                 # CAPACIDAD_HISTORIAL contiene la cantidad de muestras que caben en el historial; al llenarse, cada una nueva sustituye a la más antigua (10080, una semana a una muestra por minuto)
+
+    CONTROLADOR_GPIO    = 'rpi'                                                                                 # CONTROLADOR_GPIO indica el controlador de los puertos GPIO: 'rpi' (RPi.GPIO), 'gpiod' (libgpiod) o 'simulado'
+
+    HISTORIAL           = '/var/lib/RPPGCT/temperatura.historial'                                               # HISTORIAL contiene la ruta del archivo con el historial de temperatura y ventilador, que escribe el sistema de temperaturas y consultan el servidor de domótica y "historial.py"; None para no guardarlo
+
+    HOLGURA             = 0.25                                                                                  # HOLGURA es el margen (en segundos) que el plazo de un trabajo periódico puede moverse para despertar a la vez que otro
+
     IP_DEP_REMOTA       = '255.255.255.255'                                                                     # IP del servidor de depuración
 
+    MARGEN_PWM          = 0.0                                                                                   # MARGEN_PWM es la diferencia mínima (en puntos porcentuales) del ciclo de trabajo para que una salida PWM se vuelva a escribir; con 0, sólo se escribe si cambia
+
     RELE                = 0
     LED                 = 10
     LED_PWM             = 11
     VENTILADOR          = 20
     VENTILADOR_PWM      = 21
     BOTON               = 30
+    SONDA               = 40
 
     PYDEV_REMOTE_PATHS  = [
                             (r'/home/usuario/.../proyecto-local', r'/ruta/al/proyecto/remoto'),
                           ]
 
+    PWM_HARDWARE        = {}                                                                                    # PWM_HARDWARE contiene, por puerto, el chip y el canal de /sys/class/pwm con los que generar su PWM por hardware (por ejemplo, {18: (0, 0)} con "dtoverlay=pwm"); los demás puertos PWM, o si el chip no está disponible, usan PWM por software
+
 
 class aviso_electricidad_config(config_global):                                                                 # Configuración del sistema de aviso en caso de corte de electricidad
     ASUNTO              = '<NOMBRE_SISTEMA>: informe especial'
-    CORREO              = 'Informe especial de <NOMBRE_SISTEMA>, generado el ' + str(strftime("%c")) + os.linesep + os.linesep \
-                        + 'Ha habido un corte en la red eléctrica de <NOMBRE_SISTEMA> y se ha activado la batería.'
+    CORREO              = plantilla('Informe especial de <NOMBRE_SISTEMA>, generado el $fecha' + os.linesep + os.linesep \
+                        + 'Ha habido un corte en la red eléctrica de <NOMBRE_SISTEMA> y se ha activado la batería.') # $fecha se sustituye al enviar el correo, no al importar la configuración
     DE                  = ''
     PARA                = ''
     PAUSA               = 10
@@ -52,13 +69,14 @@ class cpu_config(config_global):
                             [[26, config_global.LED             , None, True , 'Verde'                      ]], # GPIOS contiene quíntuplas de datos en formato lista:
                             [[19, config_global.LED             , None, True , 'Amarillo'                   ]], # el primer elemento será el número (BCM) de puerto GPIO a manipular,
                             [[13, config_global.LED             , None, True , 'Naranja'                    ]], # el segundo, el tipo de elemento que es
-                            [[ 6, config_global.LED             , None, True , 'Rojo'                       ]], # el tercero, un "placeholder" que, en el caso de ser un puerto controlado por PWM, contendrá el objeto de control del elemento
+                            [[ 6, config_global.LED             , None, True , 'Rojo'                       ]], # el tercero, reservado (None): el objeto de control de un puerto PWM se guarda en el índice de puertos, no aquí
                             [[ 5, config_global.LED             , None, True , 'Alarma'                     ]], # el cuarto, la activación si es de salida (True si es activo a alto nivel o False si es a bajo nivel) o el estado si es de entrada (True si está bajado y False subido)
                           ]                                                                                     # y el quinto, una muy breve descripción de su función
 
     PAUSA               = 10                                                                                    # PAUSA contiene el tiempo que el bucle estará parado
 
     senyales            = {                                                                                     # senyales (señales) contiene el tipo de señal y la función a la que ésta se asociará
+                            'SIGHUP' : 'sig_recargar',
                             'SIGTERM': 'sig_cerrar',
                             'SIGUSR1': 'sig_test',
                             'SIGUSR2': 'sig_apagado',
@@ -74,11 +92,19 @@ class dht11_config(config_global):
 
 
 class domotica_cliente_config(config_global):                                                                   # Configuración del sistema cliente de domótica
+    SOCKET_UNIX         = None                                                                                  # SOCKET_UNIX contiene la ruta de un socket de dominio UNIX, más rápido que TCP para conexiones locales (None para no usarlo)
+#   SOCKET_UNIX         = '/run/domotica.sock'                                                                  # Por ejemplo, un archivo...
+#   SOCKET_UNIX         = '@domotica'                                                                           # ... o, empezando por "@", un nombre del espacio de nombres abstracto de Linux
+
     puerto              = 4710                                                                                  # El puerto 4710 ha sido escogido arbitrariamente por estar libre, según la IANA:
     #                                                                                                           # https://www.iana.org/assignments/service-names-port-numbers/service-names-port-numbers.xhtml?&page=85
 
 
 class domotica_servidor_config(domotica_cliente_config):                                                        # Configuración del sistema servidor de domótica
+    CAPACIDAD_EVENTOS   = 64                                                                                    # CAPACIDAD_EVENTOS contiene la cantidad máxima de eventos pendientes de envío a cada suscriptor
+
+    CAPACIDAD_LLAMADAS  = 16                                                                                    # CAPACIDAD_LLAMADAS contiene la cantidad máxima de llamadas pendientes; a partir de ahí, se descartan
+
     GPIOS               = [                                                                                     # En este caso, los puertos GPIO serán anidados:
                             [                                                                                   # Las entradas en la misma lista estarán vinculadas entre sí y se gestionarán como un todo. Por ejemplo:
                                 [22, config_global.BOTON        , None, False, 'Botón reinicio router'      ],  # Uno o más elementos de activación...
@@ -101,8 +127,10 @@ class domotica_servidor_config(domotica_cliente_config):
                             ],
                           ]
 
+    INTERRUPTORES       = True                                                                                  # INTERRUPTORES indica si las entradas son interruptores, que conmutan las salidas de su grupo en cada flanco, o pulsadores (False), que sólo lo hacen en los de subida
+
     LLAMADAS            = (                                                                                     # LLAMADAS determina, qué debe ser llamado por cada hijo y cuándo
-                            (                                                                                   # El primer elemento de cada tupla es el comando (en python, por seguridad) a llamar
+                            (                                                                                   # El primer elemento de cada tupla es el script (en python, del mismo directorio y con una función main()) a llamar
                                 (None                   , False, False),                                        # El segundo, si debe ser llamado cuando se dispare un evento de bajada
                             ),                                                                                  # Y el tercero, si debe ser llamado cuando se dispare un evento de subida
                                                                                                                 # Advertencia: Debe existir una entrada por cada hijo que se genere, no por cada sub-lista de GPIOS
@@ -111,21 +139,32 @@ class domotica_servidor_config(domotica_cliente_config):
                             ),
 
                             (
-                                (None                   , False, False)
+                                (None                   , False, False),
                             ),
 
                             (
-                                ('aviso_electricidad.py', False, True )
+                                ('aviso_electricidad.py', False, True ),
                             ),
                           )
 
     PAUSA               = 0.50
 
-    TIEMPO_PULSACION    = 2
+    RELECTURA           = None                                                                                  # RELECTURA contiene cada cuántos segundos se releerán las salidas para corregir su copia en memoria (None para no hacerlo)
+
+    TIEMPO_PULSACION    = 2                                                                                     # TIEMPO_PULSACION contiene la duración (en segundos) por defecto de cada pulsación
+
+    TIEMPOS_PULSACION   = {                                                                                     # TIEMPOS_PULSACION contiene, para los puertos GPIO que lo necesiten, su propia duración de pulsación
+#                           4: 5,
+                          }
+
+    TIEMPO_REBOTE       = 200                                                                                   # TIEMPO_REBOTE contiene el tiempo (en milisegundos) durante el cual se ignorarán los rebotes de un botón
+
+    TRABAJADORES_LLAMADAS = 2                                                                                   # TRABAJADORES_LLAMADAS contiene la cantidad de llamadas que pueden ejecutarse a la vez
 
     senyales            = {
-                            'SIGTERM': 'sig_cerrar',
-                            'SIGUSR1': 'sig_test'  ,
+                            'SIGHUP' : 'sig_recargar',
+                            'SIGTERM': 'sig_cerrar'  ,
+                            'SIGUSR1': 'sig_test'    ,
                           }
 
 
@@ -158,11 +197,22 @@ class reiniciar_router_config(domotica_cliente_config):
                           )
 
     senyales            = {
-                            'SIGTERM': 'sig_cerrar',
-                            'SIGUSR1': 'sig_test'  ,
+                            'SIGHUP' : 'sig_recargar',
+                            'SIGTERM': 'sig_cerrar'  ,
+                            'SIGUSR1': 'sig_test'    ,
                           }
 
 
+class supervisor_config(config_global):                                                                         # Configuración del sistema supervisor, que aloja varios sistemas en un único proceso
+    SISTEMAS            = ('cpu', 'domotica_servidor', 'reiniciar_router', 'temperatura')                       # Sistemas a alojar; cada uno usa su propia configuración
+
+    ESPERA_MINIMA       = 1                                                                                     # Espera (en segundos) antes de volver a arrancar un sistema que ha fallado; se duplica con cada fallo seguido
+    ESPERA_MAXIMA       = 300
+    TIEMPO_ESTABLE      = 600                                                                                   # Tiempo (en segundos) en marcha a partir del cual un fallo ya no se considera seguido del anterior
+
+    INFORME             = 3600                                                                                  # Cada cuánto (en segundos) se muestra el informe de CPU y memoria; None para no mostrarlo más que al cerrar
+
+
 class temperatura_config(config_global):                                                                        # Configuración del sistema de temperaturas
     COLORES             = (                                                                                     # COLORES contiene una matriz de 4 x 3 que, por filas, representa la etapa de temperatura y, por columnas, cada led
                             (0.0, 1.0, 0.0),
@@ -181,10 +231,26 @@ class temperatura_config(config_global):
                             [[18, config_global.VENTILADOR_PWM  , None, True , 'Ventilador'                 ]],
                           ]
 
-    PAUSA               = 60
+    HISTERESIS          = 2                                                                                     # HISTERESIS contiene los grados que la temperatura ha de bajar por debajo de un umbral para volver a la etapa anterior y, en el modo 'curva', para que el ventilador baje de velocidad
+
+    MODO_VENTILADOR     = 'curva'                                                                               # MODO_VENTILADOR indica cómo se calcula la velocidad del ventilador: 'curva' (interpolando en VELOCIDADES) o 'pid' (lazo cerrado, con PID)
+
+    PAUSA               = 30                                                                                    # PAUSA contiene el tiempo (en segundos) entre muestras o, con muestreo adaptativo, el máximo
+
+    PAUSA_MINIMA        = 5                                                                                     # PAUSA_MINIMA contiene el tiempo mínimo entre muestras del muestreo adaptativo, que lo acorta si la temperatura cambia deprisa o está cerca de un umbral y lo alarga, hasta PAUSA, si está estable; None para muestrear cada PAUSA
+
+    PID                 = (55, 0.05, 0.001, 0.0)                                                                # PID contiene la temperatura objetivo y las constantes proporcional, integral y derivativa del modo 'pid'
+
+    RUTA_TERMOMETRO     = None                                                                                  # RUTA_TERMOMETRO sustituye, si se da, a la ruta de la zona térmica (o del programa vcgencmd, o del archivo de pruebas)
 
     TEMPERATURAS        = (40, 50, 60)                                                                          # TEMPERATURAS contiene las temperaturas de activación de cada etapa
 
+    TERMOMETRO          = None                                                                                  # TERMOMETRO indica la fuente de la temperatura: 'sysfs' (zona térmica del núcleo), 'vcgencmd' o 'archivo' (para pruebas); None para elegirla automáticamente
+
+    TIEMPO_ARRANQUE     = 1                                                                                     # TIEMPO_ARRANQUE contiene los segundos que el ventilador gira al máximo al arrancar, sin detener el bucle
+
+    VARIACION_MUESTREO  = 1.0                                                                                   # VARIACION_MUESTREO contiene los grados que, con muestreo adaptativo, se busca que la temperatura no supere entre una muestra y la siguiente
+
     VELOCIDAD_MINIMA    = 0.33                                                                                  # Velocidad mínima necesaria para el giro del ventilador
 
     VELOCIDADES         = (                                                                                     # VELOCIDADES contiene pares temperatura - velocidad del ventilador
@@ -196,8 +262,19 @@ class temperatura_config(config_global):
                             (65, 1.00),
                           )
 
+    ZONA_TERMICA        = 0                                                                                     # ZONA_TERMICA es el número de la zona térmica (/sys/class/thermal/thermal_zone<n>) a leer
+
     senyales            = {
-                            'SIGTERM': 'sig_cerrar' ,
-                            'SIGUSR1': 'sig_test'   ,
-                            'SIGUSR2': 'sig_apagado',
+                            'SIGHUP' : 'sig_recargar',
+                            'SIGTERM': 'sig_cerrar'  ,
+                            'SIGUSR1': 'sig_test'    ,
+                            'SIGUSR2': 'sig_apagado' ,
                           }
+
+
+try:                                                                                                            # Se aplica, si la hay, la configuración declarativa
+    RUTA_CONFIGURACION = configuracion.cargar(globals(), os.path.dirname(os.path.abspath(__file__)))
+
+except (OSError, ValueError) as e:
+    print(f'Error: Configuración incorrecta: {e}', file = sys.stderr)
+    sys.exit(errno.EINVAL)
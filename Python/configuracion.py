@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : configuracion.py
+# Description   : Módulo auxiliar que carga una configuración declarativa (TOML o JSON) sobre las clases de config.py
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.1.0
+# Usage         : import configuracion | from configuracion import <clase>
+# Notes         : El archivo se busca en la variable de entorno RPPGCT_CONFIG o, si no, como config.toml o config.json junto a config.py
+#                 Cada sección corresponde a una clase de config.py ([global] para config_global, [cpu] para cpu_config...) y sólo puede cambiar opciones ya existentes
+#                 Los puertos GPIO se escriben como [puerto, "TIPO", activación, "descripción"], sin el tercer campo reservado
+#                 Una vez analizado y validado, el archivo se guarda compilado en __pycache__, junto a su fecha de modificación y su resumen, para no volver a analizarlo en cada arranque
+
+
+DEBUG           = False
+
+
+import hashlib                                                                              # Resúmenes criptográficos
+import importlib                                                                            # Recarga de módulos
+import os                                                                                   # Funcionalidades varias del sistema operativo
+import pickle                                                                               # Serialización de la configuración compilada
+import sys                                                                                  # Funcionalidades varias del sistema
+from string import Template                                                                 # Plantillas de texto
+from tempfile import NamedTemporaryFile                                                     # Archivos temporales
+from time import strftime                                                                   # Formato de fecha y hora
+
+
+ARCHIVOS        = ('config.toml', 'config.json')                                            # Nombres del archivo de configuración, por orden de preferencia
+VARIABLE        = 'RPPGCT_CONFIG'                                                           # Variable de entorno con la ruta del archivo de configuración
+
+_VERSION_CACHE  = 1                                                                         # Cambia si lo hace el formato de la configuración compilada, para invalidar las anteriores
+
+
+class plantilla(object):
+    ''' Clase que representa un texto que se genera cada vez que se usa, y no al importar la configuración
+        - Admite las variables $fecha (fecha y hora del momento en el que se genera) y las que se le pasen a generar()
+    '''
+
+    def __init__(self, texto):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self.texto = texto
+
+
+    def __eq__(self, otra):
+        ''' Dos plantillas son iguales si lo son sus textos
+        '''
+
+        return isinstance(otra, plantilla) and self.texto == otra.texto
+
+
+    def __hash__(self):
+        ''' Resumen de la plantilla, coherente con su igualdad
+        '''
+
+        return hash(self.texto)
+
+
+    def __repr__(self):
+        ''' Representación de la plantilla, con su texto sin generar
+        '''
+
+        return f'plantilla({self.texto!r})'
+
+
+    def __str__(self):
+        ''' Genera el texto en el momento de usarlo
+        '''
+
+        return self.generar()
+
+
+    def generar(self, **variables):
+        ''' Devuelve el texto con las variables sustituidas
+        '''
+
+        return Template(self.texto).safe_substitute({'fecha': strftime('%c')}, **variables)
+
+
+def buscar(directorio):
+    ''' Devuelve la ruta del archivo de configuración declarativa, o None si no hay ninguno
+    '''
+
+    ruta = os.environ.get(VARIABLE)
+
+    if ruta:
+        return ruta
+
+    for archivo in ARCHIVOS:
+        ruta = os.path.join(directorio, archivo)
+
+        if os.path.isfile(ruta):
+            return ruta
+
+    return None
+
+
+def opciones(clase):
+    ''' Devuelve, como diccionario nombre ➡ valor, las opciones de una configuración (clase de config.py), incluidas las heredadas
+    '''
+
+    return {nombre: getattr(clase, nombre) for nombre in dir(clase) if not(nombre.startswith('_'))}
+
+
+def recargar(clase):
+    ''' Vuelve a ejecutar config.py (aplicando, de nuevo, la configuración declarativa) y devuelve la nueva versión de la clase dada
+        - La clase anterior no se modifica, por lo que sigue siendo válida si la nueva configuración no lo es
+    '''
+
+    try:
+        modulo = importlib.reload(sys.modules[clase.__module__])
+
+    except SystemExit:                                                                      # config.py sale si la configuración declarativa no es válida, tras informar de ello
+        raise ValueError('la nueva configuración no es válida') from None
+
+    except Exception as e:                                                                  # Cualquier otro fallo al ejecutarlo (sintaxis, nombres...)
+        raise ValueError(f'no se puede volver a cargar {clase.__module__}: {e}') from None
+
+    try:
+        return getattr(modulo, clase.__name__)
+
+    except AttributeError:
+        raise ValueError(f'{clase.__name__} ha desaparecido de {clase.__module__}') from None
+
+
+def _ruta_cache(ruta):
+    ''' Devuelve la ruta de la configuración compilada correspondiente a un archivo
+    '''
+
+    return os.path.join(os.path.dirname(os.path.abspath(ruta)), '__pycache__', os.path.basename(ruta) + '.cache')
+
+
+def _analizar(contenido, ruta):
+    ''' Analiza el contenido de un archivo TOML o JSON
+        - Los analizadores se importan aquí, y no al principio, para que un arranque con la configuración compilada no tenga que cargarlos
+    '''
+
+    if ruta.endswith('.json'):
+        import json                                                                         # Análisis de JSON
+
+        try:
+            return json.loads(contenido)
+
+        except ValueError as e:
+            raise ValueError(f'{ruta} no es un JSON válido: {e}') from None
+
+    else:
+        try:
+            import tomllib                                                                  # Análisis de TOML (Python 3.11 o superior)
+
+        except ImportError:
+            try:
+                import tomli as tomllib                                                     # Análisis de TOML (paquete externo, para versiones anteriores)
+
+            except ImportError:
+                tomllib = None
+
+        if tomllib is None:
+            raise ValueError(f'no se puede leer {ruta}: se necesita Python 3.11 o el paquete "tomli"')
+
+        try:
+            return tomllib.loads(contenido.decode('utf-8'))
+
+        except (UnicodeDecodeError, tomllib.TOMLDecodeError) as e:
+            raise ValueError(f'{ruta} no es un TOML válido: {e}') from None
+
+
+def _compilar_puertos(gpios, tipos, seccion):
+    ''' Valida los puertos GPIO de una sección y los convierte al formato de config.py
+    '''
+
+    if not(isinstance(gpios, list)) or not(all(isinstance(grupo, list) for grupo in gpios)):
+        raise ValueError(f'GPIOS de [{seccion}] debe ser una lista de grupos de puertos')
+
+    resultado = []
+
+    for grupo in gpios:
+        puertos = []
+
+        for datos in grupo:
+            if not(isinstance(datos, list)) or len(datos) != 4:
+                raise ValueError(f'el puerto {datos} de [{seccion}] no es de la forma [puerto, "TIPO", activación, "descripción"]')
+
+            gpio, tipo, activacion, descripcion = datos
+
+            if tipo not in tipos:
+                raise ValueError(f'el tipo {tipo!r} del puerto {gpio} de [{seccion}] no existe')
+
+            puertos.append([gpio, tipos[tipo], None, activacion, descripcion])
+
+        resultado.append(puertos)
+
+    return resultado
+
+
+def compilar(datos, tipos):
+    ''' Valida la estructura de una configuración ya analizada y la convierte al formato de config.py
+        - "tipos" es un diccionario nombre ➡ constante de los tipos de puerto
+        - Devuelve un diccionario clase ➡ opciones
+    '''
+
+    if not(isinstance(datos, dict)):
+        raise ValueError('la configuración debe estar formada por secciones')
+
+    clases = {}
+
+    for seccion, opciones in datos.items():
+        if not(isinstance(opciones, dict)):
+            raise ValueError(f'[{seccion}] no es una sección')
+
+        clase = 'config_global' if seccion == 'global' else seccion + '_config'
+        clases[clase] = {}
+
+        for opcion, valor in opciones.items():
+            if opcion == 'GPIOS':
+                valor = _compilar_puertos(valor, tipos, seccion)
+
+            elif isinstance(valor, dict) and all(clave.isdigit() for clave in valor):       # Diccionarios indexados por puerto, como TIEMPOS_PULSACION
+                valor = {int(clave): elemento for clave, elemento in valor.items()}
+
+            clases[clase][opcion] = valor
+
+    return clases
+
+
+def _adaptar(valor, defecto, nombre):
+    ''' Comprueba que un valor es del mismo tipo que el de config.py y lo convierte a su forma (tuplas, plantillas...)
+    '''
+
+    if defecto is None:
+        return valor
+
+    elif isinstance(defecto, bool):
+        correcto = isinstance(valor, bool)
+
+    elif isinstance(defecto, (int, float)):
+        correcto = isinstance(valor, (int, float)) and not(isinstance(valor, bool))
+
+    elif isinstance(defecto, plantilla):
+        if isinstance(valor, str):
+            return plantilla(valor)
+
+        correcto = False
+
+    elif isinstance(defecto, str):
+        correcto = isinstance(valor, str)
+
+    elif isinstance(defecto, (list, tuple)):
+        if isinstance(valor, list):
+            return _tuplas(valor) if isinstance(defecto, tuple) else valor
+
+        correcto = False
+
+    elif isinstance(defecto, dict):
+        correcto = isinstance(valor, dict)
+
+    else:
+        correcto = True
+
+    if not(correcto):
+        raise ValueError(f'{nombre} debería ser de tipo {type(defecto).__name__}, no {type(valor).__name__}')
+
+    return valor
+
+
+def _tuplas(valor):
+    ''' Convierte recursivamente las listas en tuplas, como las de config.py
+    '''
+
+    return tuple(_tuplas(elemento) for elemento in valor) if isinstance(valor, list) else valor
+
+
+def aplicar(clases, espacio):
+    ''' Aplica una configuración compilada sobre las clases de un espacio de nombres (el de config.py)
+        - Sólo pueden cambiarse opciones existentes y con valores del mismo tipo
+    '''
+
+    for nombre, opciones in clases.items():
+        clase = espacio.get(nombre)
+
+        if not(isinstance(clase, type)):
+            raise ValueError(f'la sección de {nombre} no corresponde a ninguna configuración')
+
+        for opcion, valor in opciones.items():
+            if not(hasattr(clase, opcion)):
+                raise ValueError(f'la opción {opcion} de {nombre} no existe')
+
+            setattr(clase, opcion, _adaptar(valor, getattr(clase, opcion), f'{nombre}.{opcion}'))
+
+
+def diferencias(anterior, nueva):
+    ''' Devuelve el conjunto de opciones que cambian de una configuración (clase de config.py) a otra
+    '''
+
+    opciones_anteriores = opciones(anterior)
+    opciones_nuevas = opciones(nueva)
+
+    return {opcion for opcion in opciones_anteriores.keys() | opciones_nuevas.keys() if opciones_anteriores.get(opcion) != opciones_nuevas.get(opcion)}
+
+
+def leer(ruta, tipos):
+    ''' Devuelve la configuración compilada de un archivo
+        - Si su fecha de modificación y su tamaño coinciden con los de la compilada, ésta se usa sin leerlo
+        - Si no, pero su resumen coincide, también (por ejemplo, tras copiarlo sin cambios)
+        - Si no, se analiza, se valida y se guarda compilado
+    '''
+
+    estado = os.stat(ruta)
+    cache = _ruta_cache(ruta)
+    clave = (_VERSION_CACHE, sorted(tipos.items()))
+
+    try:
+        with open(cache, 'rb') as archivo:
+            compilada = pickle.load(archivo)
+
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        compilada = None
+
+    if compilada and compilada['clave'] == clave and (compilada['modificacion'], compilada['tamanyo']) == (estado.st_mtime_ns, estado.st_size):
+        if DEBUG:
+            print(f'Configuración #{os.getpid()}\tUsando la configuración compilada de {ruta}')
+
+        return compilada['clases']
+
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+
+    resumen = hashlib.sha256(contenido).hexdigest()
+
+    if compilada and compilada['clave'] == clave and compilada['resumen'] == resumen:
+        clases = compilada['clases']
+
+    else:
+        if DEBUG:
+            print(f'Configuración #{os.getpid()}\tCompilando {ruta}')
+
+        clases = compilar(_analizar(contenido, ruta), tipos)
+
+    compilada = {
+        'clave'         : clave,
+        'modificacion'  : estado.st_mtime_ns,
+        'tamanyo'       : estado.st_size,
+        'resumen'       : resumen,
+        'clases'        : clases,
+    }
+
+    try:                                                                                    # Se guarda de forma atómica; si no se puede (por ejemplo, sin permisos), sólo se pierde la caché
+        os.makedirs(os.path.dirname(cache), exist_ok = True)
+
+        with NamedTemporaryFile('wb', dir = os.path.dirname(cache), delete = False) as archivo:
+            pickle.dump(compilada, archivo, pickle.HIGHEST_PROTOCOL)
+
+        os.replace(archivo.name, cache)
+
+    except OSError:
+        pass
+
+    return clases
+
+
+def cargar(espacio, directorio):
+    ''' Busca el archivo de configuración declarativa y, si lo hay, lo aplica sobre las clases de config.py
+        - Devuelve la ruta del archivo, o None si no hay ninguno
+    '''
+
+    ruta = buscar(directorio)
+
+    if ruta:
+        base = espacio['config_global']
+        tipos = {tipo: getattr(base, tipo) for tipo in ('RELE', 'LED', 'LED_PWM', 'VENTILADOR', 'VENTILADOR_PWM', 'BOTON', 'SONDA')}
+
+        aplicar(leer(ruta, tipos), espacio)
+
+    return ruta
@@ -5,11 +5,13 @@
 # Title         : cpu.py
 # Description   : Sistema indicador led de la carga de CPU en tiempo real. Utiliza tantos leds como GPIOs se le indiquen, siendo el último el de "alarma"
 # Author        : Veltys
-# Date          : 2021-04-30
-# Version       : 2.1.13
+# Date          : 2026-10-18
+# Version       : 2.6.0
 # Usage         : python3 cpu.py
 # Notes         : Mandándole la señal "SIGUSR1", el sistema pasa a "modo test", lo cual enciende todos los leds, para comprobar su funcionamiento
 #                 Mandándole la señal "SIGUSR2", el sistema pasa a "modo apagado", lo cual apaga todos los leds hasta que esta misma señal sea recibida de nuevo
+#                 Mandándole la señal "SIGHUP", el sistema recarga la configuración sin reiniciarse
+#                 Su bucle es una corrutina (comun.app_asincrona), por lo que puede compartir un bucle de eventos con otros sistemas
 
 
 DEBUG           = False
@@ -19,9 +21,7 @@ DEBUG_REMOTO    = False
 import errno                                                                                            # Códigos de error
 import os                                                                                               # Funcionalidades varias del sistema operativo
 import sys                                                                                              # Funcionalidades varias del sistema
-from time import sleep                                                                                  # Para hacer pausas
 
-import RPi.GPIO as GPIO                                                                                 # Acceso a los pines GPIO
 import comun                                                                                            # Funciones comunes a varios sistemas
 
 if DEBUG_REMOTO:
@@ -43,62 +43,75 @@ except ImportError:
     sys.exit(errno.ENOENT)
 
 
-class cpu(comun.app):
+class cpu(comun.app_asincrona):
     ''' Clase del sistema indicador led de la carga de CPU en tiempo real
     '''
 
     def __init__(self, config, nombre):
         ''' Constructor de la clase:
             - Llama al constructor de la clase padre
+            - Inicializa el estado que se conserva entre vueltas
         '''
 
         super().__init__(config, nombre)
 
-    def bucle(self):
-        ''' Realiza en bucle las tareas asignadas a este sistema
+        self._alarma            = 0                                                                     # Vueltas seguidas con la CPU por encima del umbral de alarma
+        self._indice_leds       = None                                                                  # Índice de puertos para el que se han precalculado los leds
+        self._led_alarma        = None
+        self._leds              = ()
+
+
+    def _preparar_leds(self):
+        ''' Precalcula, a partir del índice de puertos, los leds normales (con su umbral y sus niveles de encendido y apagado) y el de alarma
         '''
 
-        try:
-            alarma = 0
+        puertos = [puerto for grupo in self._indice.grupos() for puerto in grupo]
+        cantidad_puertos = len(puertos)
 
-            cantidad_puertos = len(self._config.GPIOS)                                                  # Precálculo de la cantidad de puertos
+        leds = tuple(
+            (puerto.gpio, 100 / (cantidad_puertos - 1) * i, self._gpio.HIGH if puerto.activacion else self._gpio.LOW, self._gpio.LOW if puerto.activacion else self._gpio.HIGH)
+            for i, puerto in enumerate(puertos[:-1]) if puerto.tipo == self._config.LED                 # Comprobación de seguridad para no manipular leds de otro tipo
+        )
 
-            while True:                                                                                 # Se ejecutará siempre, ya que las condiciones de parada son externas
-                if not(self._modo_apagado):                                                             #     Si no se ha activado el "modo apagado"
-                    cpu = cpu_percent()                                                                 #         Se mide el porcentaje de uso de la CPU
+        puerto = puertos[-1] if puertos and puertos[-1].tipo == self._config.LED else None              # El último puerto es el led de alarma
+        led_alarma = (puerto.gpio, self._gpio.HIGH if puerto.activacion else self._gpio.LOW, self._gpio.LOW if puerto.activacion else self._gpio.HIGH) if puerto else None
 
-                    i = 0
+        return leds, led_alarma
 
-                    for puertos in self._config.GPIOS:                                                  #         Se recorre la lista de puertos GPIO
-                        for gpio, tipo, _, activacion, _ in puertos:
-                            if tipo == self._config.LED:                                                #             Comprobación de seguridad para no manipular leds de otro tipo
-                                if i < len(self._config.GPIOS) - 1:                                     #                 Puertos asociados a leds normales
-                                    if cpu >= 100 / (cantidad_puertos - 1) * i:                         #                     Si el porcentaje de CPU es mayor o igual al umbral de encendido
-                                        GPIO.output(gpio, GPIO.HIGH if activacion else GPIO.LOW)        #                         Se enciende el led
 
-                                    else:                                                               #                     Si no
-                                        GPIO.output(gpio, GPIO.LOW if activacion else GPIO.HIGH)        #                         Se apaga el led
+    def _vuelta(self):
+        ''' Realiza una vuelta de las tareas asignadas a este sistema
+        '''
+
+        if self._indice_leds is not self._indice:                                                       # Los leds se precalculan fuera del bucle y sólo se repite si una recarga cambia los puertos
+            self._indice_leds = self._indice
+            self._leds, self._led_alarma = self._preparar_leds()
 
-                                else:                                                                   #                 Puerto asociados a led de alarma
-                                    if cpu >= 95:                                                       #                     Si la CPU está por encima del 94%
-                                        alarma += 1                                                     #                         Se añade una entrada a la alarma
+        if not(self._modo_apagado):                                                                     # Si no se ha activado el "modo apagado"
+            cpu = cpu_percent()                                                                         #     Se mide el porcentaje de uso de la CPU
 
-                                        if alarma >= 5:                                                 #                         Si ya ha sucedido cinco o más veces
-                                            GPIO.output(gpio, GPIO.HIGH if activacion else GPIO.LOW)    #                             Se enciende el led de alarma
+            self._salidas.escribir_varios({gpio: encendido if cpu >= umbral else apagado for gpio, umbral, encendido, apagado in self._leds})  # Los leds normales se encienden si se alcanza su umbral, todos a la vez
 
-                                    else:                                                               #                     Si no
-                                        alarma = 0                                                      #                         Se reinicia la alarma
+            if self._led_alarma:                                                                        #     Led de alarma
+                gpio, encendido, apagado = self._led_alarma
 
-                                        GPIO.output(gpio, GPIO.LOW if activacion else GPIO.HIGH)        #                         Se apaga el led de alarma
+                if cpu >= 95:                                                                           #         Si la CPU está por encima del 94%
+                    self._alarma += 1                                                                   #             Se añade una entrada a la alarma
 
-                            i += 1
+                    if self._alarma >= 5:                                                               #             Si ya ha sucedido cinco o más veces
+                        self._salidas.escribir(gpio, encendido)                                         #                 Se enciende el led de alarma
 
-                sleep(self._config.PAUSA)                                                               #     Pausa hasta la nueva comprobación
+                else:                                                                                   #         Si no
+                    self._alarma = 0                                                                    #             Se reinicia la alarma
 
-        except KeyboardInterrupt:                                                                       # Condición de parada: interrupción de teclado
-            self.cerrar()                                                                               #     Se invoca al método de cierre
+                    self._salidas.escribir(gpio, apagado)                                               #             Se apaga el led de alarma
+
+
+    async def bucle(self):
+        ''' Realiza periódicamente, por plazos, las tareas asignadas a este sistema
+        '''
 
-            return                                                                                      #     Se sale
+        await self._periodico(self._vuelta, lambda: self._config.PAUSA)                                 # El periodo se lee en cada vuelta, para seguir a la configuración si se recarga
 
 
     def __del__(self):
@@ -120,7 +133,7 @@ def main(argv):
     err = app.arranque()
 
     if err == 0:
-        app.bucle()
+        app.ejecutar()
 
     else:
         sys.exit(err)
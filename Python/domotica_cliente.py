@@ -5,8 +5,8 @@
 # Title         : domotica_cliente.py
 # Description   : Parte cliente del sistema gestor de domótica
 # Author        : Veltys
-# Date          : 2021-04-30
-# Version       : 1.1.16
+# Date          : 2026-10-18
+# Version       : 1.5.0
 # Usage         : python3 domotica_cliente.py [commandos]
 # Notes         : Parte cliente del sistema en el que se gestionarán pares de puertos GPIO
 
@@ -16,10 +16,13 @@ DEBUG_REMOTO    = False
 
 
 import errno                                                                                                        # Códigos de error
+import json                                                                                                         # Decodificación de respuestas estructuradas
 import socket                                                                                                       # Tratamiento de sockets
 import sys                                                                                                          # Funcionalidades varias del sistema
 
 import comun                                                                                                        # Funciones comunes a varios sistemas
+import historial                                                                                                    # Presentación del resumen del historial
+import protocolo                                                                                                    # Mensajes de evento
 
 if DEBUG_REMOTO:
     import pydevd                                                                                                   # Depuración remota
@@ -76,16 +79,7 @@ class domotica_cliente(comun.app):
         '''
 
         if self._estado_conexion >= comun.estados_conexion.LISTA_CARGADA:                                           # Si el estado de la conexión es el adecuado
-            mensaje = self._enviar_y_recibir(comando, False)                                                        #     Se manda el comando y se recibe el mensaje
-
-            if mensaje and mensaje[0:4] == 'info':                                                                  #     Si se ha recibido un mensaje y es válido
-                return mensaje[6:]                                                                                  #         Se devuelve
-
-            else:                                                                                                   #     Si no
-                print('Error: Número de puerto GPIO no válido', file = sys.stderr)                                  #         Se informa de ello
-                print('Error: El número de puerto GPIO no es válido')
-
-                return ''                                                                                           #         Se devuelve el fallo
+            return self.__interpretar_descripcion(self._enviar_y_recibir(comando, False))                           #     Se manda el comando, se recibe el mensaje y se interpreta
 
         else:                                                                                                       # Si no
             print('Error: Sin lista de puertos GPIO, estado de conexión inadecuado', file = sys.stderr)             #         Se informa de ello
@@ -101,49 +95,103 @@ class domotica_cliente(comun.app):
         '''
 
         if self._estado_conexion >= comun.estados_conexion.LISTA_CARGADA:                                           # Si el estado de la conexión es el adecuado
-            mensaje = self._enviar_y_recibir(comando, True)                                                         #     Se manda el comando y se recibe el mensaje
+            return self.__interpretar_estado(self._enviar_y_recibir(comando, True))                                 #     Se manda el comando, se recibe el mensaje y se interpreta
+
+        else:                                                                                                       # Si no
+            return -1                                                                                               #     Se devuelve -1
+
+
+    def __historial(self, comando):
+        ''' Resumen del historial de temperatura y ventilador (protocolo 1.6 o superior):
+            - Si el estado de la conexión es el adecuado, solicita al servidor el resumen de los últimos segundos indicados (o de todo el historial) y lo muestra
+        '''
+
+        if self._estado_conexion >= comun.estados_conexion.CONECTADO:                                               # Si el estado de la conexión es el adecuado
+            mensaje = self._enviar_y_recibir(comando, False)                                                        #     Envía el comando y recibe el mensaje, sin normalizarlo, para poder decodificarlo
+
+            try:                                                                                                    #     Bloque try
+                resumen = json.loads(mensaje[6:]) if mensaje and mensaje[0:4] == 'info' else None                   #         Se decodifica la respuesta
+
+            except ValueError:                                                                                      #     Si la respuesta no es un JSON válido
+                resumen = None
+
+            if resumen is None:                                                                                     #     Si no se ha obtenido un resumen válido, se informa de ello
+                print('Error: Historial no disponible', file = sys.stderr)
+                print('Error: El servidor no ha devuelto el historial: ' + str(mensaje))
+
+            else:                                                                                                   #     Si sí, se muestra
+                for linea in historial.texto(resumen):
+                    print("\t", linea, sep = '')
+
+        else:                                                                                                       # Si no, se informa de ello
+            print('Error: Comando "' + comando + '" no ejecutado, estado de conexión inadecuado', file = sys.stderr)
+            print('Error: El comando "' + comando + '" no ha sido ejecutado porque no' + self.estado_conexion_lenguaje_natural(self.estado_conexion() + 1), sep = '')
+
+
+    def __interpretar_descripcion(self, mensaje):
+        ''' Interpreta la respuesta del servidor a un comando "describir":
+            - Si es válida, devuelve la descripción
+            - Si no, informa de ello y devuelve una cadena vacía
+        '''
+
+        if mensaje and mensaje[0:4] == 'info':                                                                      # Si se ha recibido un mensaje y es válido
+            return mensaje[6:]                                                                                      #     Se devuelve
+
+        else:                                                                                                       # Si no
+            print('Error: Número de puerto GPIO no válido', file = sys.stderr)                                      #     Se informa de ello
+            print('Error: El número de puerto GPIO no es válido')
 
-            if mensaje is not(False):                                                                               #     Si se ha recibido un mensaje
-                if mensaje[0:4] == 'info':                                                                          #         Si el mensaje es válido
-                    estado = int(mensaje[6:])                                                                       #         Se preprocesa una parte
+            return ''                                                                                               #     Se devuelve el fallo
 
-                    if estado == 0 or estado == 1:                                                                  #         Si la parte procesada está entre los valores correctos
-                        return estado                                                                               #             Se devuelve la parte preprocesada
 
-                    else:                                                                                           #         Si no
-                        print('Error: Respuesta del servidor no válida', file = sys.stderr)                         #         Se informa de ello
-                        print('Error: El servidor ha devuelto una respuesta no válida')
+    def __interpretar_estado(self, mensaje):
+        ''' Interpreta la respuesta (ya normalizada) del servidor a un comando "estado":
+            - Si es válida, devuelve el estado
+            - Si no, informa de ello y devuelve -1
+        '''
+
+        if mensaje is not(False):                                                                                   # Si se ha recibido un mensaje
+            if mensaje[0:4] == 'info':                                                                              #     Si el mensaje es válido
+                estado = int(mensaje[6:])                                                                           #         Se preprocesa una parte
 
-                        return -1                                                                                   #             Se devuelve -1
+                if estado == 0 or estado == 1:                                                                      #         Si la parte procesada está entre los valores correctos
+                    return estado                                                                                   #             Se devuelve la parte preprocesada
 
                 else:                                                                                               #         Si no
-                    print('Error: Respuesta del servidor incorrecta', file = sys.stderr)                            #         Se informa de ello
-                    print('Error: El servidor ha devuelto una respuesta incorrecta')
+                    print('Error: Respuesta del servidor no válida', file = sys.stderr)                             #             Se informa de ello
+                    print('Error: El servidor ha devuelto una respuesta no válida')
 
                     return -1                                                                                       #             Se devuelve -1
 
             else:                                                                                                   #     Si no
-                print('Error: Sin estado del puerto GPIO, el servidor no responde', file = sys.stderr)              #         Se informa de ello
-                print('Error: Imposible solicitar una estado del puerto GPIO, el servidor no responde')
+                print('Error: Respuesta del servidor incorrecta', file = sys.stderr)                                #         Se informa de ello
+                print('Error: El servidor ha devuelto una respuesta incorrecta')
 
                 return -1                                                                                           #         Se devuelve -1
 
         else:                                                                                                       # Si no
+            print('Error: Sin estado del puerto GPIO, el servidor no responde', file = sys.stderr)                  #     Se informa de ello
+            print('Error: Imposible solicitar una estado del puerto GPIO, el servidor no responde')
+
             return -1                                                                                               #     Se devuelve -1
 
 
     def __listar(self):
         ''' Listado de puertos GPIO:
             - Si el estado de la conexión es el adecuado:
-                - Solicita al servidor la lista de puertos
+                - Si el protocolo lo permite (versión 1.3 o superior), solicita al servidor el volcado de todos los puertos en una sola petición
+                - Si no, solicita al servidor la lista de puertos y, después, el estado y la descripción de cada uno (segmentados si el protocolo lo permite)
                 - la normaliza
                 - la almacena en la variable de clase
                 - Devuelve True
             - Si no o en caso de fallo:
-                - Devuelve True
+                - Devuelve False
         '''
 
         if self._estado_conexion >= comun.estados_conexion.CONECTADO:                                               # Si el estado de la conexión es el adecuado
+            if self._VERSION_PROTOCOLO >= 1.3:                                                                      #     Si el servidor admite el volcado
+                return self.__volcar()                                                                              #         Se usa, ya que basta una única petición
+
             self._lista_GPIOS = self._enviar_y_recibir('listar')                                                    #     Se manda el comando y se almacena el mensaje
 
             if self._lista_GPIOS:                                                                                   #     Si se ha recibido un mensaje
@@ -153,8 +201,16 @@ class domotica_cliente(comun.app):
                 if self._comprobar_lista_GPIOS():                                                                   #         Si es válido
                     self._estado_conexion = comun.estados_conexion.LISTA_CARGADA                                    #             El estado de la conexión es actualizado
 
+                    comandos = []                                                                                   #             Se preparan un "estado" y un "describir" por puerto...
+
+                    for puerto in self._lista_GPIOS:
+                        comandos.append('estado ' + puerto)
+                        comandos.append('describir ' + puerto)
+
+                    respuestas = self._enviar_y_recibir_varios(comandos, False)                                     #             ... que se mandan todos de una vez
+
                     for i, puerto in enumerate(self._lista_GPIOS):                                                  #             Se recorre la lista para transformarla en el formato necesario
-                        self._lista_GPIOS[i] = (puerto, self.__estado('estado ' + puerto), self.__describir('describir ' + puerto))
+                        self._lista_GPIOS[i] = (puerto, self.__interpretar_estado(respuestas[2 * i].lower()), self.__interpretar_descripcion(respuestas[2 * i + 1]))
 
                         if self._lista_GPIOS[i][1] == -1 or self._lista_GPIOS[i][2] == '':
                             self._estado_conexion = comun.estados_conexion.ERROR
@@ -195,7 +251,10 @@ class domotica_cliente(comun.app):
         if self._VERSION_PROTOCOLO >= 1.0:                                  print("\tconmutar <puerto>:\tInvierte el estado del puerto GPIO especificado")
         if self._VERSION_PROTOCOLO >= 1.0:                                  print("\tencender <puerto>:\t\"Enciende\" el puerto GPIO especificado")
         if self._VERSION_PROTOCOLO >= 1.0:                                  print("\tapagar <puerto>:\t\"Apaga\" el puerto GPIO especificado")
-        if self._VERSION_PROTOCOLO >= 1.0:                                  print("\tpulsar <puerto>:\t\"Pulsa\" (\"enciende\" y \"apaga\") el puerto GPIO especificado")
+        if self._VERSION_PROTOCOLO >= 1.0 and self._VERSION_PROTOCOLO < 1.4: print("\tpulsar <puerto>:\t\"Pulsa\" (\"enciende\" y \"apaga\") el puerto GPIO especificado")
+        if self._VERSION_PROTOCOLO >= 1.4:                                  print("\tpulsar <puerto> [ms]:\t\"Pulsa\" (\"enciende\" y \"apaga\") el puerto GPIO especificado, durante los milisegundos indicados o los configurados en el servidor")
+        if self._VERSION_PROTOCOLO >= 1.5:                                  print("\tsuscribir [puertos]:\tMuestra, según se producen, los cambios de estado de los puertos GPIO especificados (o de todos)")
+        if self._VERSION_PROTOCOLO >= 1.6:                                  print("\thistorial [segundos]:\tMuestra el resumen de temperatura y ventilador de los últimos segundos indicados (o de todo el historial)")
         if self._VERSION_PROTOCOLO >= 1.0:                                  print("\tsalir:\t\t\tCierra la conexión (si hay alguna abierta) y termina la ejecución")
 
 
@@ -254,6 +313,47 @@ class domotica_cliente(comun.app):
             return False
 
 
+    def __suscribir(self, comando):
+        ''' Suscripción a los cambios de estado de los puertos GPIO (protocolo 1.5 o superior):
+            - Si el estado de la conexión es el adecuado, solicita la suscripción al servidor y muestra cada cambio según llega
+            - Al interrumpirse con Ctrl + C o cerrarse la conexión, se desconecta, ya que la conexión queda dedicada a los eventos
+        '''
+
+        if self._estado_conexion >= comun.estados_conexion.CONECTADO:                                               # Si el estado de la conexión es el adecuado
+            mensaje = self._enviar_y_recibir(comando)                                                               #     Envía el comando y recibe el mensaje
+
+            if not(mensaje) or mensaje[:2] != 'ok':                                                                 #     Si el servidor no acepta la suscripción, se informa de ello
+                print('Error: Suscripción rechazada', file = sys.stderr)
+                print('Error: El servidor ha rechazado la suscripción: ' + str(mensaje))
+
+                return
+
+            print('Ok: Suscripción activa, pulse Ctrl + C para terminarla')
+
+            try:
+                mensaje = self._recibir_mensaje()
+
+                while mensaje and mensaje != 'desconectar':                                                         #     Mientras el servidor no cierre la conexión
+                    cambios = protocolo.decodificar_evento(mensaje)
+
+                    if cambios:
+                        for puerto, estado in cambios:                                                              #         Se muestra cada cambio
+                            print("\t", 'Puerto GPIO', puerto, "\tEstado: ", ('activo' if estado == 1 else 'inactivo'), sep = '')
+
+                    mensaje = self._recibir_mensaje()
+
+            except KeyboardInterrupt:
+                pass
+
+            self._desconectar()
+
+            print('Ok: Suscripción terminada')
+
+        else:                                                                                                       # Si no, se informa de ello
+            print('Error: Comando "' + comando + '" no ejecutado, estado de conexión inadecuado', file = sys.stderr)
+            print('Error: El comando "' + comando + '" no ha sido ejecutado porque no' + self.estado_conexion_lenguaje_natural(self.estado_conexion() + 1), sep = '')
+
+
     def __varios(self, comando):
         ''' Método "comodín" para enviar y procesar la respuesta de los comandos apagar, conmutar, encender y pulsar
         '''
@@ -279,6 +379,34 @@ class domotica_cliente(comun.app):
             print('Error: El comando "' + comando + '" no ha sido ejecutado porque no' + self.estado_conexion_lenguaje_natural(self.estado_conexion() + 1), sep = '')
 
 
+    def __volcar(self):
+        ''' Volcado de puertos GPIO (protocolo 1.3 o superior):
+            - Solicita al servidor, en una única petición, todos los puertos con su estado y descripción
+            - Almacena los relés en la variable de clase, en el mismo formato que el listado tradicional
+            - Devuelve True si todo ha ido bien o False en caso contrario
+        '''
+
+        mensaje = self._enviar_y_recibir('volcar', False)                                                           # Se manda el comando sin normalizar la respuesta, para respetar las descripciones
+
+        try:                                                                                                        # Bloque try
+            puertos = json.loads(mensaje[6:]) if mensaje and mensaje[0:4] == 'info' else None                       #     Se decodifica la respuesta
+
+        except ValueError:                                                                                          # Si la respuesta no es un JSON válido
+            puertos = None
+
+        if puertos is None:                                                                                         # Si no se ha obtenido un volcado válido
+            print('Error: Sin lista de puertos GPIO, el servidor no responde', file = sys.stderr)                   #     Se informa de ello
+            print('Error: Imposible solicitar una lista de puertos GPIO, el servidor no responde')
+
+            return False
+
+        self._lista_GPIOS = [(str(puerto['gpio']), puerto['estado'], puerto['descripcion']) for puerto in puertos if puerto['tipo'] == self._config.RELE]
+
+        self._estado_conexion = comun.estados_conexion.LISTA_EXTENDIDA                                              # El estado de la conexión es actualizado
+
+        return True
+
+
     def _comprobar_lista_GPIOS(self):
         ''' Método para la comprobación de la existencia de una lista de puertos GPIO
         '''
@@ -322,6 +450,14 @@ class domotica_cliente(comun.app):
                 elif self._VERSION_PROTOCOLO >= 1.1 and comando != 'describir' and comando[0:9] == 'describir' and comando[9] == ' ' and comando[10:] != '':
                     self.__describir(comando)                                                                       #         Se ejecuta
 
+                #                                                                                                   #     Si el comando es "suscribir" y está bien formado
+                elif self._VERSION_PROTOCOLO >= 1.5 and comando[0:9] == 'suscribir' and (comando == 'suscribir' or comando[9] == ' '):
+                    self.__suscribir(comando)                                                                       #         Se ejecuta
+
+                #                                                                                                   #     Si el comando es "historial" y está bien formado
+                elif self._VERSION_PROTOCOLO >= 1.6 and comando[0:9] == 'historial' and (comando == 'historial' or comando[9] == ' '):
+                    self.__historial(comando)                                                                       #         Se ejecuta
+
                 elif comando == 'listar':                                                                           #     Si el comando es "listar"
                     if self.__listar():                                                                             #         Se procede al listado y si es válido
                         self.__mostrar_lista()                                                                      #             Se muestra
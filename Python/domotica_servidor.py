@@ -5,12 +5,17 @@
 # Title         : domotica_servidor.py
 # Description   : Parte servidor del sistema gestor de domótica
 # Author        : Veltys
-# Date          : 2021-04-30
-# Version       : 2.3.4
+# Date          : 2026-10-18
+# Version       : 2.17.3
 # Usage         : python3 domotica_servidor.py
 # Notes         : Parte servidor del sistema en el que se gestionarán pares de puertos GPIO
 #                 Las entradas impares en la variable de configuración asociada GPIOS corresponderán a los relés que se gestionarán
 #                 Las pares, a los pulsadores que irán asociados a dichos relés, para su conmutación
+#                 Los pulsadores y sondas se atienden por interrupciones, a través de un único despachador (entradas.py)
+#                 Sus llamadas se ejecutan dentro del propio proceso, en un conjunto acotado de hilos trabajadores (llamadas.py)
+#                 Además del puerto TCP, puede escuchar en un socket de dominio UNIX (SOCKET_UNIX) o usar los sockets que le pase quien lo lance (LISTEN_FDS)
+#                 A partir de la versión 1.6 del protocolo, resume con el comando "historial" las muestras que el sistema de temperaturas guarda en el historial (historial.py)
+#                 Mandándole la señal "SIGHUP", recarga la configuración sin cerrar las conexiones: sólo se reconfiguran los puertos, entradas y llamadas que cambien
 
 
 DEBUG           = False
@@ -18,19 +23,22 @@ DEBUG_PADRE     = False
 DEBUG_REMOTO    = False
 
 
-salir           = False                                                                                                                     # Ya que no es posible matar a un hilo, esta "bandera" global servirá para indicarle a los hilos que deben terminar
-
-
 import errno                                                                                                                                # Códigos de error
+import json                                                                                                                                 # Codificación de respuestas estructuradas
 import os                                                                                                                                   # Funcionalidades varias del sistema operativo
 import socket                                                                                                                               # Tratamiento de sockets
-from subprocess import call                                                                                                                 # Lanzamiento de nuevos procesos
+import stat                                                                                                                                 # Tipos de archivo
 import sys                                                                                                                                  # Funcionalidades varias del sistema
-from threading import Lock, Thread                                                                                                          # Capacidades multihilo
+from functools import partial                                                                                                               # Funciones parcialmente aplicadas
+from threading import Thread                                                                                                                # Capacidades multihilo
 from time import sleep                                                                                                                      # Para hacer pausas
 
-import RPi.GPIO as GPIO                                                                                                                     # Acceso a los pines GPIO
 import comun                                                                                                                                # Funciones comunes a varios sistemas
+import entradas                                                                                                                             # Atención por interrupciones de los puertos GPIO de entrada
+import historial                                                                                                                            # Historial de temperatura y ventilador
+import llamadas                                                                                                                             # Ejecución de las llamadas asociadas a las entradas
+import multiplexor                                                                                                                          # Servidor de sockets multiplexado
+import protocolo                                                                                                                            # Enmarcado de mensajes
 
 
 if DEBUG_REMOTO:
@@ -45,7 +53,11 @@ except ImportError:
     sys.exit(errno.ENOENT)
 
 
-semaforo        = Lock()                                                                                                                    # Un semáforo evitará que el padre y los hijos den problemas al acceder a una variable que ambos puedan modificar
+ERROR_COMANDO   = 'err: no ejecutado, comando incorrecto'                                                                                   # Respuesta ante un comando desconocido o mal formado
+ERROR_HISTORIAL = 'err: no ejecutado, historial no disponible'                                                                             # Respuesta si el historial está desactivado o no puede leerse
+ERROR_PUERTO    = 'err: no ejecutado, puerto incorrecto o no encontrado'                                                                    # Respuesta ante un puerto GPIO incorrecto
+
+PULSACION_MAXIMA = 86400000                                                                                                                 # Duración máxima (en milisegundos, un día) que un cliente puede pedir para una pulsación
 
 
 class domotica_servidor(comun.app):
@@ -55,20 +67,111 @@ class domotica_servidor(comun.app):
     def __init__(self, config, nombre):
         ''' Constructor de la clase:
             - Llama al constructor de la clase padre
-            - Inicializa el socket
+            - Recoge los sockets a la escucha heredados, si los hay
+            - Si no, inicializa el socket TCP y, si así se ha configurado, el de dominio UNIX
             - Se pone a la escucha
         '''
 
-        self._hijos = []                                                                                                                    # Preparación de la lista contenedora de hijos
+        self._cierre_pedido = False                                                                                                         # Si es cierto, una señal ha pedido el cierre, que bucle() completará al detenerse el multiplexor
+        self._entradas = False                                                                                                              # El despachador de entradas se creará al iniciar el bucle
+        self._llamadas = False                                                                                                              # El ejecutor de llamadas se creará al iniciar el bucle
+        self._multiplexor = False                                                                                                           # El multiplexor de conexiones se creará al iniciar el bucle
+        self._pulsos = {}                                                                                                                   # Pulsaciones en curso: puerto GPIO ➡ (registro, temporizador de apagado)
+        self._relectura = False                                                                                                             # Temporizador de la próxima relectura de las salidas
+
+        self._registrar_ordenes()                                                                                                           # La tabla de órdenes se prepara una única vez
 
         super().__init__(config, nombre)
 
-        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._ruta_unix = False                                                                                                             # Ruta del socket de dominio UNIX creado, para borrarlo al cerrar
+
+        self._escuchas = comun.sockets_heredados()                                                                                          # Si quien lanza el servidor le pasa sus sockets a la escucha, se usan tal cual
+
+        if not(self._escuchas):                                                                                                             # Si no, se crean
+            self._escuchas.append(self._escuchar_tcp())
+
+            if self._config.SOCKET_UNIX:
+                self._escuchas.append(self._escuchar_unix(self._config.SOCKET_UNIX))
+
+
+    def _atender_entrada(self, salidas, llamadas, gpio, nivel):
+        ''' Acción asociada a un puerto GPIO de entrada, ejecutada por el despachador tras cada flanco:
+            - Se conmutan las salidas de su grupo en cada flanco si las entradas son interruptores (INTERRUPTORES), o sólo en los de subida si son pulsadores
+            - Se ejecutan las llamadas programadas para el tipo de flanco (bajada o subida) que se haya producido
+        '''
+
+        flanco = 2 if nivel else 1                                                                                                          # Posición, en cada llamada, de la marca del tipo de flanco: 1 ➡ bajada; 2 ➡ subida
+
+        if DEBUG:
+            print('Padre #', os.getpid(), "\tSe ha disparado el evento de ", 'subida' if nivel else 'bajada', ' en el puerto GPIO', gpio, sep = '')
+
+        if nivel or getattr(self._config, 'INTERRUPTORES', True):                                                                           # Si ha sido una pulsación o, con interruptores, cualquier cambio
+            for salida in salidas:                                                                                                          #     Se recorren los elementos de salida del grupo
+                self._salidas.conmutar(salida.gpio)                                                                                         #         Se conmuta la salida del puerto GPIO (con el semáforo propio del puerto)
+
+        for llamada in llamadas:                                                                                                            # Se recorren las llamadas
+            if llamada[0] and llamada[flanco]:                                                                                              #     Si se ha programado alguna del tipo especificado
+                self._llamadas.lanzar(llamada[0])                                                                                           #         Se encola, sin esperar a que termine
+
+
+    def _completar_recarga(self, anterior, cambios):
+        ''' Aplica, tras recargar la configuración, los cambios que afectan al servidor, sin cerrar las conexiones:
+            - Sustituye el ejecutor de llamadas si ha cambiado su tamaño
+            - Vuelve a preparar las entradas si se detuvieron
+            - Reprograma la relectura de las salidas si ha cambiado su periodo
+        '''
+
+        if not(DEBUG_PADRE):
+            if self._llamadas and cambios & {'CAPACIDAD_LLAMADAS', 'TRABAJADORES_LLAMADAS'}:                                                #     El nuevo ejecutor arranca antes de retirar el anterior, que termina (poco) con las llamadas en curso
+                llamadas_anteriores = self._llamadas
+
+                self._llamadas = llamadas.ejecutor_llamadas(self._config.TRABAJADORES_LLAMADAS, self._config.CAPACIDAD_LLAMADAS)
+                self._llamadas.iniciar()
+
+                llamadas_anteriores.detener(1)
+
+            if not(self._entradas):
+                self._entradas = self._preparar_entradas()
+                self._entradas.iniciar()
+
+        if 'RELECTURA' in cambios:
+            if self._relectura:
+                self._multiplexor.cancelar(self._relectura)
+
+                self._relectura = False
+
+            if self._config.RELECTURA:
+                self._relectura = self._multiplexor.programar(self._config.RELECTURA, self._releer)
+
+        for opcion in cambios & {'puerto', 'SOCKET_UNIX'}:                                                                                  # Los sockets a la escucha se conservan, para no perder las conexiones
+            print(f'Aviso: El cambio de {opcion} no se aplicará hasta reiniciar', file = sys.stderr)
+
+
+    @staticmethod                                                                                                                           # Método estático
+    def _duracion_pulsacion(parametro):
+        ''' Conversión del parámetro de duración del comando de pulsación: lanza ValueError, y con ello el comando se responde como incorrecto, si supera PULSACION_MAXIMA
+        '''
+
+        duracion = int(parametro)
+
+        if duracion > PULSACION_MAXIMA:
+            raise ValueError(f'duración de pulsación excesiva: {duracion} ms')
+
+        return duracion
+
+
+    def _escuchar_tcp(self):
+        ''' Crea el socket TCP a la escucha en el puerto configurado
+            - Con SO_REUSEADDR, un reinicio no tiene que esperar a que expiren las conexiones anteriores en TIME_WAIT
+        '''
+
+        escucha = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        escucha.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
         try:                                                                                                                                # Bloque try
-            self._socket.bind(('127.0.0.1', self._config.puerto))
+            escucha.bind(('127.0.0.1', self._config.puerto))
 
-            # self._socket.bind(('::1', self._config.puerto))                                                                               #     TODO: IPv6
+            # escucha.bind(('::1', self._config.puerto))                                                                                    #     TODO: IPv6
 
         except OSError:                                                                                                                     # Error del sistema operativo
             self.cerrar()
@@ -79,147 +182,271 @@ class domotica_servidor(comun.app):
             sys.exit(errno.EADDRINUSE)                                                                                                      #     Salida del sistema
 
         else:
-            self._socket.listen(1)                                                                                                          #     FIXME: No se preveen muchas conexiones, así que, por ahora, se soportará solamente un cliente
+            escucha.listen(socket.SOMAXCONN)                                                                                                #     Se admitirán tantas conexiones pendientes como el sistema permita
 
+        return escucha
 
-    def apagar(self, gpio, buscar = True):
-        ''' Apaga el puerto GPIO dado
+
+    def _escuchar_unix(self, ruta):
+        ''' Crea el socket de dominio UNIX a la escucha en la ruta dada
+            - Si la ruta empieza por "@", se usa el espacio de nombres abstracto, que no deja ningún archivo tras de sí
+            - Si no y ya existe un socket en dicha ruta, se comprueba si hay alguien escuchando; si no, se trata de un resto de una ejecución anterior y se borra
         '''
 
-        global semaforo                                                                                                                     # Es importante respetar la exclusión mutua
+        direccion = comun.direccion_unix(ruta)
+        escucha = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
 
-        if buscar:                                                                                                                          # Si es necesario buscar el puerto GPIO dado para recuperar sus características
-            gpio = self.buscar_gpio(gpio)                                                                                                   #     Se busca y se obtiene el elemento
+        if direccion == ruta and os.path.exists(ruta) and stat.S_ISSOCK(os.stat(ruta).st_mode):                                            # Si es un socket del sistema de archivos y ya existe
+            prueba = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
 
-        if gpio:                                                                                                                            # Si la id del puerto es válida
-            with semaforo:                                                                                                                  #     Para realizar la operación es necesario un semáforo o podría haber problemas
-                GPIO.output(gpio[0], GPIO.LOW if gpio[3] else GPIO.HIGH)                                                                    #         Se desactiva la salida del puerto GPIO
+            try:
+                prueba.connect(ruta)
 
-            return True                                                                                                                     #     Se informa del éxito
+            except OSError:                                                                                                                 #     Si nadie responde, se borra
+                os.unlink(ruta)
 
-        else:                                                                                                                               # Si no
-            return False                                                                                                                    #     Se informa del fallo
+            prueba.close()
 
+        try:                                                                                                                                # Bloque try
+            escucha.bind(direccion)
 
-    def bucle(self):
-        ''' Realiza en bucle las tareas asignadas a este sistema
+        except OSError:                                                                                                                     # Error del sistema operativo
+            self.cerrar()
+
+            print('Error: Socket', ruta, 'en uso', file = sys.stderr)
+            print('Error: Imposible abrir el socket', ruta, ', ya está en uso')
+
+            sys.exit(errno.EADDRINUSE)                                                                                                      #     Salida del sistema
+
+        else:
+            escucha.listen(socket.SOMAXCONN)
+
+            if direccion == ruta:                                                                                                           #     Si se ha creado un archivo, se borrará al cerrar
+                self._ruta_unix = ruta
+
+        return escucha
+
+
+    def _fin_pulso(self, gpio):
+        ''' Temporizador de fin de pulsación: apaga el puerto GPIO dado y lo olvida
         '''
 
-        try:
+        self._pulsos.pop(gpio.gpio, None)
+
+        self.apagar(gpio, False)
+
+
+    def _notificar(self, gpio, nivel):
+        ''' Publica a los suscriptores el nuevo estado de un puerto GPIO, venga el cambio de un comando, de un botón o de una sonda
+            - Puede ser llamado desde cualquier hilo
+        '''
+
+        puerto = self._indice.buscar(gpio)
+
+        if puerto and self._multiplexor:
+            self._multiplexor.publicar(gpio, int(nivel) if puerto.activacion else (int(nivel) + 1) % 2)                                     # Se publica el estado, no el nivel, igual que en el comando "estado"
+
+
+    def _preparar_entradas(self):
+        ''' Crea el despachador de entradas y le registra, para cada botón o sonda, la acción sobre las salidas de su grupo y sus llamadas
+            - Las llamadas se asignan por orden de aparición de las entradas, tal y como se indica en la configuración
+            - Los módulos de las llamadas se precargan, para que el primer flanco no tenga que esperar a su importación
+        '''
+
+        despachador = entradas.despachador_entradas(self._gpio, self._config.TIEMPO_REBOTE)
+
+        i = 0                                                                                                                               # Contador de entradas, para asignarles sus llamadas
+
+        for grupo in self._indice.grupos():                                                                                                 # Se recorren los grupos de puertos GPIO
+            salidas = tuple(puerto for puerto in grupo if puerto.tipo == self._config.RELE)                                                 #     Las salidas del grupo se calculan una única vez
+
+            for puerto in grupo:
+                if puerto.tipo >= self._config.BOTON:                                                                                       #     Si el elemento es de tipo botón o superior
+                    llamadas = self._config.LLAMADAS[i] if i < len(self._config.LLAMADAS) else ()
+
+                    for llamada in llamadas:
+                        if llamada[0]:
+                            try:
+                                self._llamadas.cargar(llamada[0])
+
+                            except (Exception, SystemExit) as e:                                                                            #         Si no se puede, se volverá a intentar (y a fallar, contándose) en cada flanco
+                                print('Error: Imposible cargar la llamada', llamada[0], ':', e, file = sys.stderr)
+
+                    despachador.registrar(puerto.gpio, self._notificar)                                                                     #         Los cambios de la propia entrada se publican a los suscriptores
+                    despachador.registrar(puerto.gpio, partial(self._atender_entrada, salidas, llamadas))
+
+                    i = i + 1
+
+        return despachador
+
+
+    def _preparar_recarga(self, cambios):
+        ''' Detiene, antes de reconfigurar los puertos, lo que depende de las opciones que han cambiado:
+            - Las entradas, si cambian los puertos, sus llamadas, el rebote o el ejecutor de llamadas
+            - Las pulsaciones en curso, si cambian los puertos, que se terminan en el acto
+        '''
+
+        if self._entradas and cambios & {'CAPACIDAD_LLAMADAS', 'GPIOS', 'LLAMADAS', 'TIEMPO_REBOTE', 'TRABAJADORES_LLAMADAS'}:
+            self._entradas.detener()
+            self._entradas = False
+
+        if 'GPIOS' in cambios:
+            for gpio, temporizador in list(self._pulsos.values()):
+                self._multiplexor.cancelar(temporizador)
+                self._fin_pulso(gpio)
+
+
+    def _procesar(self, sesion, comando):
+        ''' Procesa un comando recibido por una sesión dada y devuelve el mensaje de respuesta o None si la sesión debe cerrarse
+        '''
+
+        mensaje = self._ordenes.despachar(sesion, comando)                                                                                  # Se analiza y ejecuta el comando a través de la tabla de órdenes
+
+        if mensaje is False:                                                                                                                # Si el comando es desconocido, está mal formado o no está disponible en la versión del protocolo de la sesión
             if DEBUG:
-                print('Padre #', os.getpid(), "\tMi configuración es: ", self._config.GPIOS, sep = '')
-                print('Padre #', os.getpid(), "\tPienso iniciarun máximo de ", int(len(self._config.GPIOS)), ' hijos', sep = '')            #     Ya no es posible saber a priori cuántos hijos serán inciados
+                print('Padre #', os.getpid(), "\tEl comando \"" + comando + '" es incorrecto o no está implementado', sep = '')
 
-            if not(DEBUG_PADRE):
-                i = 0                                                                                                                       #     Contador para generar las IDs de los hijos
+            mensaje = ERROR_COMANDO                                                                                                         #     Se establece la respuesta
+
+        if DEBUG:
+            print('Padre #', os.getpid(), "\tVoy a mandarle el mensaje: ", mensaje, sep = '')
 
-                for puertos in self._config.GPIOS:                                                                                          #     Se recorre la lista de puertos GPIO para ir generando los hijos
-                    for _, tipo, _, _, _ in puertos:
-                        generar_hijo = False
+        return mensaje
 
-                        if tipo >= self._config.BOTON:                                                                                      #         Si el elemento es de tipo botón o superior
-                            generar_hijo = True                                                                                             #             Se generará un hijo
 
-                        if generar_hijo:                                                                                                    #         Si es necesario generar un hijo
-                            if DEBUG:
-                                print('Padre #', os.getpid(), "\tPreparando hijo ", i, sep = '')
+    def _releer(self):
+        ''' Temporizador de relectura: reconcilia la sombra de las salidas con los puertos y se vuelve a programar
+        '''
 
-                            self._hijos.append(Thread(target = main_hijos, args = (i,)))                                                    #             Se prepara hijo, se configura...
+        discrepancias = self._salidas.releer()
 
-                            if DEBUG:
-                                print('Padre #', os.getpid(), "\tArrancando hijo ", i, sep = '')
+        if DEBUG and discrepancias:
+            print('Padre #', os.getpid(), "\tLa relectura de las salidas ha corregido ", discrepancias, ' discrepancias', sep = '')
 
-                            self._hijos[-1].start()                                                                                         #             ... y se inicia
+        self._relectura = self._multiplexor.programar(self._config.RELECTURA, self._releer)
 
-                            i = i + 1                                                                                                       #             Se incrementa el contador para cada hijo generado
 
-            while True:                                                                                                                     # Se ejecutará siempre, ya que las condiciones de parada son externas
-                sc, _ = self._socket.accept()                                                                                               #     Se espera hasta que haya un evento en el socket
+    def _registrar_ordenes(self):
+        ''' Prepara la tabla de órdenes del protocolo: verbo, versión mínima, manejador, tipos de los parámetros y formato de la respuesta
+        '''
 
-                comando = sc.recv(1024)                                                                                                     #     Ante un evento, se recibe el contenido
-                comando = comando.decode('utf_8')                                                                                           #     Se decodifica el mensaje recibido
-                comando = comando.lower()                                                                                                   #     Y se normaliza
+        self._ordenes = protocolo.tabla_ordenes()
 
-                if DEBUG:
-                    print('Padre #', os.getpid(), "\tHe recibido el comando: ", comando, sep = '')
+        self._ordenes.registrar('apagar'      , 1.0, lambda sesion, gpio: self.apagar(gpio)    , (int, ) , formato = self._respuesta_ejecutado)
+        self._ordenes.registrar('conmutar'    , 1.0, lambda sesion, gpio: self.conmutar(gpio)  , (int, ) , formato = self._respuesta_ejecutado)
+        self._ordenes.registrar('describir'   , 1.1, lambda sesion, gpio: self.describir(gpio) , (int, ) , formato = self._respuesta_informacion)
+        self._ordenes.registrar('desconectar' , 1.0, lambda sesion: None)
+        self._ordenes.registrar('encender'    , 1.0, lambda sesion, gpio: self.encender(gpio)  , (int, ) , formato = self._respuesta_ejecutado)
+        self._ordenes.registrar('estado'      , 1.0, lambda sesion, gpio: self.estado(gpio)    , (int, ) , formato = self._respuesta_informacion)
+        self._ordenes.registrar('historial'   , 1.6, lambda sesion, segundos = None: self.historial(segundos), (float, ), 0, formato = self._respuesta_historial)
+        self._ordenes.registrar('hola'        , 1.0, lambda sesion, version: self.hola(version, sesion), (float, ))
+        self._ordenes.registrar('listar'      , 1.0, lambda sesion: self.listar())
+        self._ordenes.registrar('pulsar'      , 1.0, lambda sesion, gpio, duracion = None: self.pulsar(gpio, duracion), (int, self._duracion_pulsacion), 1, formato = self._respuesta_ejecutado)
+        self._ordenes.registrar('suscribir'   , 1.5, lambda sesion, *gpios: self.suscribir(sesion, *gpios), (int, ), 0, formato = self._respuesta_suscrito, repetir = True)
+        self._ordenes.registrar('volcar'      , 1.3, lambda sesion: 'info: ' + self.volcar())
 
-                while comando[0:11] != 'desconectar':                                                                                       #     Mientras que el comando recibido no sea el de desconexión
-                    if self._VERSION_PROTOCOLO >= 1.0 and comando == 'listar':                                                              #         Si el comando es "listar"
-                        mensaje = 'info: '                                                                                                  #             Se prepara el mensaje de respuesta
 
-                        for puertos in self._config.GPIOS:                                                                                  #             Se recorre la lista de puertos GPIO
-                            for gpio, tipo, _, _, _ in puertos:
-                                if tipo == config.RELE:
-                                    mensaje = mensaje + str(gpio) + ' '                                              #                 Y su información se añade al mensaje
+    @staticmethod                                                                                                                           # Método estático
+    def _respuesta_ejecutado(respuesta):
+        ''' Formato de respuesta de los comandos que actúan sobre un puerto GPIO
+        '''
+
+        return 'ok: ejecutado' if respuesta else ERROR_PUERTO
 
-                        if DEBUG:
-                            print('Padre #', os.getpid(), "\tVoy a mandarle el mensaje: ", mensaje, sep = '')
 
-                    #                                                                                                                       #         Si el comando es "apagar", "conmutar", "describir", "encender", "estado", "hola" o "pulsar" y está bien formado
-                    elif (self._VERSION_PROTOCOLO >= 1.0 and comando != 'apagar'       and comando[:6] == 'apagar'     and comando[6] == ' ' and comando[ 7:] != '') \
-                      or (self._VERSION_PROTOCOLO >= 1.0 and comando != 'conmutar'     and comando[:8] == 'conmutar'   and comando[8] == ' ' and comando[ 9:] != '') \
-                      or (self._VERSION_PROTOCOLO >= 1.1 and comando != 'describir'    and comando[:9] == 'describir'  and comando[9] == ' ' and comando[10:] != '') \
-                      or (self._VERSION_PROTOCOLO >= 1.0 and comando != 'encender'     and comando[:8] == 'encender'   and comando[8] == ' ' and comando[ 9:] != '') \
-                      or (self._VERSION_PROTOCOLO >= 1.0 and comando != 'estado'       and comando[:6] == 'estado'     and comando[6] == ' ' and comando[ 7:] != '') \
-                      or (self._VERSION_PROTOCOLO >= 1.0 and comando != 'hola'         and comando[:4] == 'hola'       and comando[4] == ' ' and comando[ 5:] != '') \
-                      or (self._VERSION_PROTOCOLO >= 1.0 and comando != 'pulsar'       and comando[:6] == 'pulsar'     and comando[6] == ' ' and comando[ 7:] != '') \
-                    :
-                        funcion, params = comando.split(' ', 1)                                                                             #             Se prepara su ejecución
+    @staticmethod                                                                                                                           # Método estático
+    def _respuesta_historial(respuesta):
+        ''' Formato de respuesta del comando de historial (None indica que el historial no está disponible)
+        '''
 
-                        try:                                                                                                                #             Bloque try
-                            respuesta = eval('self.' + funcion + '(' + params + ')')                                                        #                 Se ejecuta y anexa al mensaje de respuesta el retorno del método
+        return 'info: ' + respuesta if respuesta is not None else ERROR_HISTORIAL
 
-                        except AttributeError:                                                                                              #             Error de comando no implementado
-                            if DEBUG:
-                                print('Padre #', os.getpid(), "\tEl comando \"" + comando + '" es incorrecto o no está implementado', sep = '')
 
-                            mensaje = 'err: incorrecto o no implementado'                                                                   #                 Se establece la respuesta
+    @staticmethod                                                                                                                           # Método estático
+    def _respuesta_informacion(respuesta):
+        ''' Formato de respuesta de los comandos que informan sobre un puerto GPIO (-1 o False indican un puerto incorrecto)
+        '''
 
-                        else:                                                                                                               #             Si todo ha ido bien, se establece la respuesta en función del comando recibido
-                            if comando[:4] == 'hola':
-                                mensaje = respuesta
+        return 'info: ' + str(respuesta) if respuesta is not False and respuesta != -1 else ERROR_PUERTO
 
-                            elif comando[:6] != 'estado' and comando[:9] != 'describir' and respuesta:
-                                mensaje = 'ok: ejecutado'
 
-                            elif (comando[:6] == 'estado' and respuesta != -1) or (comando[0:9] == 'describir' and respuesta):
-                                mensaje = 'info: ' + str(respuesta)
+    @staticmethod                                                                                                                           # Método estático
+    def _respuesta_suscrito(respuesta):
+        ''' Formato de respuesta del comando de suscripción
+        '''
 
-                            else:
-                                mensaje = 'err: no ejecutado, puerto incorrecto o no encontrado'
+        return 'ok: suscrito' if respuesta else ERROR_PUERTO
 
-                    else:                                                                                                                   #         Si el comando es desconocido
-                        mensaje = 'err: no ejecutado, comando incorrecto'                                                                   #             Se establece la respuesta
 
-                    try:                                                                                                                    #             Bloque try
-                        sc.send(mensaje.encode('utf_8'))                                                                                    #                 Se manda el mensaje
+    def _sig_cerrar(self, signum, frame):
+        ''' Funcion "wrapper" para el procesamiento de la señal de cierre
+            - Con el multiplexor en marcha, sólo se le ordena detenerse, y el cierre lo completa bucle() en su propio hilo, al terminar éste
+            - No se cierra desde aquí, ya que el manejador puede haber interrumpido al bucle con su semáforo (o el de un puerto) tomado
+        '''
 
-                    except BrokenPipeError:                                                                                                 #             Error de tubería rota
-                        comando = 'desconectar'                                                                                             #                 Se precarga el comando de desconexión para que sea ejecutado en la siguiente vuelta
+        if self._multiplexor:
+            self._cierre_pedido = True
+            self._multiplexor.detener()
 
-                    except ConnectionResetError:                                                                                            #             Error de conexión reiniciada
-                        comando = 'desconectar'                                                                                             #                 Se precarga el comando de desconexión para que sea ejecutado en la siguiente vuelta
+        else:
+            super()._sig_cerrar(signum, frame)
 
-                    except OSError:                                                                                                         #             Error del sistema operativo
-                        comando = 'desconectar'                                                                                             #                 Se precarga el comando de desconexión para que sea ejecutado en la siguiente vuelta
 
-                    else:                                                                                                                   #             Si todo ha ido bien (nótese la duplicidad de código; ¡gracias, Python, por no implementar la estructura do - while!)
-                        try:                                                                                                                #             Bloque try
-                            comando = sc.recv(1024)                                                                                         #                 Ante un evento, se recibe el contenido
+    def _sig_recargar(self, signum, frame):                                                                                                 # @UnusedVariable
+        ''' Funcion "wrapper" para el procesamiento de la señal de recarga de la configuración
+            - Con el multiplexor en marcha, la recarga se programa dentro de su bucle, entre dos comandos, en lugar de ejecutarse en mitad de uno
+            - Se programa desde otro hilo, ya que el manejador puede haber interrumpido al bucle con su semáforo tomado
+        '''
 
-                        except ConnectionResetError:                                                                                        #             Error de conexión reiniciada
-                            comando = 'desconectar'                                                                                         #                 Se precarga el comando de desconexión para que sea ejecutado en la siguiente vuelta
+        if self._multiplexor:
+            Thread(target = self._multiplexor.programar, args = (0, self.recargar), daemon = True).start()
 
-                        else:                                                                                                               #             Si todo ha ido bien
-                            comando = comando.decode('utf_8')                                                                               #                 Se decodifica el mensaje recibido
-                            comando = comando.lower()                                                                                       #                 Y se normaliza
+        else:
+            self.recargar()
 
-                    finally:                                                                                                                #             En cualquier caso
-                        if DEBUG:
-                            print('Padre #', os.getpid(), "\tHe recibido el comando: ", comando, sep = '')
 
-                # else:                                                                                                                     #     Cuando el comando sea "desconectar"
-                sc.close()                                                                                                                  #         Se cerrará el socket y vuelta a empezar
+    def apagar(self, gpio, buscar = True):
+        ''' Apaga el puerto GPIO dado
+        '''
+
+        if buscar:                                                                                                                          # Si es necesario buscar el puerto GPIO dado para recuperar sus características
+            gpio = self.buscar_gpio(gpio)                                                                                                   #     Se busca y se obtiene el elemento
+
+        if gpio:                                                                                                                            # Si la id del puerto es válida
+            self._salidas.escribir(gpio.gpio, self._gpio.LOW if gpio.activacion else self._gpio.HIGH)                                       #     Se desactiva la salida del puerto GPIO (con el semáforo propio del puerto)
+
+            return True                                                                                                                     #     Se informa del éxito
+
+        else:                                                                                                                               # Si no
+            return False                                                                                                                    #     Se informa del fallo
+
+
+    def bucle(self):
+        ''' Realiza en bucle las tareas asignadas a este sistema
+        '''
+
+        try:
+            if not(DEBUG_PADRE):
+                self._llamadas = llamadas.ejecutor_llamadas(self._config.TRABAJADORES_LLAMADAS, self._config.CAPACIDAD_LLAMADAS)
+                self._llamadas.iniciar()
+
+                self._entradas = self._preparar_entradas()                                                                                  # Se asocian los botones y sondas a sus acciones...
+                self._entradas.iniciar()                                                                                                    # ... y se empiezan a atender sus interrupciones
+
+            self._multiplexor = multiplexor.servidor_multiplexado(self._escuchas[0], self._procesar, self._VERSION_PROTOCOLO)               # Un único selector atenderá a todos los clientes a la vez, cada uno con su propia sesión
+
+            for escucha in self._escuchas[1:]:                                                                                              # Las conexiones de todos los sockets a la escucha se atienden por igual
+                self._multiplexor.escuchar(escucha)
+
+            self._salidas.observar(self._notificar)                                                                                         # Cada cambio en las salidas se publicará a los suscriptores
+
+            if self._config.RELECTURA:                                                                                                      # Si así se ha configurado, se programa la relectura periódica de las salidas
+                self._relectura = self._multiplexor.programar(self._config.RELECTURA, self._releer)
+
+            self._multiplexor.bucle()                                                                                                       # Se ejecutará hasta que se ordene su detención
+
+            if self._cierre_pedido:                                                                                                         # Si la detención la ha pedido la señal de cierre, se cierra ya fuera del manejador, sin semáforos tomados
+                self.cerrar()
 
         except KeyboardInterrupt:
             self.cerrar()
@@ -227,40 +454,51 @@ class domotica_servidor(comun.app):
 
 
     def buscar_gpio(self, gpio):
-        ''' Devuelve, a partir de un número de puerto GPIO, la tupla de control correspondiente
-            - Si el número de puerto dado está en la lista
-                - Devuelve la tupla de control correspondiente
+        ''' Devuelve, a partir de un número de puerto GPIO, el registro de control correspondiente
+            - Si el número de puerto dado está en el índice construido durante el arranque
+                - Devuelve el registro de control correspondiente
             - Si no
                 - Devuelve False
         '''
 
-        res = False                                                                                                                            # Precálculo del resultado fallido
-
-        if isinstance(gpio, int) and gpio > 0 and gpio <= 27:                                                                               # Si el puerto GPIO es un entero, positivo y menor que 27 (27 es el número de puertos GPIO que tiene una Raspberry Pi)
-            for i in range(len(self._config.GPIOS)):                                                                                        #     Se busca a lo largo de la lista de puertos
-                for j in range(len(self._config.GPIOS[i])):
-                    if self._config.GPIOS[i][j][0] == gpio:                                                                                 #         Si hay una coincidencia con el número dado
-                        res = self._config.GPIOS[i][j]                                                                                      #             Se recupera la entrada correspondiente
-
-                        break                                                                                                               #             Y se saldrá del bucle
+        if isinstance(gpio, int) and self._indice:                                                                                          # Si el puerto GPIO es un entero y los puertos han sido indexados
+            return self._indice.buscar(gpio)                                                                                                #     Se recupera su registro sin recorrer la lista de puertos
 
-        return res                                                                                                                          # Se retorna el resultado
+        return False                                                                                                                        # Si no, se retorna el resultado fallido
 
 
     def cerrar(self):
         ''' Realiza las operaciones necesarias para el cierre del sistema
         '''
 
-        global salir                                                                                                                        # Es necesario indicar que estamos ante una variable global, ya que, de lo contrario, se estaría trabajando con una variable homónima de ámbito local al método
-
-        salir = True                                                                                                                        # Se establece la condición de para global para los hijos
-
         if DEBUG:
             print('Padre #', os.getpid(), "\tDisparado el evento de cierre", sep = '')
 
-        if not(DEBUG_PADRE):
-            for hijo in self._hijos:                                                                                                        # Una vez establecida, se recorren los hijos
-                hijo.join()                                                                                                                 #     Para esperar su finalización
+        if self._multiplexor:                                                                                                               # Si el multiplexor de conexiones está en marcha
+            self._multiplexor.detener()                                                                                                     #     Se le ordena detenerse
+
+        if self._entradas:                                                                                                                  # Si el despachador de entradas está en marcha
+            self._entradas.detener()                                                                                                        #     Se deja de atender las interrupciones y se espera a que termine
+
+        if self._llamadas:                                                                                                                  # Si el ejecutor de llamadas está en marcha
+            self._llamadas.detener(1)                                                                                                       #     Se descartan las llamadas pendientes y se espera, poco, a las que estén en curso
+
+            if DEBUG:
+                print('Padre #', os.getpid(), "\tEstadísticas de las llamadas: ", self._llamadas.estadisticas(), sep = '')
+
+        for gpio, temporizador in list(self._pulsos.values()):                                                                              # Las pulsaciones en curso se terminan en el acto
+            self._multiplexor.cancelar(temporizador)
+            self._fin_pulso(gpio)
+
+        for escucha in getattr(self, '_escuchas', ()):                                                                                      # Se cierran los sockets a la escucha (puede que aún no existan si el arranque ha fallado)
+            escucha.close()
+
+        if getattr(self, '_ruta_unix', False):                                                                                              # Si se ha creado un socket en el sistema de archivos, se borra
+            try:
+                os.unlink(self._ruta_unix)
+
+            except OSError:
+                pass
 
         super().cerrar()                                                                                                                    # Llamada al método cerrar() del padre también
 
@@ -269,14 +507,11 @@ class domotica_servidor(comun.app):
         ''' Conmuta (invierte) el estado de un puerto GPIO dado
         '''
 
-        global semaforo                                                                                                                     # Es importante respetar la exclusión mutua
-
         if buscar:                                                                                                                          # Si es necesario buscar el puerto GPIO dado para recuperar sus características
             gpio = self.buscar_gpio(gpio)                                                                                                   #     Se busca y se obtiene el elemento
 
         if gpio:                                                                                                                            # Si el puerto es correcto
-            with semaforo:                                                                                                                  #     Para realizar la operación es necesario un semáforo o podría haber problemas
-                GPIO.output(gpio[0], not(gpio[0]))                                                                                          #         Se conmuta la salida del puerto GPIO
+            self._salidas.conmutar(gpio.gpio)                                                                                               #     Se conmuta la salida del puerto GPIO (con el semáforo propio del puerto)
 
             return True                                                                                                                     #     Se informa del éxito
 
@@ -302,14 +537,11 @@ class domotica_servidor(comun.app):
         ''' Enciende un puerto GPIO dado
         '''
 
-        global semaforo                                                                                                                     # Es importante respetar la exclusión mutua
-
         if buscar:                                                                                                                          # Si es necesario buscar el puerto GPIO dado para recuperar sus características
             gpio = self.buscar_gpio(gpio)                                                                                                   #     Se busca y se obtiene el elemento
 
         if gpio:                                                                                                                            # Si el puerto es correcto
-            with semaforo:                                                                                                                  #     Para realizar la operación es necesario un semáforo o podría haber problemas
-                GPIO.output(gpio[0], GPIO.HIGH if gpio[3] else GPIO.LOW)                                                                    #         Se activa la salida del puerto GPIO
+            self._salidas.escribir(gpio.gpio, self._gpio.HIGH if gpio.activacion else self._gpio.LOW)                                       #     Se activa la salida del puerto GPIO (con el semáforo propio del puerto)
 
             return True                                                                                                                     #     Se informa del éxito
 
@@ -325,7 +557,10 @@ class domotica_servidor(comun.app):
             gpio = self.buscar_gpio(gpio)                                                                                                   #     Se busca y se obtiene el elemento
 
         if gpio:                                                                                                                            # Si el puerto buscado ha sido hallado
-            estado_puerto = GPIO.input(gpio[0])                                                                                             #     Se recoge su estado
+            estado_puerto = self._salidas.leer(gpio.gpio)                                                                                   #     Se recoge su estado de la sombra de las salidas
+
+            if estado_puerto is None:                                                                                                       #     Si no es una salida, no queda más remedio que leer el puerto
+                estado_puerto = self._gpio.input(gpio.gpio)
 
             return estado_puerto if gpio[3] else (estado_puerto + 1) % 2                                                                    #     Y se devuelve
 
@@ -333,175 +568,141 @@ class domotica_servidor(comun.app):
             return -1                                                                                                                       #     Se informa del fallo
 
 
-    def hola(self, version):
-        ''' Evalúa el protocolo que el servidor, lo compara con el que el cliente maneja maneja y responde en consecuencia
+    def historial(self, segundos = None):
+        ''' Devuelve, codificado en JSON, el resumen del historial de temperatura y ventilador en los últimos segundos indicados (o completo) o None si no está disponible
+            - El archivo se abre en modo de sólo lectura en cada petición, así que siempre refleja lo último que ha escrito el sistema de temperaturas
         '''
 
-        test = self._VERSION_PROTOCOLO - float(version)                                                                                     # Se evalúan ambas versiones (la del servidor y la del cliente) como una resta de "floats"
-
-        if test < 0:                                                                                                                        # Si la versión del servidor es superior...
-            self._VERSION_PROTOCOLO = float(version)                                                                                        # ... se adapta...
+        if not(self._config.HISTORIAL):
+            return None
 
-            return 'Ok: ' + str(version)                                                                                                    # ... y se responde "Ok"
+        try:
+            resumen = historial.resumir(self._config.HISTORIAL, segundos)
 
-        elif test == 0:                                                                                                                     # Si la versión del servidor es la misma...
-            return 'Ok: ' + str(version)                                                                                                    # ... se responde "Ok"
+        except (OSError, ValueError):
+            return None
 
-        else:                                                                                                                               # Si la versión del servidor es inferior...
-            return 'Info: ' + str(self._VERSION_PROTOCOLO)                                                                                  # ... se pide al cliente que se adapte
+        return json.dumps(resumen, ensure_ascii = False, separators = (',', ':'))                                                           # Sin saltos de línea, para respetar el enmarcado
 
 
-    def pulsar(self, gpio, buscar = True):
-        ''' Pulsa (enciende y apaga) un puerto GPIO dado
+    def hola(self, version, sesion):
+        ''' Evalúa el protocolo que el servidor maneja, lo compara con el que el cliente maneja y responde en consecuencia, fijando el de la sesión dada
+            - A partir de la versión 1.2, los mensajes de la sesión (incluida esta misma respuesta) pasan a ir enmarcados
         '''
 
-        if buscar:                                                                                                                          # Si es necesario buscar el puerto GPIO dado para recuperar sus características
-            gpio = self.buscar_gpio(gpio)                                                                                                   #     Se busca y se obtiene el elemento
-
-        if gpio:                                                                                                                            # Si el puerto es correcto
-            res = self.encender(gpio, False)                                                                                                #     Condiciona el resultado a la devolución del método encender()
+        test = self._VERSION_PROTOCOLO - float(version)                                                                                     # Se evalúan ambas versiones (la del servidor y la del cliente) como una resta de "floats"
 
-            sleep(self._config.TIEMPO_PULSACION)
+        if test < 0:                                                                                                                        # Si la versión del servidor es inferior...
+            sesion.version_protocolo = self._VERSION_PROTOCOLO                                                                              # ... la sesión usará la del servidor...
 
-            res = res and self.apagar(gpio, False)                                                                                          #     Recondiciona el resultado anterior a la devolución del método apagar()
+            respuesta = 'Info: ' + str(self._VERSION_PROTOCOLO)                                                                             # ... y se pide al cliente que se adapte
 
-        else:                                                                                                                               # Si no
-            res = False                                                                                                                     #     Establece el resultado como erróneo
+        elif test == 0:                                                                                                                     # Si la versión del servidor es la misma...
+            sesion.version_protocolo = self._VERSION_PROTOCOLO                                                                              # ... la sesión usará la común...
 
-        return res                                                                                                                          # Devuelve el resultado
+            respuesta = 'Ok: ' + str(version)                                                                                               # ... y se responde "Ok"
 
+        else:                                                                                                                               # Si la versión del servidor es superior...
+            sesion.version_protocolo = float(version)                                                                                       # ... la sesión se adapta a la del cliente...
 
-    def __del__(self):
-        ''' Destructor de la clase:
-            - Llama al Destructor de la clase padre
-        '''
+            respuesta = 'Ok: ' + str(version)                                                                                               # ... y se responde "Ok"
 
-        super().__del__()
+        sesion.entrada.enmarcado = sesion.version_protocolo >= protocolo.VERSION_ENMARCADO                                                  # Se activa (o no) el enmarcado de los mensajes
 
+        return respuesta
 
-class domotica_servidor_hijos(comun.app):
-    ''' Clase de los hijos del servidor del sistema gestor de domótica
-    '''
 
-    def __init__(self, id_hijo, config):
-        ''' Constructor de la clase:
-            - Inicializa variables
-            - Carga la configuración
+    def listar(self):
+        ''' Devuelve el mensaje con la lista de relés gestionados
         '''
 
-        # super().__init__()                                                                                                                # La llamada al constructor de la clase padre está desactivada a propósito
-
-        self._config = config
-        self._bloqueo = False
-        self._estado_conexion = comun.estados_conexion.DESCONECTADO
-        self._modo_apagado = False
-
-        self._id_hijo = id_hijo
-
-        self._GPIOS = self._config.GPIOS[self._id_hijo]
-
-        self._LLAMADAS = self._config.LLAMADAS[self._id_hijo]
-
-        if DEBUG:
-            print('Hijo  #', self._id_hijo, "\tMi configuración es ", self._GPIOS, sep = '')
-            print('Hijo  #', self._id_hijo, "\tDeberé escuchar en el puerto GPIO", self._GPIOS[0][0] , ' y conmutar el puerto GPIO', self._GPIOS[1][0], sep = '')
-
-
-    def arranque(self):
-        ''' Lleva a cabo las tareas necesarias para el "arranque" de la aplicación
-        '''
+        mensaje = 'info: '                                                                                                                  # Se prepara el mensaje de respuesta
 
-        # super().arranque()                                                                                                                # La llamada al método de la clase padre está desactivada a propósito
+        for puerto in self._indice.buscar_tipo(self._config.RELE):                                                                          # Se recorren los relés indexados
+            mensaje = mensaje + str(puerto.gpio) + ' '                                                                                      #     Y su información se añade al mensaje
 
-        return 0                                                                                                                            # En este caso, no es necesario realizar operaciones de arranque, ya que el hilo padre las ha realizado todas, por lo cual se devuelve 0, que significa que todo se ha realizado correctamente
+        return mensaje
 
 
-    def bucle(self):
-        ''' Realiza en bucle las tareas asignadas a este sistema
+    def pulsar(self, gpio, duracion = None, buscar = True):
+        ''' Pulsa (enciende y apaga) un puerto GPIO dado
+            - La duración se da en milisegundos; si no se da, se usa la configurada para el puerto o, en su defecto, la general
+            - El apagado se programa en el multiplexor, por lo que se responde en el acto sin bloquear al resto de clientes
+            - Pulsar un puerto que ya está pulsándose reinicia el plazo de su apagado
         '''
 
-        global salir, semaforo
-
-        try:
-            for gpio, tipo, _, _, _ in self._GPIOS:
-                if tipo == self._config.BOTON or tipo == self._config.SONDA:
-                    GPIO.add_event_detect(gpio, GPIO.BOTH)                                                                                  # Se añade el evento; se ha empleado GPIO.BOTH porque GPIO.RISING y GPIO.FALLING no parecen funcionar del todo bien
-
-            while not(salir):                                                                                                               # Mientras la condición de parada no se active
-                activado = 0                                                                                                                #     Variable de activado: 0 ➡ no activado; 1 ➡ activado de subida; 2 ➡ activado de bajada
+        if buscar:                                                                                                                          # Si es necesario buscar el puerto GPIO dado para recuperar sus características
+            gpio = self.buscar_gpio(gpio)                                                                                                   #     Se busca y se obtiene el elemento
 
-                for gpio, tipo, _, activacion, _ in self._GPIOS:
-                    if tipo == self._config.BOTON or tipo == self._config.SONDA:                                                            #         Si se está ante un elemento de entrada
-                        if DEBUG:
-                            print('Hijo  #', self._id_hijo, "\tEsperando al puerto GPIO", gpio, sep = '')
+        if gpio and (duracion is None or duracion > 0):                                                                                     # Si el puerto y la duración son correctos
+            if duracion is None:                                                                                                            #     Se obtiene la duración, en segundos
+                duracion = self._config.TIEMPOS_PULSACION.get(gpio.gpio, self._config.TIEMPO_PULSACION)
 
-                        if GPIO.event_detected(gpio):                                                                                       #             Se comprueba el puerto que ha sido activado
-                            if not(activacion):                                                                                             #                 Si es una subida
-                                if DEBUG:
-                                    print('Hijo  #', self._id_hijo, "\tSe ha disparado el evento de subida esperado en el puerto GPIO", gpio, sep = '')
+            else:
+                duracion = duracion / 1000
 
-                                activado = 1                                                                                                #                     Se programa la ejecución posterior
+            res = self.encender(gpio, False)                                                                                                #     Condiciona el resultado a la devolución del método encender()
 
-                            else: # elif activacion:                                                                                        #                 Si es una bajada
-                                if DEBUG:
-                                    print('Hijo  #', self._id_hijo, "\tSe ha disparado el evento de bajada esperado en el puerto GPIO", gpio, sep = '')
+            if self._multiplexor:                                                                                                           #     Si el multiplexor está en marcha, el apagado se programa en él
+                pendiente = self._pulsos.get(gpio.gpio)
 
-                                activado = 2                                                                                                #                     Se programa la ejecución posterior
+                if pendiente:                                                                                                               #         Si el puerto ya estaba pulsándose, se descarta el apagado anterior
+                    self._multiplexor.cancelar(pendiente[1])
 
-                            activacion = not(activacion)                                                                                    #                 Se prepara la próxima activación
+                self._pulsos[gpio.gpio] = (gpio, self._multiplexor.programar(duracion, partial(self._fin_pulso, gpio)))
 
-                    elif tipo == self._config.RELE:                                                                                         #         Si se está ante un elemento de salida
-                        if activado > 0:                                                                                                    #             Si ha sido activado
-                            with semaforo:                                                                                                  #                 Para realizar la operación es necesario un semáforo o podría haber problemas
-                                GPIO.output(gpio, not(GPIO.input(gpio)))                                                                    #                     Se conmuta la salida del puerto GPIO
+            else:                                                                                                                           #     Si no, no queda más remedio que esperar
+                sleep(duracion)
 
-                if activado > 0:                                                                                                            #         Una vez recorrida la tupla, se vuelve a comprobar si ha sido activado
-                    for llamada in self._LLAMADAS:                                                                                          #             Si sí, se recorren las llamadas
-                        if llamada[activado]:                                                                                               #                 Si se ha programado alguna del tipo especificado
-                            self.cargar_y_ejecutar(llamada[0])                                                                              #                     Se ejecuta
+                res = res and self.apagar(gpio, False)                                                                                      #     Recondiciona el resultado anterior a la devolución del método apagar()
 
-                sleep(self._config.PAUSA)                                                                                                   #         Pausa programada para evitar la saturación del sistema
+        else:                                                                                                                               # Si no
+            res = False                                                                                                                     #     Establece el resultado como erróneo
 
-            self.cerrar()                                                                                                                   # Cuando se salga del bucle, se ejecutarán las rutinas de salida
+        return res                                                                                                                          # Devuelve el resultado
 
-        except KeyboardInterrupt:
-            self.cerrar()
 
-            return
+    def suscribir(self, sesion, *gpios):
+        ''' Suscribe una sesión a los cambios de estado de los puertos GPIO dados o, si no se da ninguno, de todos
+            - A partir de entonces, el servidor le mandará un mensaje de evento por cada tanda de cambios, empezando por el estado actual de dichos puertos
+            - La sesión puede seguir mandando comandos; las respuestas se distinguen de los eventos por su prefijo
+        '''
 
+        puertos = [self.buscar_gpio(gpio) for gpio in gpios] if gpios else [puerto for grupo in self._indice.grupos() for puerto in grupo]
 
-    def cerrar(self):
-        ''' Realiza las operaciones necesarias para el cierre del sistema
-        '''
+        if not(all(puertos)) or not(self._multiplexor):                                                                                     # Si algún puerto es incorrecto, no se suscribe a ninguno
+            return False
 
-        if DEBUG:
-            print('Hijo  #', self._id_hijo, "\tDisparado el evento de cierre", sep = '')
+        self._multiplexor.suscribir(sesion, frozenset(gpios) if gpios else None, self._config.CAPACIDAD_EVENTOS, [(puerto.gpio, self.estado(puerto, False)) for puerto in puertos])
 
-        # super().cerrar()                                                                                                                  # La llamada al método de cierre de la clase padre está desactivada a propósito
+        return True
 
 
-    @staticmethod                                                                                                                           # Método estático
-    def _ejecutar(archivo):
-        ''' Ejecuta un script en python3 dado
+    def volcar(self):
+        ''' Devuelve, codificados en JSON, todos los puertos GPIO gestionados con su tipo, estado, activación y descripción
         '''
 
-        proceso = call(sys.executable + os.path.dirname(os.path.abspath(__file__)) + '/' + archivo, shell = True)
+        puertos = []                                                                                                                        # Preparación de la lista de puertos
 
-        if proceso == 0:                                                                                                                    # Si el proceso devolvió una ejecución correcta
-            return True                                                                                                                     #     Se informa del éxito
+        for grupo in self._indice.grupos():                                                                                                 # Se recorre la lista de puertos GPIO indexados
+            for puerto in grupo:
+                puertos.append({                                                                                                            #     Y se añade cada uno con toda su información
+                    'gpio'          : puerto.gpio,
+                    'tipo'          : puerto.tipo,
+                    'estado'        : self.estado(puerto, False),
+                    'activacion'    : puerto.activacion,
+                    'descripcion'   : puerto.descripcion,
+                })
 
-        else:                                                                                                                               # Si no
-            return False                                                                                                                    #     Se informa del fallo
+        return json.dumps(puertos, ensure_ascii = False, separators = (',', ':'))                                                           # Sin saltos de línea, para respetar el enmarcado
 
 
     def __del__(self):
         ''' Destructor de la clase:
-            - No es necesario que haga nada
+            - Llama al Destructor de la clase padre
         '''
 
-        # super().__del__()                                                                                                                 # La llamada al constructor de la clase padre está desactivada a propósito
-
-        pass
+        super().__del__()
 
 
 def main(argv):
@@ -520,22 +721,5 @@ def main(argv):
         sys.exit(err)
 
 
-def main_hijos(argv):
-    if DEBUG_REMOTO:
-        setup_client_server_paths(config.PYDEV_REMOTE_PATHS)
-
-        pydevd.settrace(config.IP_DEP_REMOTA, trace_only_current_thread = False)
-
-    app = domotica_servidor_hijos(argv, config)
-
-    err = app.arranque()
-
-    if err == 0:
-        app.bucle()
-
-    else:
-        sys.exit(err)
-
-
 if __name__ == '__main__':
     main(sys.argv)
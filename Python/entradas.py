@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : entradas.py
+# Description   : Módulo auxiliar que atiende, por interrupciones, los puertos GPIO de entrada (botones y sondas)
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.1.0
+# Usage         : import entradas | from entradas import <clase>
+# Notes         : Las retrollamadas de add_event_detect() se limitan a leer el nivel y encolar el flanco, ya que se ejecutan en el hilo interno de la biblioteca GPIO
+#                 Un único hilo despachador espera bloqueado en la cola y ejecuta, en orden, las acciones asociadas a cada puerto
+#                 Así, no hay ninguna espera activa: el despachador sólo se despierta cuando hay algún flanco que atender
+#                 Si el controlador de los puertos entrega los flancos por un descriptor de archivo (como libgpiod), un hilo lector espera en él y los encola con el nivel y el instante que marca el núcleo
+
+
+DEBUG           = False
+
+
+import os                                                                                   # Funcionalidades varias del sistema operativo
+from queue import Queue                                                                     # Colas sincronizadas
+from select import select                                                                   # Espera de descriptores de archivo
+from threading import Thread                                                                # Capacidades multihilo
+from time import monotonic                                                                  # Reloj monotónico, para medir latencias
+
+
+class despachador_entradas(object):
+    ''' Clase que recibe los flancos de los puertos GPIO de entrada y los reparte entre las acciones registradas para cada uno
+    '''
+
+    def __init__(self, gpio, rebote = None):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+            - "gpio" es el módulo (o el objeto equivalente) de acceso a los puertos GPIO
+            - "rebote" es el tiempo (en milisegundos) durante el cual se ignorarán nuevos flancos de un mismo puerto
+        '''
+
+        self._acciones          = {}
+        self._cola              = Queue()
+        self._despertares       = 0
+        self._eventos           = 0
+        self._gpio              = gpio
+        self._hilo              = False
+        self._latencia_maxima   = 0.0
+        self._latencia_total    = 0.0
+        self._lector            = False                                                     # Hilo lector del descriptor de flancos, si el controlador lo tiene
+        self._parada            = False                                                     # Tubería para sacar al hilo lector de su espera
+        self._rebote            = rebote
+
+
+    def _despachar(self):
+        ''' Bucle del hilo despachador: espera un flanco y ejecuta las acciones de su puerto
+        '''
+
+        while True:
+            flanco = self._cola.get()                                                       # Espera bloqueante: sin flancos, el hilo no se despierta
+
+            self._despertares += 1
+
+            if flanco is None:                                                              # Marca de detención
+                break
+
+            canal, nivel, instante = flanco
+
+            if DEBUG:
+                print('Despachador #', os.getpid(), "\tFlanco de ", 'subida' if nivel else 'bajada', ' en el puerto GPIO', canal, sep = '')
+
+            for accion in self._acciones.get(canal, ()):
+                try:
+                    accion(canal, nivel)
+
+                except Exception as e:                                                      # Un fallo en una acción no debe detener al despachador
+                    if DEBUG:
+                        print('Despachador #', os.getpid(), "\tError en una acción del puerto GPIO", canal, ': ', e, sep = '')
+
+            latencia = monotonic() - instante
+
+            self._eventos += 1
+            self._latencia_total += latencia
+            self._latencia_maxima = max(self._latencia_maxima, latencia)
+
+
+    def _encolar(self, canal):
+        ''' Retrollamada de add_event_detect(): encola el flanco junto con el nivel del puerto y el instante en que se ha producido
+            - El nivel se lee aquí, y no en el despachador, para que una suelta rápida no oculte la pulsación
+        '''
+
+        self._cola.put((canal, self._gpio.input(canal), monotonic()))
+
+
+    def _leer(self):
+        ''' Bucle del hilo lector: espera en el descriptor de flancos del controlador y encola los que lleguen
+        '''
+
+        descriptor = self._gpio.descriptor_flancos()                                        # Se pide una única vez, ya activada la detección en todos los puertos
+
+        while True:
+            listos = select([descriptor, self._parada[0]], [], [])[0]
+
+            if self._parada[0] in listos:                                                   # Orden de detención
+                break
+
+            for flanco in self._gpio.leer_flancos():
+                self._cola.put(flanco)
+
+
+    def detener(self):
+        ''' Deja de atender las interrupciones y espera a que el despachador termine con los flancos pendientes
+        '''
+
+        if self._hilo:
+            if self._lector:                                                                # Primero se detiene al lector, para que no lea de un descriptor ya cerrado
+                os.write(self._parada[1], b'\0')
+                self._lector.join()
+
+                for descriptor in self._parada:
+                    os.close(descriptor)
+
+                self._lector = self._parada = False
+
+            for canal in self._acciones:
+                self._gpio.remove_event_detect(canal)
+
+            self._cola.put(None)
+            self._hilo.join()
+
+            self._hilo = False
+
+
+    def estadisticas(self):
+        ''' Devuelve la cantidad de flancos atendidos, la de veces que se ha despertado el despachador y las latencias media y máxima (en segundos) entre flanco y fin de sus acciones
+        '''
+
+        return {
+            'eventos'           : self._eventos,
+            'despertares'       : self._despertares,
+            'latencia_media'    : self._latencia_total / self._eventos if self._eventos else 0.0,
+            'latencia_maxima'   : self._latencia_maxima,
+        }
+
+
+    def iniciar(self):
+        ''' Activa la detección de flancos en todos los puertos registrados y arranca el hilo despachador
+            - Si el controlador entrega los flancos por un descriptor de archivo, se arranca además el hilo lector, en lugar de usar retrollamadas
+        '''
+
+        if not(self._hilo):
+            self._hilo = Thread(target = self._despachar, daemon = True)
+            self._hilo.start()
+
+            por_descriptor = getattr(self._gpio, 'FLANCOS_POR_DESCRIPTOR', False)
+            retrollamada = None if por_descriptor else self._encolar
+
+            for canal in self._acciones:
+                if self._rebote:
+                    self._gpio.add_event_detect(canal, self._gpio.BOTH, callback = retrollamada, bouncetime = self._rebote)
+
+                else:
+                    self._gpio.add_event_detect(canal, self._gpio.BOTH, callback = retrollamada)
+
+            if por_descriptor and self._acciones:
+                self._parada = os.pipe()
+
+                self._lector = Thread(target = self._leer, daemon = True)
+                self._lector.start()
+
+
+    def registrar(self, canal, accion):
+        ''' Asocia una acción a un puerto GPIO de entrada; se le llamará con el puerto y su nivel tras cada flanco
+        '''
+
+        self._acciones.setdefault(canal, []).append(accion)
@@ -0,0 +1,962 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : hardware.py
+# Description   : Módulo auxiliar que abstrae el acceso a los puertos GPIO, con controladores intercambiables
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.2.2
+# Usage         : import hardware | from hardware import <clase>
+# Notes         : Todos los controladores ofrecen la misma interfaz que RPi.GPIO (setup(), input(), output(), PWM(), add_event_detect()...), para que el resto de sistemas no dependa de cuál se use
+#                 Además, ofrecen lecturas y escrituras de varios puertos en una única operación (leer_varios() y escribir_varios())
+#                 Controladores disponibles: "rpi" (RPi.GPIO), "gpiod" (dispositivo de caracteres, a través de libgpiod) y "simulado" (en memoria, determinista y con tiempo virtual)
+#                 El controlador se elige con la variable de configuración CONTROLADOR_GPIO y se comparte entre todos los sistemas de un mismo proceso
+#                 Las salidas PWM de los puertos indicados en la variable de configuración PWM_HARDWARE se generan con el periférico PWM del procesador, a través de /sys/class/pwm (pwm_sysfs); las demás, o si éste no está disponible, por software, con las del controlador (pwm_hardware())
+
+
+DEBUG           = False
+
+
+from datetime import timedelta                                                              # Intervalos de tiempo
+import errno                                                                                # Códigos de error
+import heapq                                                                                # Montículos, para el guion de entradas del simulador
+from itertools import count                                                                 # Contadores, para desempatar entradas del guion en el mismo instante
+import os                                                                                   # Funcionalidades varias del sistema operativo
+from select import select                                                                   # Espera de descriptores de archivo
+import sys                                                                                  # Funcionalidades varias del sistema
+from threading import Event, Lock, Thread                                                   # Capacidades multihilo
+from time import monotonic, sleep                                                           # Para medir esperas y hacer pausas
+
+
+NANOSEGUNDOS    = 1000000000                                                                # Unidad de los periodos y ciclos de trabajo de /sys/class/pwm
+ESPERA_PWM      = 1.0                                                                       # Tiempo máximo (en segundos) que se espera a que el núcleo (y udev) prepare un canal PWM recién exportado
+RAIZ_PWM        = '/sys/class/pwm'                                                          # Directorio de los chips PWM del núcleo
+
+
+_controlador    = None                                                                      # Controlador compartido por todo el proceso
+
+
+class controlador_gpio(object):
+    ''' Clase base de los controladores: constantes de RPi.GPIO y operaciones sobre varios puertos implementadas puerto a puerto
+        - Cada controlador las sobrescribe si su hardware permite hacerlo en una única operación
+    '''
+
+    BCM                     = 11
+    BOARD                   = 10
+    BOTH                    = 33
+    FALLING                 = 32
+    HIGH                    = 1
+    IN                      = 1
+    LOW                     = 0
+    OUT                     = 0
+    PUD_DOWN                = 21
+    PUD_OFF                 = 20
+    PUD_UP                  = 22
+    RISING                  = 31
+
+    FLANCOS_POR_DESCRIPTOR  = False                                                         # Si es cierto, los flancos pueden esperarse en un descriptor de archivo (descriptor_flancos() y leer_flancos())
+
+    def descriptor_flancos(self):
+        ''' Devuelve el descriptor de archivo en el que esperar los flancos de los puertos con detección activada o None si el controlador no lo permite
+        '''
+
+        return None
+
+
+    def escribir_varios(self, niveles):
+        ''' Establece a la vez el nivel de varios puertos, dados como diccionario puerto ➡ nivel
+        '''
+
+        for canal, nivel in niveles.items():
+            self.output(canal, nivel)
+
+
+    def leer_flancos(self):
+        ''' Devuelve, como lista de (puerto, nivel, instante monotónico), los flancos pendientes
+        '''
+
+        return []
+
+
+    def leer_varios(self, canales):
+        ''' Devuelve, como diccionario puerto ➡ nivel, el nivel de varios puertos
+        '''
+
+        return {canal: self.input(canal) for canal in canales}
+
+
+class pwm_software(object):
+    ''' Clase que genera una señal PWM por software, conmutando un puerto desde un hilo propio, con la misma interfaz que RPi.GPIO.PWM
+        - Para los controladores cuyo hardware no tiene PWM
+    '''
+
+    def __init__(self, controlador, canal, frecuencia):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self._canal         = canal
+        self._cambio        = Event()                                                       # Avisa al hilo de un cambio de ciclo de trabajo o de frecuencia
+        self._ciclo         = 0.0
+        self._controlador   = controlador
+        self._frecuencia    = frecuencia
+        self._hilo          = False
+        self._parar         = False
+
+
+    def _generar(self):
+        ''' Bucle del hilo: mantiene el puerto a nivel alto y bajo según el ciclo de trabajo
+            - Con un ciclo de trabajo del 0 o del 100 %, fija el nivel y duerme hasta el siguiente cambio
+        '''
+
+        while not(self._parar):
+            periodo = 1 / self._frecuencia
+            alto = periodo * self._ciclo / 100
+
+            if alto <= 0 or alto >= periodo:
+                self._controlador.output(self._canal, self._controlador.HIGH if alto > 0 else self._controlador.LOW)
+
+                self._cambio.wait()
+                self._cambio.clear()
+
+            else:
+                self._controlador.output(self._canal, self._controlador.HIGH)
+                sleep(alto)
+                self._controlador.output(self._canal, self._controlador.LOW)
+                sleep(periodo - alto)
+
+
+    def ChangeDutyCycle(self, ciclo):
+        ''' Cambia el ciclo de trabajo (de 0 a 100)
+        '''
+
+        self._ciclo = ciclo
+        self._cambio.set()
+
+
+    def ChangeFrequency(self, frecuencia):
+        ''' Cambia la frecuencia (en Hz)
+        '''
+
+        self._frecuencia = frecuencia
+        self._cambio.set()
+
+
+    def start(self, ciclo):
+        ''' Arranca la señal con el ciclo de trabajo dado
+        '''
+
+        self._ciclo = ciclo
+
+        if not(self._hilo):
+            self._parar = False
+
+            self._hilo = Thread(target = self._generar, daemon = True)
+            self._hilo.start()
+
+
+    def stop(self):
+        ''' Detiene la señal y deja el puerto a nivel bajo
+        '''
+
+        if self._hilo:
+            self._parar = True
+            self._cambio.set()
+
+            self._hilo.join()
+            self._hilo = False
+
+            self._controlador.output(self._canal, self._controlador.LOW)
+
+
+class pwm_sysfs(object):
+    ''' Clase que genera una señal PWM con el periférico PWM del procesador, a través de /sys/class/pwm/pwmchip<n>/pwm<m>, con la misma interfaz que RPi.GPIO.PWM
+        - La señal la mantiene el propio periférico, así que, a diferencia de la generada por software, no consume CPU: sólo se escribe en sysfs al arrancarla, cambiarla o detenerla
+        - El puerto ha de estar asignado al canal PWM (por ejemplo, con "dtoverlay=pwm" en /boot/config.txt) y no debe configurarse como salida GPIO
+    '''
+
+    def __init__(self, chip, canal, frecuencia):
+        ''' Constructor de la clase:
+            - Comprueba que el chip existe y tiene el canal dado, y lo exporta, y lanza OSError si algo de ello falla (por ejemplo, EBUSY si otro controlador ya usa el canal)
+            - "chip" es el directorio del chip (por ejemplo, /sys/class/pwm/pwmchip0)
+        '''
+
+        with open(os.path.join(chip, 'npwm')) as archivo:
+            if canal >= int(archivo.read()):
+                raise OSError(errno.ENODEV, f'{chip} no tiene el canal {canal}')
+
+        self._canal         = canal
+        self._chip          = chip
+        self._ciclo         = 0.0
+        self._directorio    = os.path.join(chip, f'pwm{canal}')
+        self._periodo       = round(NANOSEGUNDOS / frecuencia)
+        self._activo        = False
+
+        try:
+            self._exportar()
+
+        except OSError:                                                                     # Si el canal no queda listo, no se deja exportado, ya que nadie lo liberará
+            self._liberar()
+
+            raise
+
+
+    def _escribir(self, atributo, valor):
+        ''' Escribe un valor en un atributo del canal
+        '''
+
+        with open(os.path.join(self._directorio, atributo), 'w') as archivo:
+            archivo.write(str(valor))
+
+
+    def _exportar(self):
+        ''' Exporta el canal, si no lo está ya, y espera a que sus atributos se puedan escribir
+            - El núcleo crea el directorio del canal al exportarlo, pero udev puede tardar un poco más en darle permisos, así que se comprueba brevemente antes de la primera escritura
+            - Lanza OSError (ETIMEDOUT) si el canal no queda listo en ESPERA_PWM segundos
+        '''
+
+        if not(os.path.isdir(self._directorio)):
+            with open(os.path.join(self._chip, 'export'), 'w') as archivo:
+                archivo.write(str(self._canal))
+
+        limite = monotonic() + ESPERA_PWM
+
+        while not(all(os.access(os.path.join(self._directorio, atributo), os.W_OK) for atributo in ('duty_cycle', 'enable', 'period'))):
+            if monotonic() >= limite:
+                raise OSError(errno.ETIMEDOUT, f'{self._directorio} no está listo tras exportarlo')
+
+            sleep(0.01)
+
+
+    def _liberar(self):
+        ''' Libera (deja de exportar) el canal tras un fallo, ignorando a su vez los fallos al hacerlo, para no ocultar el original
+        '''
+
+        try:
+            with open(os.path.join(self._chip, 'unexport'), 'w') as archivo:
+                archivo.write(str(self._canal))
+
+        except OSError:
+            pass
+
+
+    def _trabajo(self):
+        ''' Devuelve el tiempo en alto de cada periodo (en nanosegundos) para el ciclo de trabajo actual
+        '''
+
+        return round(self._periodo * min(max(self._ciclo, 0.0), 100.0) / 100)
+
+
+    def ChangeDutyCycle(self, ciclo):
+        ''' Cambia el ciclo de trabajo (de 0 a 100)
+        '''
+
+        self._ciclo = ciclo
+
+        if self._activo:
+            self._escribir('duty_cycle', self._trabajo())
+
+
+    def ChangeFrequency(self, frecuencia):
+        ''' Cambia la frecuencia (en Hz)
+            - El tiempo en alto nunca puede superar al periodo, así que, si éste se acorta, se cambia primero aquél
+        '''
+
+        anterior = self._periodo
+        self._periodo = round(NANOSEGUNDOS / frecuencia)
+
+        if self._activo:
+            if self._periodo < anterior:
+                self._escribir('duty_cycle', self._trabajo())
+                self._escribir('period', self._periodo)
+
+            else:
+                self._escribir('period', self._periodo)
+                self._escribir('duty_cycle', self._trabajo())
+
+
+    def start(self, ciclo):
+        ''' Arranca la señal con el ciclo de trabajo dado, volviendo a exportar el canal si se liberó al detenerla
+            - Si falla, libera el canal antes de relanzar la excepción, ya que, sin arrancar, stop() no lo haría (por ejemplo, si se recurre entonces al PWM por software)
+        '''
+
+        self._ciclo = ciclo
+
+        try:
+            self._exportar()
+
+            self._escribir('duty_cycle', 0)                                                 # Por si el canal conserva un periodo anterior más largo que el nuevo
+            self._escribir('period', self._periodo)
+            self._escribir('duty_cycle', self._trabajo())
+            self._escribir('enable', 1)
+
+        except OSError:
+            self._liberar()
+
+            raise
+
+        self._activo = True
+
+
+    def stop(self):
+        ''' Detiene la señal y libera el canal
+        '''
+
+        if self._activo:
+            self._escribir('enable', 0)
+
+            with open(os.path.join(self._chip, 'unexport'), 'w') as archivo:
+                archivo.write(str(self._canal))
+
+            self._activo = False
+
+
+class controlador_rpi(controlador_gpio):
+    ''' Controlador basado en RPi.GPIO: delega en el módulo todo lo que no sea propio de esta interfaz
+    '''
+
+    def __init__(self):
+        ''' Constructor de la clase:
+            - Importa RPi.GPIO, que sólo está disponible en una Raspberry Pi
+        '''
+
+        import RPi.GPIO as GPIO                                                             # Acceso a los pines GPIO
+
+        self._GPIO = GPIO
+
+
+    def __getattr__(self, nombre):
+        ''' Todo lo no definido en esta clase (setup(), input(), output(), PWM()...) se busca en RPi.GPIO
+        '''
+
+        return getattr(self._GPIO, nombre)
+
+
+    def escribir_varios(self, niveles):
+        ''' Establece a la vez el nivel de varios puertos, en una única llamada a RPi.GPIO, que admite listas de puertos y niveles
+        '''
+
+        if niveles:
+            self._GPIO.output(list(niveles.keys()), list(niveles.values()))
+
+
+class controlador_gpiod(controlador_gpio):
+    ''' Controlador basado en el dispositivo de caracteres de GPIO del núcleo, a través de libgpiod (versión 2 de sus enlaces para python)
+        - Todos los puertos configurados se piden en una única petición, por lo que las lecturas y escrituras de varios puertos son una única llamada al sistema
+        - Los flancos se reciben por un descriptor de archivo, con la marca de tiempo del núcleo
+        - No tiene PWM por hardware, así que se genera por software
+    '''
+
+    FLANCOS_POR_DESCRIPTOR  = True
+
+    def __init__(self, chip = '/dev/gpiochip0', consumidor = 'rppgct'):
+        ''' Constructor de la clase:
+            - Importa gpiod
+            - Inicializa las variables
+            - La petición de los puertos se hace la primera vez que se usan, con todos los configurados hasta entonces
+        '''
+
+        import gpiod                                                                        # Acceso a los puertos GPIO por el dispositivo de caracteres
+        from gpiod.line import Bias, Direction, Edge, Value                                 # Ajustes de cada puerto
+
+        self._ajustes       = {}                                                            # Ajustes de cada puerto configurado
+        self._chip          = chip
+        self._consumidor    = consumidor
+        self._detectados    = set()
+        self._gpiod         = gpiod
+        self._hilo          = False
+        self._peticion      = None
+        self._retrollamadas = {}
+        self._semaforo      = Lock()
+
+        self._bias          = {self.PUD_DOWN: Bias.PULL_DOWN, self.PUD_OFF: Bias.DISABLED, self.PUD_UP: Bias.PULL_UP}
+        self._direction     = Direction
+        self._edge          = {self.BOTH: Edge.BOTH, self.FALLING: Edge.FALLING, self.RISING: Edge.RISING, None: Edge.NONE}
+        self._value         = Value
+
+
+    def _pedir(self):
+        ''' Devuelve la petición de todos los puertos configurados, haciéndola de nuevo si la configuración ha cambiado
+        '''
+
+        if self._peticion is None:
+            self._peticion = self._gpiod.request_lines(self._chip, consumer = self._consumidor, config = dict(self._ajustes))
+
+        return self._peticion
+
+
+    def _reconfigurar(self):
+        ''' Libera la petición actual, para que la siguiente operación la haga con los nuevos ajustes
+        '''
+
+        if self._peticion is not None:
+            self._peticion.release()
+            self._peticion = None
+
+
+    def _vigilar(self):
+        ''' Bucle del hilo que, como el interno de RPi.GPIO, espera los flancos y llama a sus retrollamadas
+        '''
+
+        while self._retrollamadas:
+            for canal, _, _ in self.leer_flancos(0.5):
+                retrollamada = self._retrollamadas.get(canal)
+
+                if retrollamada:
+                    retrollamada(canal)
+
+        self._hilo = False
+
+
+    def add_event_detect(self, canal, flanco, callback = None, bouncetime = None):
+        ''' Activa la detección de flancos de un puerto, con o sin retrollamada
+        '''
+
+        with self._semaforo:
+            self._ajustes[canal].edge_detection = self._edge[flanco]
+
+            if bouncetime:
+                self._ajustes[canal].debounce_period = timedelta(milliseconds = bouncetime)
+
+            self._reconfigurar()
+
+        if callback:
+            self._retrollamadas[canal] = callback
+
+            if not(self._hilo):
+                self._hilo = Thread(target = self._vigilar, daemon = True)
+                self._hilo.start()
+
+
+    def cleanup(self, canal = None):
+        ''' Libera todos los puertos o, si se da, sólo uno
+        '''
+
+        with self._semaforo:
+            self._reconfigurar()
+
+            if canal is None:
+                self._retrollamadas.clear()
+                self._ajustes.clear()
+
+            else:
+                self._retrollamadas.pop(canal, None)
+                self._ajustes.pop(canal, None)
+                self._detectados.discard(canal)
+
+
+    def descriptor_flancos(self):
+        ''' Devuelve el descriptor de archivo de la petición, que estará listo para leer cuando haya flancos pendientes
+            - Cambia si se reconfigura algún puerto, por lo que debe pedirse después de activar la detección en todos ellos
+        '''
+
+        with self._semaforo:
+            return self._pedir().fd
+
+
+    def escribir_varios(self, niveles):
+        ''' Establece a la vez el nivel de varios puertos, en una única llamada al sistema
+        '''
+
+        valores = {canal: self._value.ACTIVE if nivel else self._value.INACTIVE for canal, nivel in niveles.items()}
+
+        with self._semaforo:
+            self._pedir().set_values(valores)
+
+            for canal, valor in valores.items():                                            # Si hubiera que volver a pedir los puertos, conservarían su nivel
+                self._ajustes[canal].output_value = valor
+
+
+    def event_detected(self, canal):
+        ''' Indica si ha habido algún flanco en un puerto desde la última consulta
+        '''
+
+        self.leer_flancos(0)
+
+        if canal in self._detectados:
+            self._detectados.discard(canal)
+
+            return True
+
+        return False
+
+
+    def input(self, canal):
+        ''' Devuelve el nivel de un puerto
+        '''
+
+        with self._semaforo:
+            return 1 if self._pedir().get_value(canal) == self._value.ACTIVE else 0
+
+
+    def leer_flancos(self, espera = 0):
+        ''' Devuelve, como lista de (puerto, nivel, instante monotónico), los flancos pendientes, esperándolos como mucho los segundos dados
+        '''
+
+        try:
+            if not(select([self.descriptor_flancos()], [], [], espera)[0]):
+                return []
+
+        except (OSError, ValueError):                                                       # La petición se ha reconfigurado (y su descriptor, cerrado) durante la espera
+            return []
+
+        with self._semaforo:
+            eventos = self._pedir().read_edge_events()
+
+        flancos = []
+
+        for evento in eventos:
+            self._detectados.add(evento.line_offset)
+
+            flancos.append((evento.line_offset, 1 if evento.event_type == evento.Type.RISING_EDGE else 0, evento.timestamp_ns / 1e9))  # El núcleo usa por defecto el reloj monotónico, el mismo que time.monotonic()
+
+        return flancos
+
+
+    def leer_varios(self, canales):
+        ''' Devuelve, como diccionario puerto ➡ nivel, el nivel de varios puertos, en una única llamada al sistema
+        '''
+
+        with self._semaforo:
+            valores = self._pedir().get_values(list(canales))
+
+        return {canal: 1 if valor == self._value.ACTIVE else 0 for canal, valor in zip(canales, valores)}
+
+
+    def output(self, canal, nivel):
+        ''' Establece el nivel de un puerto
+        '''
+
+        self.escribir_varios({canal: nivel})
+
+
+    def PWM(self, canal, frecuencia):
+        ''' Devuelve un generador PWM por software para el puerto dado
+        '''
+
+        return pwm_software(self, canal, frecuencia)
+
+
+    def remove_event_detect(self, canal):
+        ''' Desactiva la detección de flancos de un puerto
+        '''
+
+        self._retrollamadas.pop(canal, None)
+
+        with self._semaforo:
+            if canal in self._ajustes:
+                self._ajustes[canal].edge_detection = self._edge[None]
+
+                self._reconfigurar()
+
+
+    def setmode(self, modo):                                                                # @UnusedVariable
+        ''' El dispositivo de caracteres numera los puertos por su desplazamiento en el chip, que en una Raspberry Pi coincide con la numeración BCM
+        '''
+
+        pass
+
+
+    def setup(self, canal, modo, initial = None, pull_up_down = None):
+        ''' Configura un puerto como entrada o salida
+        '''
+
+        ajustes = self._gpiod.LineSettings()
+
+        if modo == self.OUT:
+            ajustes.direction = self._direction.OUTPUT
+            ajustes.output_value = self._value.ACTIVE if initial else self._value.INACTIVE
+
+        else:
+            ajustes.direction = self._direction.INPUT
+
+            if pull_up_down is not None:
+                ajustes.bias = self._bias[pull_up_down]
+
+        with self._semaforo:
+            self._ajustes[canal] = ajustes
+
+            self._reconfigurar()
+
+
+    def setwarnings(self, avisos):                                                          # @UnusedVariable
+        ''' Sin avisos que activar o desactivar
+        '''
+
+        pass
+
+
+class pwm_simulado(object):
+    ''' Clase que simula un generador PWM, registrando su ciclo de trabajo
+    '''
+
+    def __init__(self, controlador, canal, frecuencia):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self.canal          = canal
+        self.ciclo          = 0.0
+        self.frecuencia     = frecuencia
+        self.activo         = False
+        self._controlador   = controlador
+
+
+    def ChangeDutyCycle(self, ciclo):
+        ''' Cambia el ciclo de trabajo (de 0 a 100)
+        '''
+
+        self.ciclo = ciclo
+
+        self._controlador.historial.append((self._controlador.reloj, self.canal, ciclo))
+
+
+    def ChangeFrequency(self, frecuencia):
+        ''' Cambia la frecuencia (en Hz)
+        '''
+
+        self.frecuencia = frecuencia
+
+
+    def start(self, ciclo):
+        ''' Arranca la señal con el ciclo de trabajo dado
+        '''
+
+        self.activo = True
+
+        self.ChangeDutyCycle(ciclo)
+
+
+    def stop(self):
+        ''' Detiene la señal
+        '''
+
+        self.activo = False
+
+
+class controlador_simulado(controlador_gpio):
+    ''' Controlador en memoria, para ejecutar y medir los sistemas fuera de una Raspberry Pi:
+        - Guarda el nivel y el modo de cada puerto y lleva un historial de las escrituras, con su instante virtual
+        - Los flancos se inyectan al momento (flanco()) o se programan en un guion (programar()) que se reproduce al avanzar el tiempo virtual (avanzar())
+        - Las retrollamadas se ejecutan en el mismo hilo que provoca el flanco, por lo que el resultado es siempre el mismo
+        - Opcionalmente, cada acceso tarda el retardo (real) dado, como haría un acceso al hardware
+    '''
+
+    def __init__(self, retardo = 0):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self.accesos        = 0                                                             # Cantidad de operaciones sobre el "hardware" (una por cada llamada, sea de uno o de varios puertos)
+        self.historial      = []                                                            # Escrituras realizadas: (instante virtual, puerto, nivel o ciclo de trabajo)
+        self.reloj          = 0.0                                                           # Tiempo virtual, en segundos
+
+        self._detectados    = set()
+        self._flancos       = {}                                                            # Por puerto: (tipo de flanco, retrollamada, rebote en segundos)
+        self._guion         = []                                                            # Montículo de entradas programadas: (instante virtual, secuencia, puerto, nivel)
+        self._modos         = {}
+        self._niveles       = {}
+        self._retardo       = retardo
+        self._secuencia     = count()
+        self._ultimos       = {}                                                            # Instante virtual del último flanco aceptado de cada puerto, para el rebote
+
+
+    def _acceder(self):
+        ''' Cuenta una operación y, si así se ha configurado, espera el retardo
+        '''
+
+        self.accesos += 1
+
+        if self._retardo:
+            sleep(self._retardo)
+
+
+    def add_event_detect(self, canal, flanco, callback = None, bouncetime = None):
+        ''' Activa la detección de flancos de un puerto, con o sin retrollamada
+        '''
+
+        self._flancos[canal] = (flanco, callback, bouncetime / 1000 if bouncetime else 0)
+
+
+    def avanzar(self, segundos):
+        ''' Avanza el tiempo virtual, reproduciendo en orden las entradas del guion que venzan por el camino
+            - Devuelve la cantidad de entradas reproducidas
+        '''
+
+        limite = self.reloj + segundos
+        reproducidas = 0
+
+        while self._guion and self._guion[0][0] <= limite:
+            instante, _, canal, nivel = heapq.heappop(self._guion)
+
+            self.reloj = max(self.reloj, instante)
+            self.flanco(canal, nivel)
+
+            reproducidas += 1
+
+        self.reloj = limite
+
+        return reproducidas
+
+
+    def cleanup(self, canal = None):
+        ''' Libera todos los puertos o, si se da, sólo uno
+        '''
+
+        if canal is None:
+            self._flancos.clear()
+            self._modos.clear()
+
+        else:
+            self._flancos.pop(canal, None)
+            self._modos.pop(canal, None)
+            self._detectados.discard(canal)
+
+
+    def escribir_varios(self, niveles):
+        ''' Establece a la vez el nivel de varios puertos, en un único acceso
+        '''
+
+        self._acceder()
+
+        for canal, nivel in niveles.items():
+            self._niveles[canal] = nivel
+
+            self.historial.append((self.reloj, canal, nivel))
+
+
+    def event_detected(self, canal):
+        ''' Indica si ha habido algún flanco en un puerto desde la última consulta
+        '''
+
+        if canal in self._detectados:
+            self._detectados.discard(canal)
+
+            return True
+
+        return False
+
+
+    def flanco(self, canal, nivel):
+        ''' Cambia el nivel de un puerto de entrada y, si tiene la detección activada, el tipo de flanco coincide y no es un rebote, llama a su retrollamada
+            - Devuelve si el flanco se ha aceptado
+        '''
+
+        self._niveles[canal] = nivel
+
+        if canal not in self._flancos:
+            return False
+
+        tipo, retrollamada, rebote = self._flancos[canal]
+
+        if (tipo == self.RISING and not(nivel)) or (tipo == self.FALLING and nivel):
+            return False
+
+        if rebote and canal in self._ultimos and self.reloj - self._ultimos[canal] < rebote:
+            return False
+
+        self._ultimos[canal] = self.reloj
+        self._detectados.add(canal)
+
+        if retrollamada:
+            retrollamada(canal)
+
+        return True
+
+
+    def input(self, canal):
+        ''' Devuelve el nivel de un puerto
+        '''
+
+        self._acceder()
+
+        return self._niveles.get(canal, self.LOW)
+
+
+    def leer_varios(self, canales):
+        ''' Devuelve, como diccionario puerto ➡ nivel, el nivel de varios puertos, en un único acceso
+        '''
+
+        self._acceder()
+
+        return {canal: self._niveles.get(canal, self.LOW) for canal in canales}
+
+
+    def modo(self, canal):
+        ''' Devuelve el modo (IN u OUT) con el que se ha configurado un puerto o None si no se ha configurado
+        '''
+
+        return self._modos.get(canal)
+
+
+    def monotonic(self):
+        ''' Devuelve el tiempo virtual, para sustituir a time.monotonic() en las simulaciones
+        '''
+
+        return self.reloj
+
+
+    def output(self, canal, nivel):
+        ''' Establece el nivel de un puerto
+        '''
+
+        self._acceder()
+
+        self._niveles[canal] = nivel
+
+        self.historial.append((self.reloj, canal, nivel))
+
+
+    def programar(self, instante, canal, nivel):
+        ''' Programa, en el guion, un cambio de nivel de un puerto de entrada en el instante virtual dado
+        '''
+
+        heapq.heappush(self._guion, (instante, next(self._secuencia), canal, nivel))
+
+
+    def PWM(self, canal, frecuencia):
+        ''' Devuelve un generador PWM simulado para el puerto dado
+        '''
+
+        return pwm_simulado(self, canal, frecuencia)
+
+
+    def remove_event_detect(self, canal):
+        ''' Desactiva la detección de flancos de un puerto
+        '''
+
+        self._flancos.pop(canal, None)
+
+
+    def setmode(self, modo):                                                                # @UnusedVariable
+        ''' Sin numeraciones distintas que elegir
+        '''
+
+        pass
+
+
+    def setup(self, canal, modo, initial = None, pull_up_down = None):
+        ''' Configura un puerto como entrada o salida, con su nivel inicial
+        '''
+
+        self._acceder()
+
+        self._modos[canal] = modo
+
+        if modo == self.OUT:
+            self._niveles[canal] = initial if initial is not None else self.LOW
+
+        else:
+            self._niveles[canal] = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+
+
+    def setwarnings(self, avisos):                                                          # @UnusedVariable
+        ''' Sin avisos que activar o desactivar
+        '''
+
+        pass
+
+
+CONTROLADORES   = {
+                    'gpiod'     : controlador_gpiod,
+                    'rpi'       : controlador_rpi,
+                    'simulado'  : controlador_simulado,
+                  }
+
+
+def controlador(nombre = None):
+    ''' Devuelve el controlador compartido por todo el proceso, creándolo la primera vez
+        - "nombre" es uno de los de CONTROLADORES; por defecto, "rpi"
+        - Una vez creado, se devuelve siempre el mismo, se pida el que se pida, ya que no pueden convivir dos controladores de los mismos puertos
+    '''
+
+    global _controlador
+
+    if _controlador is None:
+        _controlador = CONTROLADORES[nombre or 'rpi']()
+
+        if DEBUG:
+            print('Hardware #', os.getpid(), "\tUsando el controlador ", type(_controlador).__name__, sep = '')
+
+    return _controlador
+
+
+def pwm_hardware(canal, frecuencia, canales = None, raiz = None):
+    ''' Devuelve un generador PWM por hardware (pwm_sysfs) para el puerto dado, si está en "canales" (diccionario puerto ➡ (chip, canal), como la variable de configuración PWM_HARDWARE) y su chip está disponible
+        - Si no, devuelve None, para que se use el del controlador (por software), que sólo es una alternativa, ya que consume CPU continuamente
+        - "raiz" sustituye a RAIZ_PWM, por ejemplo, por un árbol falso (sysfs_pwm_simulado())
+    '''
+
+    if canales and canal in canales:
+        chip, salida = canales[canal]
+
+        try:
+            return pwm_sysfs(os.path.join(raiz or RAIZ_PWM, f'pwmchip{chip}'), salida, frecuencia)
+
+        except (OSError, ValueError) as e:
+            print(f'Aviso: PWM por hardware no disponible en el puerto GPIO{canal} ({e}); se usará por software', file = sys.stderr)
+
+    return None
+
+
+def sysfs_pwm_simulado(raiz, chips = 1, canales = 2):
+    ''' Crea bajo el directorio dado un árbol falso de /sys/class/pwm, para pruebas: "chips" chips con "canales" canales cada uno, sin exportar
+        - Sus archivos export y unexport son tuberías con nombre, atendidas por un hilo que, como el núcleo, crea o borra el directorio del canal escrito en ellas
+        - Devuelve la ruta que usar como "raiz" en pwm_hardware()
+    '''
+
+    for chip in range(chips):
+        directorio = os.path.join(raiz, f'pwmchip{chip}')
+
+        os.makedirs(directorio, exist_ok = True)
+
+        with open(os.path.join(directorio, 'npwm'), 'w') as archivo:
+            archivo.write(f'{canales}\n')
+
+        for nombre, accion in (('export', _exportar_simulado), ('unexport', _liberar_simulado)):
+            os.mkfifo(os.path.join(directorio, nombre))
+
+            Thread(target = _atender_simulado, args = (directorio, nombre, accion), daemon = True).start()
+
+    return raiz
+
+
+def _atender_simulado(directorio, nombre, accion):
+    ''' Atiende las escrituras en un archivo export o unexport de sysfs_pwm_simulado(), hasta que desaparezca el árbol
+    '''
+
+    while True:
+        try:
+            with open(os.path.join(directorio, nombre)) as archivo:                         # Se bloquea hasta que alguien lo abra para escribir
+                datos = archivo.read()
+
+            for canal in datos.split():
+                accion(directorio, int(canal))
+
+        except OSError:                                                                     # El árbol se ha borrado, quizás mientras se atendía la última escritura
+            return
+
+
+def _exportar_simulado(directorio, canal):
+    ''' Crea el directorio de un canal del árbol falso y, después, sus atributos, como el núcleo y udev
+    '''
+
+    os.makedirs(os.path.join(directorio, f'pwm{canal}'), exist_ok = True)
+
+    for nombre, valor in (('duty_cycle', 0), ('enable', 0), ('period', 0), ('polarity', 'normal')):
+        with open(os.path.join(directorio, f'pwm{canal}', nombre), 'w') as archivo:
+            archivo.write(f'{valor}\n')
+
+
+def _liberar_simulado(directorio, canal):
+    ''' Borra el directorio de un canal del árbol falso
+    '''
+
+    ruta = os.path.join(directorio, f'pwm{canal}')
+
+    if os.path.isdir(ruta):
+        for nombre in os.listdir(ruta):
+            os.remove(os.path.join(ruta, nombre))
+
+        os.rmdir(ruta)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : historial.py
+# Description   : Módulo auxiliar que guarda, en un búfer circular de tamaño fijo proyectado en memoria, las muestras de temperatura y ventilador, y las resume por ventanas de tiempo
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.0.0
+# Usage         : python3 historial.py [segundos [json]] o from historial import historial
+# Notes         : Cada muestra es un instante (segundos desde la época), una temperatura, una velocidad del ventilador (de 0 a 1) y una etapa de temperatura
+#                 El archivo se proyecta en memoria con mmap, así que cada muestra escribe sólo sus propios bytes y el historial sobrevive a los reinicios sin reescribirse
+#                 Las columnas se leen a través de vistas (memoryview o, si está instalado, NumPy) sobre la propia proyección, sin copiar el búfer; sólo los percentiles ordenan una copia de la ventana pedida
+#                 Este módulo está pensado para ser llamado desde otros módulos, aunque si es llamado directamente, resume el historial configurado en la última hora o en los segundos indicados
+
+
+import errno                                                                                # Códigos de error
+import json                                                                                 # Codificación del resumen
+import mmap                                                                                 # Proyección de archivos en memoria
+import os                                                                                   # Funcionalidades varias del sistema operativo
+import struct                                                                               # Codificación de la cabecera
+import sys                                                                                  # Funcionalidades varias del sistema
+from bisect import bisect_left, bisect_right                                                # Búsqueda binaria en listas ordenadas
+from collections import Counter                                                             # Recuento de etapas
+from time import localtime, strftime, time                                                  # Instante actual y su formato
+
+try:
+    import numpy                                                                            # Cálculo vectorial, opcional
+
+except ImportError:
+    numpy = None
+
+
+CABECERA            = struct.Struct('<8sIIQ')                                               # Firma, versión, capacidad y cantidad total de muestras escritas
+FIRMA               = b'RPPGCTHT'
+NOMBRES             = {'minima': 'mínima', 'maxima': 'máxima', 'media': 'media'}            # Nombres legibles de cada estadística, para texto(); los percentiles se muestran tal cual
+PERCENTILES         = (50, 90, 99)                                                          # Percentiles que se calculan por defecto
+POSICION_TOTAL      = 16                                                                    # Posición, dentro de la cabecera, de la cantidad total de muestras escritas
+TAMANYO_CABECERA    = 32                                                                    # La cabecera ocupa 24 bytes, pero se reservan 32 para que las columnas queden alineadas
+VERSION             = 1
+
+COLUMNAS            = (                                                                     # Nombre, formato (de struct, memoryview y NumPy) y tamaño de cada columna, en el orden en que se guardan
+                        ('instantes'    , 'd', 8),
+                        ('temperaturas' , 'f', 4),
+                        ('velocidades'  , 'f', 4),
+                        ('estados'      , 'B', 1),
+                      )
+
+
+def _percentil(ordenados, percentil):
+    ''' Devuelve el percentil dado de una secuencia ordenada, interpolando linealmente entre sus dos valores más cercanos (como numpy.percentile)
+    '''
+
+    posicion = (len(ordenados) - 1) * percentil / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+class historial(object):
+    ''' Búfer circular de muestras, respaldado por un archivo proyectado en memoria
+        - El archivo tiene una cabecera y una columna contigua por dato, con sitio para "capacidad" muestras; al llenarse, cada muestra nueva sustituye a la más antigua
+        - Si el archivo ya existe con la misma capacidad, se sigue usando tal cual; si no, se crea (o se sustituye) vacío
+        - Cada muestra escribe primero sus datos y después el total, así que quien lea el archivo desde otro proceso nunca ve una muestra a medias
+    '''
+
+    def __init__(self, ruta, capacidad = None, solo_lectura = False):
+        ''' Constructor de la clase:
+            - Abre el archivo dado o, si no existe o su capacidad no es la indicada, lo crea, salvo que se abra en modo de sólo lectura
+            - En modo de sólo lectura, la capacidad es la del archivo y no hace falta darla
+        '''
+
+        self._mapa = None                                                                   # Por si la apertura falla, para que el destructor no tenga nada que cerrar
+        self._numpy = {}
+        self._vistas = {}
+
+        if solo_lectura:
+            descriptor = os.open(ruta, os.O_RDONLY | os.O_CLOEXEC)
+
+        else:
+            if os.path.dirname(ruta):
+                os.makedirs(os.path.dirname(ruta), exist_ok = True)
+
+            descriptor = os.open(ruta, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+
+        try:
+            cabecera = os.pread(descriptor, CABECERA.size, 0)
+            firma, version, existente, _ = CABECERA.unpack(cabecera) if len(cabecera) == CABECERA.size else (None, None, None, None)
+
+            if firma == FIRMA and version == VERSION and (solo_lectura or existente == capacidad): # Si el archivo es un historial válido (y, para escribir, con la capacidad pedida), se conserva
+                capacidad = existente
+
+            elif solo_lectura:
+                raise ValueError(f'{ruta} no es un historial válido')
+
+            else:                                                                           # Si no, se crea vacío, con el tamaño definitivo desde el principio
+                os.ftruncate(descriptor, 0)
+                os.ftruncate(descriptor, TAMANYO_CABECERA + capacidad * sum(tamanyo for _, _, tamanyo in COLUMNAS))
+                os.pwrite(descriptor, CABECERA.pack(FIRMA, VERSION, capacidad, 0), 0)
+
+            self._mapa = mmap.mmap(descriptor, 0, access = mmap.ACCESS_READ if solo_lectura else mmap.ACCESS_WRITE)
+
+        finally:
+            os.close(descriptor)                                                            # La proyección no necesita el descriptor abierto
+
+        self.capacidad = capacidad
+        self.ruta = ruta
+
+        desplazamiento = TAMANYO_CABECERA
+
+        for nombre, formato, tamanyo in COLUMNAS:                                           # Vistas sobre cada columna de la proyección, sin copiarla
+            self._vistas[nombre] = memoryview(self._mapa)[desplazamiento:desplazamiento + capacidad * tamanyo].cast(formato)
+
+            if numpy is not None:
+                self._numpy[nombre] = numpy.frombuffer(self._mapa, numpy.dtype(formato), capacidad, desplazamiento)
+
+            desplazamiento += capacidad * tamanyo
+
+
+    def _tramos(self, desde = None, hasta = None):
+        ''' Devuelve los tramos (inicio y fin, en posiciones del búfer) con las muestras tomadas entre los instantes dados, de la más antigua a la más reciente
+            - Al dar la vuelta, el búfer son dos tramos ordenados por instante: del más antiguo al final y del principio al más reciente; en cada uno, la ventana se busca por bisección
+        '''
+
+        total = self.total()
+
+        if total <= self.capacidad:
+            tramos = ((0, total), )
+
+        else:
+            tramos = ((total % self.capacidad, self.capacidad), (0, total % self.capacidad))
+
+        instantes = self._vistas['instantes']
+        res = []
+
+        for inicio, fin in tramos:
+            if desde is not None:
+                inicio = bisect_left(instantes, desde, inicio, fin)
+
+            if hasta is not None:
+                fin = bisect_right(instantes, hasta, inicio, fin)
+
+            if inicio < fin:
+                res.append((inicio, fin))
+
+        return res
+
+
+    def anyadir(self, instante, temperatura, velocidad, estado):
+        ''' Añade una muestra, sustituyendo a la más antigua si el búfer está lleno
+        '''
+
+        total = self.total()
+        posicion = total % self.capacidad
+
+        self._vistas['instantes'][posicion] = instante
+        self._vistas['temperaturas'][posicion] = temperatura
+        self._vistas['velocidades'][posicion] = velocidad
+        self._vistas['estados'][posicion] = estado
+
+        struct.pack_into('<Q', self._mapa, POSICION_TOTAL, total + 1)                       # El total, lo último, da la muestra por escrita
+
+
+    def cerrar(self):
+        ''' Suelta las vistas y cierra la proyección, lo que deja en el archivo todo lo escrito
+        '''
+
+        if self._mapa is not None:
+            self._numpy.clear()
+
+            for vista in self._vistas.values():
+                vista.release()
+
+            self._vistas.clear()
+
+            self._mapa.close()
+
+            self._mapa = None
+
+
+    def estadisticas(self, desde = None, hasta = None, percentiles = PERCENTILES):
+        ''' Devuelve un resumen de las muestras tomadas entre los instantes dados (por defecto, todas):
+            - La cantidad de muestras, el instante de la primera y el de la última
+            - Para la temperatura y la velocidad, el mínimo, el máximo, la media y los percentiles indicados
+            - Cuántas muestras hay de cada etapa
+        '''
+
+        tramos = self._tramos(desde, hasta)
+        muestras = sum(fin - inicio for inicio, fin in tramos)
+
+        res = {
+                'muestras'      : muestras,
+                'desde'         : self._vistas['instantes'][tramos[0][0]] if tramos else None,
+                'hasta'         : self._vistas['instantes'][tramos[-1][1] - 1] if tramos else None,
+              }
+
+        for columna, clave in (('temperaturas', 'temperatura'), ('velocidades', 'velocidad')):
+            res[clave] = self._resumir(columna, tramos, percentiles) if tramos else None
+
+        estados = Counter()
+
+        for inicio, fin in tramos:
+            if numpy is not None:
+                estados.update(dict(enumerate(numpy.bincount(self._numpy['estados'][inicio:fin]).tolist())))
+
+            else:
+                estados.update(self._vistas['estados'][inicio:fin])
+
+        res['estados'] = {estado: cantidad for estado, cantidad in sorted(estados.items()) if cantidad}
+
+        return res
+
+
+    def _resumir(self, columna, tramos, percentiles):
+        ''' Devuelve el mínimo, el máximo, la media y los percentiles dados de una columna en los tramos indicados
+            - El mínimo, el máximo y la media se calculan sobre las vistas, sin copiar nada; los percentiles, sobre una copia ordenada de la ventana
+        '''
+
+        if numpy is not None:
+            segmentos = [self._numpy[columna][inicio:fin] for inicio, fin in tramos]
+
+            res = {
+                    'minima'    : float(min(segmento.min() for segmento in segmentos)),
+                    'maxima'    : float(max(segmento.max() for segmento in segmentos)),
+                    'media'     : float(sum(segmento.sum(dtype = numpy.float64) for segmento in segmentos) / sum(len(segmento) for segmento in segmentos)),
+                  }
+
+            ordenados = numpy.sort(numpy.concatenate(segmentos)) if percentiles else None
+
+        else:
+            segmentos = [self._vistas[columna][inicio:fin] for inicio, fin in tramos]
+
+            res = {
+                    'minima'    : min(min(segmento) for segmento in segmentos),
+                    'maxima'    : max(max(segmento) for segmento in segmentos),
+                    'media'     : sum(sum(segmento) for segmento in segmentos) / sum(len(segmento) for segmento in segmentos),
+                  }
+
+            ordenados = sorted(valor for segmento in segmentos for valor in segmento) if percentiles else None
+
+        for percentil in percentiles:
+            res['p' + str(percentil)] = float(_percentil(ordenados, percentil))
+
+        for clave in res:                                                                   # Las columnas se guardan en precisión simple, así que más decimales sólo serían ruido
+            res[clave] = round(res[clave], 3)
+
+        for segmento in segmentos:                                                          # Las vistas se sueltan ya, para que no impidan cerrar la proyección
+            if isinstance(segmento, memoryview):
+                segmento.release()
+
+        return res
+
+
+    def total(self):
+        ''' Devuelve la cantidad total de muestras escritas desde que se creó el archivo, incluidas las ya sustituidas
+        '''
+
+        return struct.unpack_from('<Q', self._mapa, POSICION_TOTAL)[0]
+
+
+    def __del__(self):
+        ''' Destructor de la clase:
+            - Cierra la proyección
+        '''
+
+        self.cerrar()
+
+
+def resumir(ruta, segundos = None, percentiles = PERCENTILES):
+    ''' Abre en modo de sólo lectura el historial dado y devuelve el resumen de los últimos segundos indicados (por defecto, de todo él)
+    '''
+
+    datos = historial(ruta, solo_lectura = True)
+
+    try:
+        return datos.estadisticas(time() - segundos if segundos else None, percentiles = percentiles)
+
+    finally:
+        datos.cerrar()
+
+
+def texto(resumen):
+    ''' Devuelve, en líneas legibles, un resumen como los de historial.estadisticas()
+    '''
+
+    if not(resumen['muestras']):
+        return ['Sin muestras en la ventana indicada']
+
+    lineas = [str(resumen['muestras']) + ' muestras, de ' + _fecha(resumen['desde']) + ' a ' + _fecha(resumen['hasta'])]
+
+    for clave, nombre, unidad, escala in (('temperatura', 'Temperatura', ' ºC', 1), ('velocidad', 'Ventilador', ' %', 100)):
+        lineas.append(nombre + ': ' + ', '.join(NOMBRES.get(estadistica, estadistica) + ' ' + format(valor * escala, '.1f') + unidad for estadistica, valor in resumen[clave].items()))
+
+    lineas.append('Etapas: ' + ', '.join(str(estado) + ': ' + str(cantidad) for estado, cantidad in resumen['estados'].items()))
+
+    return lineas
+
+
+def _fecha(instante):
+    ''' Devuelve un instante en formato legible, en hora local
+    '''
+
+    return strftime('%Y-%m-%d %H:%M:%S', localtime(instante))
+
+
+def main(argv):
+    try:
+        from config import temperatura_config as config                                     # Configuración
+
+    except ImportError:
+        print('Error: Archivo de configuración no encontrado', file = sys.stderr)
+        sys.exit(errno.ENOENT)
+
+    if not(config.HISTORIAL):
+        print('Error: Historial desactivado en la configuración', file = sys.stderr)
+        sys.exit(errno.ENOENT)
+
+    try:
+        resumen = resumir(config.HISTORIAL, float(argv[1]) if len(argv) > 1 else 3600)
+
+    except (OSError, ValueError) as e:
+        print('Error: Imposible leer el historial: ' + str(e), file = sys.stderr)
+        sys.exit(errno.EIO)
+
+    if len(argv) > 2 and argv[2] == 'json':
+        print(json.dumps(resumen, ensure_ascii = False))
+
+    else:
+        for linea in texto(resumen):
+            print(linea)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : llamadas.py
+# Description   : Módulo auxiliar que ejecuta, dentro del propio proceso, las llamadas asociadas a los puertos GPIO de entrada
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.0.2
+# Usage         : import llamadas | from llamadas import <clase>
+# Notes         : Cada llamada es un script en python del mismo directorio, que se carga una única vez y cuya función main() se ejecuta en un conjunto acotado de hilos
+#                 Así, cada flanco no tiene que lanzar una shell y un intérprete nuevos, ni volver a importar los módulos, ni bloquear al despachador de entradas
+#                 Si la cola de llamadas pendientes se llena, las nuevas se descartan (y se cuentan) en lugar de bloquear a quien las lanza
+
+
+DEBUG           = False
+
+
+import importlib.util                                                                       # Carga de módulos a partir de su ruta
+import os                                                                                   # Funcionalidades varias del sistema operativo
+import sys                                                                                  # Funcionalidades varias del sistema
+from queue import Empty, Full, Queue                                                        # Colas sincronizadas
+from threading import Lock, Thread                                                          # Capacidades multihilo
+from time import monotonic, perf_counter                                                    # Plazos y medición precisa de tiempos
+
+
+class ejecutor_llamadas(object):
+    ''' Clase que carga los módulos de las llamadas y ejecuta sus funciones main() en un conjunto acotado de hilos trabajadores
+    '''
+
+    def __init__(self, trabajadores = 2, capacidad = 16, directorio = None):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+            - "trabajadores" es la cantidad de hilos que ejecutarán llamadas a la vez
+            - "capacidad" es la cantidad máxima de llamadas pendientes
+            - "directorio" es el directorio de los scripts (por defecto, el de este módulo)
+        '''
+
+        self._cola                  = Queue(capacidad)
+        self._descartadas           = 0
+        self._detenido              = False                                                 # Tras detener(), los trabajadores terminan al sacar de la cola cualquier cosa, y no se aceptan más llamadas
+        self._directorio            = directorio or os.path.dirname(os.path.abspath(__file__))
+        self._estadisticas          = {}                                                    # Por llamada: [ejecuciones, fallos, tiempo total, tiempo máximo]
+        self._hilos                 = []
+        self._modulos               = {}
+        self._pendientes_maximo     = 0
+        self._semaforo              = Lock()                                                # Protege las estadísticas
+        self._semaforo_carga        = Lock()                                                # Protege la carga de módulos, que puede tardar, sin retener las estadísticas
+        self._trabajadores          = trabajadores
+
+
+    def _trabajar(self):
+        ''' Bucle de cada hilo trabajador: espera una llamada y la ejecuta
+        '''
+
+        while True:
+            archivo = self._cola.get()                                                      # Espera bloqueante: sin llamadas pendientes, el hilo no se despierta
+
+            if archivo is None or self._detenido:                                           # Marca de detención, o llamada encolada mientras se detenía
+                break
+
+            inicio = perf_counter()
+
+            try:
+                self.cargar(archivo).main([archivo])
+                correcto = True
+
+            except (Exception, SystemExit) as e:                                            # Un fallo (o un sys.exit()) en una llamada no debe detener al trabajador
+                correcto = isinstance(e, SystemExit) and not(e.code)                        # Salir con sys.exit() sin código de error es terminar correctamente, como lo era para el intérprete que antes se lanzaba
+
+                if not(correcto):
+                    print(f'Error: Fallo en la llamada {archivo}: {e!r}', file = sys.stderr)
+
+            duracion = perf_counter() - inicio
+
+            with self._semaforo:
+                estadisticas = self._estadisticas.setdefault(archivo, [0, 0, 0.0, 0.0])
+
+                estadisticas[0] += 1
+                estadisticas[1] += 0 if correcto else 1
+                estadisticas[2] += duracion
+                estadisticas[3] = max(estadisticas[3], duracion)
+
+
+    def cargar(self, archivo):
+        ''' Devuelve el módulo correspondiente al script dado, cargándolo sólo la primera vez
+            - Puede llamarse en el arranque para precargar las llamadas configuradas
+        '''
+
+        with self._semaforo_carga:
+            modulo = self._modulos.get(archivo)
+
+            if modulo is None:
+                especificacion = importlib.util.spec_from_file_location(os.path.splitext(archivo)[0], os.path.join(self._directorio, archivo))
+
+                if especificacion is None:
+                    raise ImportError('No se puede cargar ' + archivo)
+
+                modulo = importlib.util.module_from_spec(especificacion)
+                especificacion.loader.exec_module(modulo)
+
+                self._modulos[archivo] = modulo
+
+        return modulo
+
+
+    def detener(self, espera = None):
+        ''' Descarta las llamadas que aún no han empezado y espera (como mucho, los segundos dados en total) a que terminen las que están en curso
+            - Nunca se bloquea más allá de la espera, aunque se sigan lanzando llamadas mientras tanto o los trabajadores estén ocupados en llamadas largas
+        '''
+
+        self._detenido = True
+
+        while True:
+            try:
+                self._cola.get_nowait()
+
+            except Empty:
+                break
+
+        for _ in self._hilos:
+            try:
+                self._cola.put_nowait(None)
+
+            except Full:                                                                    # Si la cola se ha vuelto a llenar, cada trabajador terminará al sacar de ella la siguiente llamada
+                break
+
+        limite = None if espera is None else monotonic() + espera
+
+        for hilo in self._hilos:
+            hilo.join(None if limite is None else max(limite - monotonic(), 0))
+
+        self._hilos = []
+
+
+    def estadisticas(self):
+        ''' Devuelve las llamadas pendientes (ahora y como máximo), las descartadas y, por cada llamada, sus ejecuciones, fallos y duraciones media y máxima (en segundos)
+        '''
+
+        with self._semaforo:
+            return {
+                'pendientes'        : self._cola.qsize(),
+                'pendientes_maximo' : self._pendientes_maximo,
+                'descartadas'       : self._descartadas,
+                'llamadas'          : {
+                                        archivo: {
+                                            'ejecuciones'   : ejecuciones,
+                                            'fallos'        : fallos,
+                                            'tiempo_medio'  : total / ejecuciones,
+                                            'tiempo_maximo' : maximo,
+                                        }
+                                        for archivo, (ejecuciones, fallos, total, maximo) in self._estadisticas.items()
+                                      },
+            }
+
+
+    def iniciar(self):
+        ''' Arranca los hilos trabajadores
+        '''
+
+        self._detenido = False
+
+        while len(self._hilos) < self._trabajadores:
+            hilo = Thread(target = self._trabajar, daemon = True)
+            hilo.start()
+
+            self._hilos.append(hilo)
+
+
+    def lanzar(self, archivo):
+        ''' Encola una llamada sin esperar a que se ejecute
+            - Devuelve False si la cola está llena o el ejecutor se ha detenido, y la llamada se ha descartado
+        '''
+
+        if self._detenido:
+            return False
+
+        try:
+            self._cola.put_nowait(archivo)
+
+        except Full:
+            with self._semaforo:
+                self._descartadas += 1
+
+            if DEBUG:
+                print('Llamadas #', os.getpid(), "\tCola llena, se descarta la llamada ", archivo, sep = '')
+
+            return False
+
+        with self._semaforo:
+            self._pendientes_maximo = max(self._pendientes_maximo, self._cola.qsize())
+
+        return True
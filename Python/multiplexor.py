@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : multiplexor.py
+# Description   : Módulo auxiliar que implementa un servidor de sockets multiplexado, capaz de atender a varios clientes a la vez
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.4.3
+# Usage         : import multiplexor | from multiplexor import <clase>
+# Notes         : Se basa en el módulo "selectors", por lo que un único hilo atiende a todas las conexiones sin bloquearse en ninguna de ellas
+#                 El procesado de cada comando se delega en la función que se le indique, la cual recibirá la sesión y el comando
+#                 Los datos recibidos se separan en mensajes según el enmarcado de protocolo.py, respondiendo a cada uno en orden
+#                 Incluye un planificador de temporizadores (un montículo ordenado por plazo) cuyo vencimiento más próximo acota la espera del select()
+#                 Las sesiones suscritas reciben eventos a través de una cola acotada propia, que fusiona los eventos de una misma clave si el cliente no da abasto
+
+
+DEBUG           = False
+
+RETARDO_MAXIMO  = 86400 * 24                                                                # Retardo máximo (en segundos) de un temporizador, para que la espera del select() siempre sea representable (epoll la admite en milisegundos, con 32 bits)
+
+
+from collections import OrderedDict                                                         # Diccionarios ordenados
+import heapq                                                                                # Montículos (colas de prioridad)
+from itertools import count                                                                 # Contadores
+import os                                                                                   # Funcionalidades varias del sistema operativo
+import selectors                                                                            # Multiplexado de entrada / salida
+import socket                                                                               # Tratamiento de sockets
+import sys                                                                                  # Funcionalidades varias del sistema
+from threading import get_ident, Lock                                                       # Capacidades multihilo
+from time import monotonic                                                                  # Reloj monotónico, inmune a los cambios de hora
+
+import protocolo                                                                            # Enmarcado de mensajes
+
+
+class cola_eventos(object):
+    ''' Clase que contiene los eventos pendientes de envío a un suscriptor, como mucho uno por clave
+        - Un evento nuevo de una clave ya encolada sustituye al anterior, ya obsoleto
+        - Si la cola está llena, se descarta el evento más antiguo
+    '''
+
+    def __init__(self, capacidad):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self._capacidad     = capacidad
+        self._eventos       = OrderedDict()
+        self.descartados    = 0                                                             # Eventos descartados por falta de espacio
+        self.fusionados     = 0                                                             # Eventos sustituidos por otro más reciente de la misma clave
+
+
+    def __len__(self):
+        ''' Devuelve la cantidad de eventos pendientes
+        '''
+
+        return len(self._eventos)
+
+
+    def anyadir(self, clave, valor):
+        ''' Encola un evento, fusionándolo con el pendiente de la misma clave, si lo hay
+        '''
+
+        if clave in self._eventos:
+            self.fusionados += 1
+
+        elif len(self._eventos) >= self._capacidad:
+            self._eventos.popitem(last = False)
+
+            self.descartados += 1
+
+        self._eventos[clave] = valor
+
+
+    def extraer(self):
+        ''' Devuelve, en orden, todos los eventos pendientes como pares clave - valor y vacía la cola
+        '''
+
+        eventos = list(self._eventos.items())
+
+        self._eventos.clear()
+
+        return eventos
+
+
+class sesion(object):
+    ''' Clase que contiene el estado de cada una de las conexiones abiertas contra el servidor
+    '''
+
+    def __init__(self, sc, direccion, version_protocolo):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self.cerrar             = False                                                     # Se cerrará la conexión una vez vaciado el búfer de salida
+        self.direccion          = direccion
+        self.entrada            = protocolo.bufer_entrada()                                 # Búfer de entrada; el enmarcado se activará al negociar la versión del protocolo
+        self.eventos            = None                                                      # Cola de eventos, sólo si la sesión está suscrita
+        self.filtro             = None                                                      # Claves de los eventos a recibir (None para todas)
+        self.salida             = bytearray()                                               # Búfer de salida pendiente de envío
+        self.socket             = sc
+        self.version_protocolo  = version_protocolo                                         # Cada sesión negocia su propia versión del protocolo
+
+
+    def fileno(self):
+        ''' Observador del descriptor de archivo del socket de la sesión
+        '''
+
+        return self.socket.fileno()
+
+
+class servidor_multiplexado(object):
+    ''' Clase que atiende, en un único hilo, a todas las conexiones entrantes de un socket a la escucha
+    '''
+
+    def __init__(self, escucha, procesar, version_protocolo):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+            - Registra el socket a la escucha en el selector (pueden añadirse más con escuchar())
+            - Prepara el canal de "despertado" del bucle
+        '''
+
+        self._hilo              = None                                                      # Hilo que ejecuta el bucle, para saber si hay que despertarlo al programar un temporizador
+        self._pendientes        = set()                                                     # Sesiones suscritas con eventos por enviar
+        self._procesar          = procesar
+        self._salir             = False
+        self._secuencia         = count()                                                   # Desempate de temporizadores con el mismo plazo, para conservar el orden de programación
+        self._selector          = selectors.DefaultSelector()
+        self._semaforo          = Lock()                                                    # Los temporizadores y eventos pueden llegar desde otros hilos
+        self._sesiones          = {}
+        self._suscritas         = {}
+        self._temporizadores    = []                                                        # Montículo de temporizadores: [plazo, secuencia, función]
+        self._version_protocolo = version_protocolo
+
+        self.escuchar(escucha)
+
+        self._despertador, self._despertado = socket.socketpair()                           # Par de sockets para poder sacar al bucle del select() desde otro hilo
+        self._despertado.setblocking(False)
+        self._selector.register(self._despertado, selectors.EVENT_READ, self._vaciar_despertado)
+
+
+    def _aceptar(self, escucha, mascara):                                                   # @UnusedVariable
+        ''' Acepta una nueva conexión y le asocia una sesión
+        '''
+
+        try:
+            sc, direccion = escucha.accept()
+
+        except BlockingIOError:                                                             # Otro evento se ha adelantado y ya no hay conexión pendiente
+            return
+
+        sc.setblocking(False)
+
+        nueva_sesion = sesion(sc, direccion, self._version_protocolo)
+
+        self._sesiones[sc] = nueva_sesion
+        self._selector.register(sc, selectors.EVENT_READ, self._atender)
+
+        if DEBUG:
+            print('Padre #', os.getpid(), "\tNueva conexión desde ", direccion, ', hay ', len(self._sesiones), ' abiertas', sep = '')
+
+
+    def _atender(self, sc, mascara):
+        ''' Atiende los eventos de lectura y escritura de una sesión
+            - Si algo falla al atenderla, se cierra sólo esa sesión, sin detener el bucle que atiende a las demás
+        '''
+
+        actual = self._sesiones.get(sc)
+
+        if actual is None:                                                                  # La sesión ha podido cerrarse en un evento anterior de la misma tanda
+            return
+
+        try:
+            self._atender_sesion(actual, mascara)
+
+        except Exception as e:
+            print(f'Error: Fallo al atender la conexión desde {actual.direccion}: {e!r}', file = sys.stderr)
+
+            self._cerrar_sesion(actual)
+
+
+    def _atender_sesion(self, actual, mascara):
+        ''' Atiende los eventos de lectura y escritura de una sesión ya localizada
+        '''
+
+        sc = actual.socket
+
+        if mascara & selectors.EVENT_READ:
+            try:
+                datos = sc.recv(protocolo.TAMANYO_BUFER)
+
+            except BlockingIOError:
+                datos = None
+
+            except (ConnectionResetError, OSError):
+                datos = b''
+
+            if datos == b'':                                                                # El cliente ha cerrado la conexión
+                self._cerrar_sesion(actual)
+
+                return
+
+            elif datos:
+                self._recibir(actual, datos)
+
+        if mascara & selectors.EVENT_WRITE or actual.salida or actual.cerrar:
+            self._enviar(actual)
+
+
+    def _cerrar_sesion(self, actual):
+        ''' Cierra la conexión de una sesión y la olvida
+        '''
+
+        try:
+            self._selector.unregister(actual.socket)
+
+        except (KeyError, ValueError):
+            pass
+
+        self._sesiones.pop(actual.socket, None)
+
+        with self._semaforo:
+            self._suscritas.pop(actual.socket, None)
+            self._pendientes.discard(actual)
+
+        actual.socket.close()
+
+
+    def _enviar(self, actual):
+        ''' Envía lo que se pueda del búfer de salida de una sesión sin bloquearse
+        '''
+
+        if actual.salida:
+            try:
+                enviados = actual.socket.send(actual.salida)
+
+            except BlockingIOError:
+                enviados = 0
+
+            except (BrokenPipeError, ConnectionResetError, OSError):
+                self._cerrar_sesion(actual)
+
+                return
+
+            del actual.salida[:enviados]
+
+        if actual.salida:                                                                   # Si aún queda algo por enviar, se esperará a que el socket lo permita
+            self._selector.modify(actual.socket, selectors.EVENT_READ | selectors.EVENT_WRITE, self._atender)
+
+        elif actual.cerrar:
+            self._cerrar_sesion(actual)
+
+        else:
+            self._selector.modify(actual.socket, selectors.EVENT_READ, self._atender)
+
+
+    def _recibir(self, actual, datos):
+        ''' Procesa, en orden, todos los mensajes completos recibidos por una sesión, encolando sus respuestas
+        '''
+
+        if not(actual.entrada.anyadir(datos)):                                              # Si el cliente manda un mensaje desmesurado, se le desconecta
+            actual.cerrar = True
+
+            return
+
+        for comando in actual.entrada.mensajes():
+            comando = comando.lower()
+
+            if DEBUG:
+                print('Padre #', os.getpid(), "\tHe recibido el comando: ", comando, sep = '')
+
+            respuesta = self._procesar(actual, comando)
+
+            if respuesta is None:                                                           # Si el procesado indica que se debe desconectar
+                actual.cerrar = True
+
+                break
+
+            else:                                                                           # La respuesta se enmarca según el modo vigente tras procesar el comando (el saludo puede cambiarlo)
+                actual.salida += protocolo.enmarcar(respuesta, actual.entrada.enmarcado)
+
+
+    def _repartir_eventos(self):
+        ''' Pasa los eventos pendientes de cada sesión suscrita a su búfer de salida
+            - Sólo se hace con las sesiones cuyo búfer de salida esté vacío; mientras tanto, los eventos siguen fusionándose en su cola
+        '''
+
+        with self._semaforo:
+            if not(self._pendientes):
+                return
+
+            listas = [actual for actual in self._pendientes if not(actual.salida)]
+            repartos = [(actual, actual.eventos.extraer()) for actual in listas]
+
+            self._pendientes.difference_update(listas)
+
+        for actual, eventos in repartos:
+            actual.salida += protocolo.enmarcar(protocolo.codificar_evento(eventos))
+
+            self._enviar(actual)
+
+
+    def _vaciar_despertado(self, despertado, mascara):                                      # @UnusedVariable
+        ''' Descarta los bytes usados para despertar al bucle
+        '''
+
+        try:
+            despertado.recv(protocolo.TAMANYO_BUFER)
+
+        except BlockingIOError:
+            pass
+
+
+    def _vencer_temporizadores(self):
+        ''' Ejecuta los temporizadores vencidos y devuelve cuánto falta para el siguiente (None si no queda ninguno)
+        '''
+
+        while True:
+            with self._semaforo:
+                if not(self._temporizadores):
+                    return None
+
+                espera = self._temporizadores[0][0] - monotonic()
+
+                if espera > 0:                                                              # El más próximo aún no ha vencido
+                    return espera
+
+                _, _, funcion = heapq.heappop(self._temporizadores)
+
+            if funcion is not None:                                                         # Los temporizadores cancelados se descartan al llegar a la cima
+                try:
+                    funcion()
+
+                except Exception as e:                                                      # Un fallo en un temporizador no debe detener al bucle ni cerrar las conexiones
+                    print(f'Error: Fallo en el temporizador {getattr(funcion, "__qualname__", funcion)}: {e!r}', file = sys.stderr)
+
+
+    def bucle(self):
+        ''' Espera eventos en todos los sockets registrados y los atiende, hasta que se ordene su detención
+        '''
+
+        self._hilo = get_ident()
+
+        while not(self._salir):
+            espera = self._vencer_temporizadores()                                          # Sin temporizadores, la espera es indefinida
+
+            for clave, mascara in self._selector.select(espera):
+                clave.data(clave.fileobj, mascara)
+
+            self._repartir_eventos()
+
+        for actual in list(self._sesiones.values()):
+            self._cerrar_sesion(actual)
+
+
+    def cancelar(self, temporizador):
+        ''' Cancela un temporizador aún no vencido; se descartará cuando llegue a la cima del montículo
+        '''
+
+        with self._semaforo:
+            temporizador[2] = None
+
+
+    def despertar(self):
+        ''' Saca al bucle de la espera del select(); puede llamarse desde cualquier hilo
+        '''
+
+        try:
+            self._despertador.send(b'\0')
+
+        except (BlockingIOError, OSError):
+            pass
+
+
+    def detener(self):
+        ''' Ordena la detención del bucle
+        '''
+
+        self._salir = True
+
+        self.despertar()
+
+
+    def escuchar(self, escucha):
+        ''' Añade un socket a la escucha más (por ejemplo, uno de dominio UNIX junto al TCP) cuyas conexiones se atenderán igual que las del resto
+        '''
+
+        escucha.setblocking(False)
+
+        self._selector.register(escucha, selectors.EVENT_READ, self._aceptar)
+
+
+    def programar(self, retardo, funcion):
+        ''' Programa la ejecución de una función, dentro del bucle, pasados los segundos dados
+            - Devuelve el temporizador, que puede cancelarse con cancelar()
+            - Los retardos mayores que RETARDO_MAXIMO (o que no sean un número, como NaN) se acotan a éste
+        '''
+
+        if not(retardo <= RETARDO_MAXIMO):
+            retardo = RETARDO_MAXIMO
+
+        temporizador = [monotonic() + retardo, next(self._secuencia), funcion]
+
+        with self._semaforo:
+            heapq.heappush(self._temporizadores, temporizador)
+
+            primero = self._temporizadores[0] is temporizador
+
+        if primero and get_ident() != self._hilo:                                           # Si adelanta la próxima espera y se programa desde otro hilo, hay que recalcularla
+            self.despertar()
+
+        return temporizador
+
+
+    def publicar(self, clave, valor):
+        ''' Encola un evento para todas las sesiones suscritas a su clave; puede llamarse desde cualquier hilo
+        '''
+
+        with self._semaforo:
+            for actual in self._suscritas.values():
+                if actual.filtro is None or clave in actual.filtro:
+                    actual.eventos.anyadir(clave, valor)
+
+                    self._pendientes.add(actual)
+
+            avisar = bool(self._pendientes)
+
+        if avisar and get_ident() != self._hilo:                                            # Desde otro hilo, hay que sacar al bucle de su espera para que los reparta
+            self.despertar()
+
+
+    def sesiones(self):
+        ''' Observador de la cantidad de sesiones abiertas
+        '''
+
+        return len(self._sesiones)
+
+
+    def suscribir(self, actual, filtro, capacidad, iniciales = ()):
+        ''' Suscribe una sesión a los eventos de las claves dadas (None para todas), con una cola de la capacidad dada
+            - Los eventos iniciales, si los hay, se encolan sólo para esta sesión
+        '''
+
+        with self._semaforo:
+            if actual.eventos is None:
+                actual.eventos = cola_eventos(capacidad)
+
+            actual.filtro = filtro
+
+            self._suscritas[actual.socket] = actual
+
+            for clave, valor in iniciales:
+                actual.eventos.anyadir(clave, valor)
+
+            if actual.eventos:
+                self._pendientes.add(actual)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : protocolo.py
+# Description   : Módulo auxiliar con el enmarcado de mensajes del protocolo de domótica, común al cliente y al servidor
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.3.1
+# Usage         : import protocolo | from protocolo import <clase>
+# Notes         : A partir de la versión 1.2 del protocolo, cada mensaje termina en un salto de línea, lo que permite mandar varios comandos de una vez
+#                 Hasta entonces, cada lectura del socket se consideraba un mensaje completo, por lo que se mantiene ese modo para los clientes antiguos
+#                 Los comandos se despachan a través de una tabla de órdenes indexada por verbo, sin evaluar código en ningún momento
+#                 A partir de la versión 1.5, el servidor puede mandar, sin petición previa, mensajes de evento a las conexiones suscritas
+#                 A partir de la versión 1.6, el comando "historial [segundos]" devuelve, codificado en JSON, el resumen del historial de temperatura y ventilador
+
+
+EVENTO              = 'evento: '                                                            # Prefijo de los mensajes de evento, para distinguirlos de las respuestas
+LONGITUD_MAXIMA     = 65536                                                                 # Longitud máxima de un mensaje aún incompleto, para evitar que un cliente agote la memoria
+SEPARADOR           = b'\n'                                                                 # Terminador de cada mensaje enmarcado
+TAMANYO_BUFER       = 4096                                                                  # Cantidad máxima de bytes leídos en cada recepción
+VERSION_ENMARCADO   = 1.2                                                                   # Primera versión del protocolo que enmarca los mensajes
+VERSION_EVENTOS     = 1.5                                                                   # Primera versión del protocolo con suscripciones a eventos
+
+
+def codificar_evento(cambios):
+    ''' Devuelve el mensaje de evento correspondiente a una serie de cambios, dados como pares puerto - estado
+        - Por ejemplo: "evento: 4:1 23:0"
+    '''
+
+    return EVENTO + ' '.join(str(clave) + ':' + str(valor) for clave, valor in cambios)
+
+
+def decodificar_evento(mensaje):
+    ''' Devuelve la lista de pares puerto - estado de un mensaje de evento o False si el mensaje no es un evento válido
+    '''
+
+    if mensaje[:len(EVENTO)] != EVENTO:
+        return False
+
+    try:
+        return [tuple(int(parte) for parte in cambio.split(':')) for cambio in mensaje[len(EVENTO):].split()]
+
+    except ValueError:
+        return False
+
+
+def enmarcar(mensaje, enmarcado = True):
+    ''' Codifica un mensaje para su envío, añadiéndole el terminador si se está usando el enmarcado
+    '''
+
+    return mensaje.encode('utf_8') + SEPARADOR if enmarcado else mensaje.encode('utf_8')
+
+
+class bufer_entrada(object):
+    ''' Clase que acumula los datos recibidos por un socket y los separa en mensajes
+    '''
+
+    def __init__(self, enmarcado = False):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self._datos     = bytearray()
+        self.enmarcado  = enmarcado
+
+
+    def anyadir(self, datos):
+        ''' Añade al búfer los datos recibidos
+            - Devuelve False si se ha superado la longitud máxima sin recibir un mensaje completo
+        '''
+
+        self._datos += datos
+
+        return len(self._datos) <= LONGITUD_MAXIMA or SEPARADOR in self._datos
+
+
+    def mensaje(self):
+        ''' Extrae y devuelve, decodificado, el siguiente mensaje completo del búfer o None si no lo hay
+            - En modo enmarcado, sólo se consideran completos los mensajes terminados en el separador
+            - En modo no enmarcado, todo lo recibido se considera un mensaje (aunque se separa por líneas si las hubiera)
+            - Los bytes que no sean UTF-8 válido se sustituyen por "�", para que el mensaje se responda como incorrecto en vez de tumbar a quien lo lea
+        '''
+
+        posicion = self._datos.find(SEPARADOR)
+
+        if posicion >= 0:                                                                   # Si hay un mensaje terminado
+            mensaje = bytes(self._datos[:posicion])                                         #     Se extrae
+            del self._datos[:posicion + 1]                                                  #     Y se descarta del búfer, junto con su terminador
+
+        elif self._datos and not(self.enmarcado):                                           # Si no lo hay, pero no se está usando el enmarcado
+            mensaje = bytes(self._datos)                                                    #     Todo lo recibido es el mensaje
+            self._datos.clear()
+
+        else:                                                                               # Si no, habrá que esperar a recibir más datos
+            return None
+
+        return mensaje.decode('utf_8', errors = 'replace')
+
+
+    def mensajes(self):
+        ''' Generador de todos los mensajes completos presentes en el búfer
+            - El modo de enmarcado se comprueba en cada vuelta, ya que puede cambiar al negociar la versión del protocolo
+        '''
+
+        mensaje = self.mensaje()
+
+        while mensaje is not None:
+            yield mensaje
+
+            mensaje = self.mensaje()
+
+
+    def vaciar(self):
+        ''' Descarta todos los datos pendientes y vuelve al modo no enmarcado
+        '''
+
+        self._datos.clear()
+
+        self.enmarcado = False
+
+
+class orden(object):
+    ''' Clase que describe un comando del protocolo: versión mínima, tipos de sus parámetros, manejador y formato de su respuesta
+    '''
+
+    __slots__ = ('formato', 'manejador', 'obligatorios', 'repetir', 'tipos', 'verbo', 'version')
+
+    def __init__(self, verbo, version, manejador, tipos, obligatorios, formato, repetir = False):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self.formato        = formato
+        self.manejador      = manejador
+        self.obligatorios   = obligatorios
+        self.repetir        = repetir                                                       # Si es cierto, el último tipo se repite para todos los parámetros sobrantes
+        self.tipos          = tipos
+        self.verbo          = verbo
+        self.version        = version
+
+
+class tabla_ordenes(object):
+    ''' Clase que contiene el registro de comandos del protocolo y los analiza y despacha
+    '''
+
+    def __init__(self):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self._ordenes = {}
+
+
+    def analizar(self, comando, version):
+        ''' Analiza un comando para una versión del protocolo dada
+            - Si el verbo está registrado, disponible en dicha versión y sus parámetros son correctos, devuelve la orden y los parámetros ya convertidos
+            - Si no, devuelve False
+        '''
+
+        partes = comando.split()
+
+        if not(partes):                                                                     # Un comando vacío no es válido
+            return False
+
+        actual = self._ordenes.get(partes[0])
+
+        if actual is None or version < actual.version:                                      # Si el verbo no existe o no está disponible en esta versión
+            return False
+
+        parametros = partes[1:]
+
+        if len(parametros) < actual.obligatorios or (len(parametros) > len(actual.tipos) and not(actual.repetir)):  # Si sobran o faltan parámetros
+            return False
+
+        tipos = actual.tipos
+
+        if len(parametros) > len(tipos):                                                    # Si el último tipo se repite, se completan los tipos
+            tipos = tipos + tipos[-1:] * (len(parametros) - len(tipos))
+
+        try:                                                                                # Bloque try
+            parametros = [tipo(parametro) for tipo, parametro in zip(tipos, parametros)]    # Se convierte cada parámetro a su tipo
+
+        except ValueError:                                                                  # Si algún parámetro no es del tipo esperado
+            return False
+
+        return actual, parametros
+
+
+    def despachar(self, sesion, comando):
+        ''' Analiza y ejecuta un comando para una sesión dada
+            - Devuelve la respuesta, ya formateada, del manejador correspondiente
+            - Devuelve False si el comando es incorrecto o no está disponible en la versión del protocolo de la sesión
+        '''
+
+        analizado = self.analizar(comando, sesion.version_protocolo)
+
+        if not(analizado):
+            return False
+
+        actual, parametros = analizado
+
+        respuesta = actual.manejador(sesion, *parametros)
+
+        return actual.formato(respuesta) if actual.formato else respuesta
+
+
+    def registrar(self, verbo, version, manejador, tipos = (), obligatorios = None, formato = None, repetir = False):
+        ''' Registra un comando:
+            - "verbo": nombre del comando
+            - "version": versión mínima del protocolo en la que está disponible
+            - "manejador": función a la que se llamará con la sesión y los parámetros ya convertidos
+            - "tipos": tipo (función de conversión) de cada parámetro
+            - "obligatorios": cantidad de parámetros obligatorios (por defecto, todos)
+            - "formato": función que convierte el retorno del manejador en la respuesta (por defecto, se devuelve tal cual)
+            - "repetir": si es cierto, el comando admite cualquier cantidad de parámetros adicionales del último tipo
+        '''
+
+        self._ordenes[verbo] = orden(verbo, version, manejador, tuple(tipos), len(tipos) if obligatorios is None else obligatorios, formato, repetir)
+
+
+    def verbos(self, version):
+        ''' Devuelve, ordenados, los verbos disponibles en una versión del protocolo dada
+        '''
+
+        return sorted(verbo for verbo, actual in self._ordenes.items() if version >= actual.version)
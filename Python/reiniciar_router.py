@@ -5,12 +5,14 @@
 # Title         : reiniciar_router.py
 # Description   : Sistema que comprueba si hay acceso a Internet. Si no, manda una señal en un puerto GPIO determinado
 # Author        : Veltys
-# Date          : 2019-11-22
-# Version       : 2.2.5
+# Date          : 2026-10-18
+# Version       : 2.6.0
 # Usage         : python3 reiniciar_router.py
 # Notes         : La idea es conectar un relé a este GPIO y al mismo la alimentación del sistema de acceso a Internet
 #                 Mandándole la señal "SIGUSR1", el sistema pasa a "modo test", lo cual enciende todos los leds, para comprobar su funcionamiento
 #                 Mandándole la señal "SIGUSR2", el sistema pasa a "modo apagado", lo cual apaga todos los leds hasta que esta misma señal sea recibida de nuevo
+#                 Mandándole la señal "SIGHUP", el sistema recarga la configuración sin reiniciarse; como se conecta al servidor en cada comprobación, los cambios se aplican en la siguiente
+#                 Su bucle es una corrutina (comun.app_asincrona), por lo que puede compartir un bucle de eventos con otros sistemas; la comprobación de Internet, que es bloqueante, se hace en un hilo aparte
 
 
 DEBUG           = False
@@ -19,9 +21,7 @@ DEBUG_REMOTO    = False
 
 import errno                                                                                # Códigos de error
 import os                                                                                   # Funcionalidades varias del sistema operativo
-import socket                                                                               # Tratamiento de sockets
 import sys                                                                                  # Funcionalidades varias del sistema
-from time import sleep                                                                      # Gestión de pausas
 
 import comun                                                                                # Funciones comunes a varios sistemas
 from internet import hay_internet                                                           # Módulo propio de comprobación de Internet
@@ -40,56 +40,48 @@ except ImportError:
     sys.exit(errno.ENOENT)
 
 
-class reiniciar_router(comun.app):
+class reiniciar_router(comun.app_asincrona):
     ''' Clase del sistema que comprueba si hay acceso a Internet
     '''
 
     def __init__(self, config, nombre):
         ''' Constructor de la clase:
             - Llama al constructor de la clase padre
-            - Inicializa el socket
         '''
 
         super().__init__(config, nombre)
 
-        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
-
-    def bucle(self):
-        ''' Realiza en bucle las tareas asignadas a este sistema
+    async def _comprobar(self):
+        ''' Comprueba si hay Internet y, si no, reinicia el router
+            - Devuelve, si ha hecho falta reiniciarlo, el tiempo hasta la siguiente comprobación, que será antes que la habitual
         '''
 
-        try:
-            if self._conectar(False):                                                       # Se conecta al servidor de domótica y se comprueba si se está conectado, si sí:
-                for puerto in self._config.PUERTOS:                                         #     Se recorre la lista de puertos
-                    self._enviar_y_recibir('apagar ' + str(puerto))                         #         Se apaga cada uno de los puertos
+        if await self._bucle_eventos.run_in_executor(None, hay_internet):                   # Si hay Internet, se esperará el periodo habitual para hacer la próxima comprobación
+            return None
 
-                self._desconectar()                                                         #     Se desconecta del servidor de domótica
+        if await self._conectar(False):                                                     # Si no, se conecta al servidor de domótica y se comprueba si se está conectado, si sí:
+            await self._enviar_y_recibir_varios(['encender ' + str(puerto) for puerto in self._config.PUERTOS])  #     Se encienden todos los puertos de una sola vez
 
-            sleep(self._config.PAUSA * 4)                                                   # Es necesario una pausa adicional, ya que al arrancar es posible que este script se ejecute antes de que haya red y no sería deseable que se reinicie el router "porque sí"
+            await self._esperar(self._config.PAUSA)                                         #     Se espera la pausa programada
 
-            while True:                                                                     # Se ejecutará siempre, ya que las condiciones de parada son externas
-                if hay_internet():                                                          #     Si hay Internet, se esperará para hacer la próxima comprobación
-                    sleep(self._config.PAUSA * 60)
+            await self._enviar_y_recibir_varios(['apagar ' + str(puerto) for puerto in self._config.PUERTOS])    #     Se apagan todos los puertos de una sola vez
 
-                else:                                                                       #     Si no
-                    if self._conectar(False):                                               #         Se conecta al servidor de domótica y se comprueba si se está conectado, si sí:
-                        for puerto in self._config.PUERTOS:                                 #             Se recorre la lista de puertos GPIO
-                            self._enviar_y_recibir('encender ' + str(puerto))               #                 Se enciende cada uno de los puertos
+            self._desconectar()                                                             #     Se desconecta del servidor de domótica
 
-                        sleep(self._config.PAUSA)                                           #             Se espera la pausa programada
+        return self._config.PAUSA * 12                                                      # Se espera a que se haya levantado la conexión y se volverá a comprobar
 
-                        for puerto in self._config.PUERTOS:                                 #             Se recorre la lista de puertos GPIO
-                            self._enviar_y_recibir('apagar ' + str(puerto))                 #                 Se apaga cada uno de los puertos
 
-                        self._desconectar()                                                 #             Se desconecta del servidor de domótica
+    async def bucle(self):
+        ''' Realiza periódicamente, por plazos, las tareas asignadas a este sistema
+        '''
 
-                    sleep(self._config.PAUSA * 12)                                          #         Al acabar, se espera a que se haya levantado la conexión y se volverá a comprobar
+        if await self._conectar(False):                                                     # Se conecta al servidor de domótica y se comprueba si se está conectado, si sí:
+            await self._enviar_y_recibir_varios(['apagar ' + str(puerto) for puerto in self._config.PUERTOS])    #     Se apagan todos los puertos de una sola vez
 
-        except KeyboardInterrupt:
-            self.cerrar()
+            self._desconectar()                                                             #     Se desconecta del servidor de domótica
 
-            return
+        await self._periodico(self._comprobar, lambda: self._config.PAUSA * 60, inicio = self._config.PAUSA * 4)  # La primera comprobación se retrasa, ya que al arrancar es posible que este script se ejecute antes de que haya red y no sería deseable que se reinicie el router "porque sí"
 
 
     def __del__(self):
@@ -111,7 +103,7 @@ def main(argv):
     err = app.arranque()
 
     if err == 0:
-        app.bucle()
+        app.ejecutar()
 
     else:
         sys.exit(err)
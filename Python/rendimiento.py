@@ -0,0 +1,1576 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : rendimiento.py
+# Description   : Pruebas de rendimiento (benchmarks) de los distintos sistemas
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.17.0
+# Usage         : python3 rendimiento.py <prueba> [parámetros]
+# Notes         : Sin parámetros, muestra la lista de pruebas disponibles
+#                 Las pruebas no necesitan ejecutarse en una Raspberry Pi, ya que usan el controlador simulado de los puertos GPIO (hardware.py)
+
+
+import asyncio                                                                              # Bucle de eventos y corrutinas
+import errno                                                                                # Códigos de error
+from functools import partial                                                               # Funciones parcialmente aplicadas
+from math import ceil                                                                       # Redondeo hacia arriba
+import os                                                                                   # Funcionalidades varias del sistema operativo
+from random import Random, uniform                                                          # Números aleatorios
+import socket                                                                               # Tratamiento de sockets
+from subprocess import call, run                                                            # Lanzamiento de nuevos procesos
+import sys                                                                                  # Funcionalidades varias del sistema
+import tracemalloc                                                                          # Medición de la memoria reservada
+from tempfile import TemporaryDirectory                                                     # Directorios temporales
+from threading import Event, Lock, Thread                                                   # Capacidades multihilo
+from time import monotonic, perf_counter, process_time, sleep                               # Medición precisa de tiempos (y de CPU) y pausas
+
+import entradas                                                                             # Atención por interrupciones de los puertos GPIO de entrada
+import hardware                                                                             # Acceso a los pines GPIO, a través del controlador configurado
+import llamadas                                                                             # Ejecución de las llamadas asociadas a las entradas
+import multiplexor                                                                          # Servidor de sockets multiplexado
+import protocolo                                                                            # Enmarcado de mensajes
+
+
+def _cliente_carga(puerto, comandos, pausa, tiempos, orden = b'estado 4'):
+    ''' Cliente de carga: conecta, manda una serie de comandos esperando cada respuesta (y la pausa dada entre ellos) y desconecta
+    '''
+
+    inicio = perf_counter()
+
+    sc = socket.create_connection(('127.0.0.1', puerto))
+
+    for _ in range(comandos):
+        sc.send(orden)
+        sc.recv(1024)
+
+        if pausa:                                                                           # Simula el tiempo que un cliente real tarda entre comando y comando
+            sleep(pausa)
+
+    sc.sendall(b'desconectar')
+    sc.close()
+
+    tiempos.append(perf_counter() - inicio)
+
+
+def _procesar_eco(sesion, comando):                                                         # @UnusedVariable
+    ''' Procesado mínimo de comandos, para medir únicamente el coste del servidor
+    '''
+
+    return None if comando[0:11] == 'desconectar' else 'info: 1'
+
+
+def _procesar_eco_enmarcado(sesion, comando):
+    ''' Procesado mínimo de comandos que, como haría el saludo de la versión 1.2, activa el enmarcado de la sesión
+    '''
+
+    sesion.entrada.enmarcado = True
+
+    return _procesar_eco(sesion, comando)
+
+
+def _servidor_serie(escucha):
+    ''' Réplica del bucle original de domotica_servidor: una única conexión atendida cada vez
+    '''
+
+    while True:
+        try:
+            sc, _ = escucha.accept()
+
+        except OSError:                                                                     # El socket a la escucha ha sido cerrado, fin de la prueba
+            return
+
+        comando = sc.recv(1024).decode('utf_8').lower()
+
+        while comando[0:11] != 'desconectar' and comando != '':
+            sc.send(_procesar_eco(None, comando).encode('utf_8'))
+
+            comando = sc.recv(1024).decode('utf_8').lower()
+
+        sc.close()
+
+
+class _salidas_semaforo_global(object):
+    ''' Réplica del acceso original a las salidas de domotica_servidor: un único semáforo para todas las escrituras y lecturas del puerto en cada consulta
+    '''
+
+    def __init__(self, gpio):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+        '''
+
+        self._gpio      = gpio
+        self._semaforo  = Lock()
+
+
+    def escribir(self, canal, nivel):
+        ''' Establece el nivel de un puerto, con el semáforo global
+        '''
+
+        with self._semaforo:
+            self._gpio.output(canal, nivel)
+
+
+    def leer(self, canal):
+        ''' Lee el nivel de un puerto
+        '''
+
+        return self._gpio.input(canal)
+
+
+def _lanzar_clientes(puerto, clientes, comandos, pausa, orden = b'estado 4'):
+    ''' Lanza a la vez todos los clientes de carga y devuelve el tiempo total y los tiempos individuales
+    '''
+
+    tiempos = []
+    hilos = [Thread(target = _cliente_carga, args = (puerto, comandos, pausa, tiempos, orden)) for _ in range(clientes)]
+
+    inicio = perf_counter()
+
+    for hilo in hilos:
+        hilo.start()
+
+    for hilo in hilos:
+        hilo.join()
+
+    return perf_counter() - inicio, tiempos
+
+
+def prueba_servidor(argv):
+    ''' Compara el rendimiento del bucle serie original frente al servidor multiplexado
+        - Parámetros opcionales: cantidad de clientes simultáneos, de comandos por cliente y pausa (en ms) entre comandos
+    '''
+
+    clientes = int(argv[0]) if len(argv) > 0 else 100
+    comandos = int(argv[1]) if len(argv) > 1 else 20
+    pausa    = float(argv[2]) / 1000 if len(argv) > 2 else 0.002
+
+    print(f'Servidor: {clientes} clientes simultáneos, {comandos} comandos por cliente, {pausa * 1000:.1f} ms entre comandos')
+
+    for nombre in ('serie', 'multiplexado'):
+        escucha = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        escucha.bind(('127.0.0.1', 0))
+
+        escucha.listen(socket.SOMAXCONN)                                                    # El bucle original usaba listen(1), lo cual añadiría además esperas de retransmisión de SYN
+
+        if nombre == 'serie':
+            servidor = Thread(target = _servidor_serie, args = (escucha, ), daemon = True)
+
+        else:
+            multiplexado = multiplexor.servidor_multiplexado(escucha, _procesar_eco, 1.1)
+            servidor = Thread(target = multiplexado.bucle, daemon = True)
+
+        servidor.start()
+
+        total, tiempos = _lanzar_clientes(escucha.getsockname()[1], clientes, comandos, pausa)
+
+        if nombre == 'serie':
+            escucha.close()
+
+        else:
+            multiplexado.detener()
+
+        servidor.join(1)
+
+        tiempos.sort()
+
+        print(f"\t{nombre}:\t{clientes * comandos / total:10.0f} comandos/s\tmediana por cliente: {tiempos[len(tiempos) // 2] * 1000:8.2f} ms\tpeor: {tiempos[-1] * 1000:8.2f} ms")
+
+
+class _objetivo_despacho(object):
+    ''' Clase con los mismos métodos que el servidor, pero sin tocar los puertos GPIO, para medir sólo el coste del despacho
+    '''
+
+    def __init__(self):
+        ''' Constructor de la clase: hace las veces de sesión, con su versión del protocolo
+        '''
+
+        self.version_protocolo = 1.3
+
+
+    def apagar(self, gpio):                                                                 # @UnusedVariable
+        ''' Simula el apagado de un puerto GPIO
+        '''
+
+        return True
+
+
+    def describir(self, gpio):
+        ''' Simula la descripción de un puerto GPIO
+        '''
+
+        return f'Relé {gpio}'
+
+
+    def estado(self, gpio):                                                                 # @UnusedVariable
+        ''' Simula el estado de un puerto GPIO
+        '''
+
+        return 0
+
+
+    def _despacho_original(self, comando):
+        ''' Réplica del análisis original de domotica_servidor: comparaciones de subcadenas y eval()
+        '''
+
+        if (self.version_protocolo >= 1.0 and comando != 'apagar'       and comando[:6] == 'apagar'     and comando[6] == ' ' and comando[ 7:] != '') \
+        or (self.version_protocolo >= 1.0 and comando != 'conmutar'     and comando[:8] == 'conmutar'   and comando[8] == ' ' and comando[ 9:] != '') \
+        or (self.version_protocolo >= 1.1 and comando != 'describir'    and comando[:9] == 'describir'  and comando[9] == ' ' and comando[10:] != '') \
+        or (self.version_protocolo >= 1.0 and comando != 'encender'     and comando[:8] == 'encender'   and comando[8] == ' ' and comando[ 9:] != '') \
+        or (self.version_protocolo >= 1.0 and comando != 'estado'       and comando[:6] == 'estado'     and comando[6] == ' ' and comando[ 7:] != ''):
+            funcion, params = comando.split(' ', 1)
+
+            respuesta = eval('self.' + funcion + '(' + params + ')')
+
+            if comando[:6] != 'estado' and comando[:9] != 'describir' and respuesta:
+                return 'ok: ejecutado'
+
+            elif (comando[:6] == 'estado' and respuesta != -1) or (comando[0:9] == 'describir' and respuesta):
+                return 'info: ' + str(respuesta)
+
+            else:
+                return 'err: no ejecutado, puerto incorrecto o no encontrado'
+
+        else:
+            return 'err: no ejecutado, comando incorrecto'
+
+
+def prueba_despacho(argv):
+    ''' Compara los comandos analizados y despachados por segundo con eval() frente a la tabla de órdenes
+        - Parámetro opcional: cantidad de comandos
+    '''
+
+    cantidad = int(argv[0]) if argv else 200000
+
+    objetivo = _objetivo_despacho()
+
+    ordenes = protocolo.tabla_ordenes()
+    ordenes.registrar('apagar',    1.0, lambda sesion, gpio: objetivo.apagar(gpio),    (int, ), formato = lambda respuesta: 'ok: ejecutado' if respuesta else 'err')
+    ordenes.registrar('describir', 1.1, lambda sesion, gpio: objetivo.describir(gpio), (int, ), formato = lambda respuesta: 'info: ' + str(respuesta))
+    ordenes.registrar('estado',    1.0, lambda sesion, gpio: objetivo.estado(gpio),    (int, ), formato = lambda respuesta: 'info: ' + str(respuesta))
+
+    comandos = ['estado 4', 'apagar 23', 'describir 27', 'estado 15']
+    comandos = [comandos[i % len(comandos)] for i in range(cantidad)]
+
+    print(f'Despacho: {cantidad} comandos')
+
+    inicio = perf_counter()
+
+    for comando in comandos:
+        objetivo._despacho_original(comando)
+
+    original = perf_counter() - inicio
+
+    inicio = perf_counter()
+
+    for comando in comandos:
+        ordenes.despachar(objetivo, comando)
+
+    tabla = perf_counter() - inicio
+
+    print(f"\teval():\t\t{cantidad / original:12.0f} comandos/s")
+    print(f"\ttabla:\t\t{cantidad / tabla:12.0f} comandos/s\t(x{original / tabla:.1f})")
+
+
+def _sondeo_original(gpio, canal, pausa, atendido, despertares, parar):
+    ''' Réplica del bucle original de los hijos de domotica_servidor: consulta event_detected() y duerme la pausa configurada
+    '''
+
+    while not(parar.is_set()):
+        despertares[canal] += 1
+
+        if gpio.event_detected(canal):
+            atendido.set()
+
+        sleep(pausa)
+
+
+def _pulsar(gpio, canales, pulsaciones, pausa, atendido):
+    ''' Simula pulsaciones en momentos aleatorios y devuelve, ordenadas, las latencias entre cada flanco y su acción
+    '''
+
+    latencias = []
+
+    for i in range(pulsaciones):
+        sleep(uniform(0, pausa))                                                            # La fase respecto al sondeo es aleatoria, como la de una pulsación real
+
+        atendido.clear()
+
+        inicio = perf_counter()
+        gpio.flanco(canales[i % len(canales)], 1)
+        atendido.wait(pausa * 4)
+
+        latencias.append(perf_counter() - inicio)
+
+        atendido.clear()
+        gpio.flanco(canales[i % len(canales)], 0)                                           # La suelta no provoca acción, pero sí un flanco más
+
+        atendido.wait(pausa * 4)                                                            # En el sondeo, la suelta también se detecta
+
+    latencias.sort()
+
+    return latencias
+
+
+def prueba_entradas(argv):
+    ''' Compara la latencia pulsación-acción y los despertares por segundo del sondeo original frente al despachador por interrupciones
+        - Parámetros opcionales: cantidad de pulsaciones, cantidad de entradas y pausa de sondeo (en segundos)
+    '''
+
+    pulsaciones = int(argv[0]) if len(argv) > 0 else 20
+    cantidad = int(argv[1]) if len(argv) > 1 else 4
+    pausa = float(argv[2]) if len(argv) > 2 else 0.5
+
+    reposo = 2.0                                                                            # Tiempo sin pulsaciones durante el que se cuentan los despertares
+    canales = list(range(cantidad))
+
+    print(f'Entradas: {pulsaciones} pulsaciones, {cantidad} entradas, sondeo cada {pausa} s')
+
+    for nombre in ('sondeo', 'interrupciones'):
+        gpio = hardware.controlador_simulado()
+        atendido = Event()
+
+        if nombre == 'sondeo':
+            despertares = dict.fromkeys(canales, 0)
+            parar = Event()
+
+            for canal in canales:                                                           # Como en el original, detección de flancos sin retrollamada
+                gpio.add_event_detect(canal, gpio.BOTH)
+
+            hilos = [Thread(target = _sondeo_original, args = (gpio, canal, pausa, atendido, despertares, parar), daemon = True) for canal in canales]
+
+            for hilo in hilos:
+                hilo.start()
+
+            total_despertares = lambda: sum(despertares.values())
+
+        else:
+            despachador = entradas.despachador_entradas(gpio)
+
+            for canal in canales:
+                despachador.registrar(canal, lambda canal, nivel: atendido.set())
+
+            despachador.iniciar()
+
+            total_despertares = lambda: despachador.estadisticas()['despertares']
+
+        antes = total_despertares()
+        sleep(reposo)
+        en_reposo = (total_despertares() - antes) / reposo
+
+        latencias = _pulsar(gpio, canales, pulsaciones, pausa, atendido)
+
+        if nombre == 'sondeo':
+            parar.set()
+
+            for hilo in hilos:
+                hilo.join()
+
+        else:
+            despachador.detener()
+
+        print(f"	{nombre}:	mediana: {latencias[len(latencias) // 2] * 1000:9.3f} ms	peor: {latencias[-1] * 1000:9.3f} ms	en reposo: {en_reposo:6.1f} despertares/s")
+
+
+def prueba_escrituras(argv):
+    ''' Compara las escrituras en los puertos de las vueltas de cpu y temperatura tal y como se hacían (todas las salidas en cada vuelta) frente al gestor de salidas, que suprime las que no cambian nada
+        - Parámetros opcionales: cantidad de vueltas, retardo (en µs) de cada acceso al hardware y margen (en puntos porcentuales) de las salidas PWM
+    '''
+
+    import comun                                                                            # Gestor de salidas
+    import config                                                                           # Curva, umbrales y colores de temperatura
+    import ventilador                                                                       # Velocidad del ventilador y etapas de temperatura
+
+    vueltas = int(argv[0]) if len(argv) > 0 else 3600
+    retardo = float(argv[1]) / 1000000 if len(argv) > 1 else 0.00002
+    margen = float(argv[2]) if len(argv) > 2 else 1.0
+    configuracion = config.temperatura_config
+    leds = 8
+
+    azar = Random(0)
+    cargas = []
+    temperaturas = []
+    carga, temperatura = 20.0, 57.0
+
+    for _ in range(vueltas):                                                                # Paseos aleatorios, como la carga de CPU y la temperatura (en la zona de la curva en la que más varía la velocidad)
+        carga = min(max(carga + azar.gauss(0, 3), 0), 100)
+        temperatura = min(max(temperatura + azar.gauss(0, 0.2), 30), 70)
+
+        cargas.append(carga)
+        temperaturas.append(temperatura)
+
+    print(f'Escrituras: {vueltas} vueltas de cpu ({leds} leds) y de temperatura (3 leds PWM y un ventilador PWM), {retardo * 1000000:.0f} µs por acceso')
+
+    for nombre, margen_pwm in (('todas las salidas', None), ('suprimiendo', 0.0), (f'suprimiendo (margen {margen})', margen)):
+        gpio = hardware.controlador_simulado(retardo)
+        salidas = comun.gestor_salidas(gpio)
+        pwm = [gpio.PWM(canal, 60) for canal in range(leds, leds + 4)]
+
+        for canal in range(leds):
+            salidas.registrar(canal, gpio.LOW)
+
+        if margen_pwm is not None:
+            pwm = [salidas.pwm(acceso, margen_pwm) for acceso in pwm]
+
+        escribir_varios = gpio.escribir_varios if margen_pwm is None else salidas.escribir_varios   # Réplica de las vueltas originales: todas las salidas, cambien o no
+        curva = ventilador.curva(configuracion.VELOCIDADES, configuracion.VELOCIDAD_MINIMA)
+        etapas = ventilador.etapas(configuracion.TEMPERATURAS)
+        umbrales = [100 / (leds - 1) * i for i in range(leds)]
+
+        gpio.accesos = 0
+        gpio.historial.clear()
+
+        inicio = perf_counter()
+
+        for carga, temperatura in zip(cargas, temperaturas):
+            escribir_varios({canal: gpio.HIGH if carga >= umbral else gpio.LOW for canal, umbral in enumerate(umbrales)})
+
+            etapa = etapas.etapa(temperatura)
+
+            for componente, acceso in enumerate(pwm[:3]):
+                acceso.ChangeDutyCycle(configuracion.COLORES[etapa][componente] * 100)
+
+            pwm[3].ChangeDutyCycle(curva.velocidad(temperatura) * 100)
+
+        tiempo = perf_counter() - inicio
+        cambios_pwm = sum(1 for registro in gpio.historial if len(registro) == 3 and registro[1] >= leds)
+
+        print(f'\t{nombre + ":":32}{tiempo / vueltas * 1000000:8.1f} µs/vuelta\t{gpio.accesos:6d} escrituras simples\t{cambios_pwm:6d} cambios PWM' + (f"\t(suprimidas: {salidas.estadisticas()['suprimidas']} simples, {salidas.estadisticas()['suprimidas_pwm']} PWM)" if margen_pwm is not None else ''))
+
+
+def prueba_eventos(argv):
+    ''' Mide la difusión de eventos a un suscriptor rápido y a otro que no lee, y la memoria que ocupan los eventos pendientes de éste
+        - Parámetros opcionales: cantidad de eventos a publicar y de puertos distintos
+    '''
+
+    cantidad = int(argv[0]) if len(argv) > 0 else 200000
+    claves = int(argv[1]) if len(argv) > 1 else 8
+
+    print(f'Eventos: {cantidad} eventos sobre {claves} puertos, un suscriptor rápido y otro detenido')
+
+    def procesar(sesion, comando):
+        if comando[0:11] == 'desconectar':
+            return None
+
+        sesion.entrada.enmarcado = True
+        multiplexado.suscribir(sesion, None, 64)
+
+        return 'ok: suscrito'
+
+    escucha = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    escucha.bind(('127.0.0.1', 0))
+    escucha.listen(socket.SOMAXCONN)
+
+    multiplexado = multiplexor.servidor_multiplexado(escucha, procesar, 1.5)
+    servidor = Thread(target = multiplexado.bucle, daemon = True)
+    servidor.start()
+
+    suscriptores = []
+
+    for _ in range(2):
+        sc = socket.create_connection(escucha.getsockname())
+        sc.sendall(b'suscribir\n')
+
+        suscriptores.append((sc, sc.makefile('rb')))
+        suscriptores[-1][1].readline()
+
+    recibidos = {'mensajes': 0, 'cambios': 0, 'ultimos': {}}
+
+    def leer(fichero):
+        for linea in fichero:
+            cambios = protocolo.decodificar_evento(linea.decode('utf_8').strip())
+
+            recibidos['mensajes'] += 1
+            recibidos['cambios'] += len(cambios)
+            recibidos['ultimos'].update(cambios)
+
+    lector = Thread(target = leer, args = (suscriptores[0][1], ), daemon = True)
+    lector.start()
+
+    ingenuo = 0                                                                             # Bytes que se habrían encolado enviando cada evento tal cual
+
+    inicio = perf_counter()
+
+    for i in range(cantidad):
+        multiplexado.publicar(i % claves, i)
+
+        ingenuo += len(protocolo.enmarcar(protocolo.codificar_evento([(i % claves, i)])))
+
+    publicacion = perf_counter() - inicio
+
+    sleep(0.5)                                                                              # Se deja que el suscriptor rápido reciba lo último
+
+    detenido = [actual for actual in multiplexado._suscritas.values() if actual.socket.getpeername() == suscriptores[1][0].getsockname()][0]
+    esperados = {i % claves: i for i in range(cantidad - claves, cantidad)}
+
+    print(f"\tpublicación:\t{cantidad / publicacion:10.0f} eventos/s")
+    print(f"\trápido:\t\t{recibidos['mensajes']} mensajes con {recibidos['cambios']} cambios; estado final {'correcto' if recibidos['ultimos'] == esperados else 'incorrecto'}")
+    print(f"\tdetenido:\t{len(detenido.salida)} bytes y {len(detenido.eventos)} eventos pendientes ({detenido.eventos.fusionados} fusionados, {detenido.eventos.descartados} descartados), frente a {ingenuo} bytes sin fusionar")
+
+    multiplexado.detener()
+    servidor.join(1)
+
+
+def prueba_llamadas(argv):
+    ''' Compara el tiempo que el despachador queda bloqueado y la duración de cada llamada lanzando un intérprete nuevo frente al ejecutor de llamadas
+        - Parámetros opcionales: cantidad de llamadas y duración (en ms) de cada una
+    '''
+
+    cantidad = int(argv[0]) if len(argv) > 0 else 50
+    duracion = float(argv[1]) / 1000 if len(argv) > 1 else 0.0
+
+    print(f'Llamadas: {cantidad} llamadas de {duracion * 1000:.1f} ms')
+
+    with TemporaryDirectory() as directorio:
+        with open(os.path.join(directorio, 'llamada.py'), 'w') as archivo:                 # Una llamada típica: importa algún módulo y trabaja (o espera) un rato
+            archivo.write(f"import json, socket\nfrom time import sleep\n\ndef main(argv):\n    sleep({duracion})\n\nif __name__ == '__main__':\n    main(None)\n")
+
+        bloqueos = []
+
+        for _ in range(cantidad):                                                           # Réplica de la ejecución original: una shell y un intérprete nuevos por llamada, esperando a que terminen
+            inicio = perf_counter()
+
+            call(sys.executable + ' ' + directorio + '/llamada.py', shell = True)
+
+            bloqueos.append(perf_counter() - inicio)
+
+        bloqueos.sort()
+
+        print(f"\tintérprete nuevo:\tbloqueo mediano: {bloqueos[len(bloqueos) // 2] * 1000:8.3f} ms\t(el despachador espera a que la llamada termine)")
+
+        ejecutor = llamadas.ejecutor_llamadas(2, cantidad, directorio)
+        ejecutor.iniciar()
+
+        inicio = perf_counter()
+        ejecutor.cargar('llamada.py')
+        carga = perf_counter() - inicio
+
+        bloqueos = []
+
+        for _ in range(cantidad):
+            inicio = perf_counter()
+
+            ejecutor.lanzar('llamada.py')
+
+            bloqueos.append(perf_counter() - inicio)
+
+        while ejecutor.estadisticas()['llamadas'].get('llamada.py', {}).get('ejecuciones', 0) < cantidad:
+            sleep(0.01)
+
+        estadisticas = ejecutor.estadisticas()
+        ejecutor.detener()
+
+        bloqueos.sort()
+
+        print(f"\tejecutor:\t\tbloqueo mediano: {bloqueos[len(bloqueos) // 2] * 1000:8.3f} ms\tduración media:   {estadisticas['llamadas']['llamada.py']['tiempo_medio'] * 1000:8.3f} ms\tcarga inicial: {carga * 1000:.1f} ms\tmáximo de pendientes: {estadisticas['pendientes_maximo']}")
+
+
+def prueba_listado(argv):
+    ''' Mide la latencia del listado de puertos del cliente según la cantidad de puertos y la versión del protocolo
+        - Parámetros opcionales: cantidades de puertos a probar
+        - Necesita poder importar domotica_servidor y domotica_cliente
+    '''
+
+    hardware.controlador('simulado')                                                        # El servidor usará el controlador compartido, que así será el simulado
+
+    import comun                                                                            # Funciones comunes a varios sistemas
+    import domotica_cliente                                                                 # Cliente del sistema gestor de domótica
+    import domotica_servidor                                                                # Servidor del sistema gestor de domótica
+
+    cantidades = [int(cantidad) for cantidad in argv] if argv else [4, 8, 16, 24]
+    repeticiones = 50
+
+    print(f'Listado: {repeticiones} listados por medida')
+
+    for cantidad in cantidades:
+        class config_servidor(domotica_servidor.config):
+            GPIOS   = [[[gpio + 1, domotica_servidor.config.RELE, None, True, f'Relé {gpio + 1}']] for gpio in range(cantidad)]
+            puerto  = 0                                                                     # El sistema asignará uno libre
+
+        servidor = domotica_servidor.domotica_servidor(config_servidor, False)
+        servidor.arranque()
+
+        hilo = Thread(target = servidor.bucle, daemon = True)
+        hilo.start()
+
+        class config_cliente(domotica_cliente.config):
+            puerto  = servidor._escuchas[0].getsockname()[1]
+
+        resultados = []
+
+        for nombre, version in (('2N+1 viajes (1.1)', 1.1), ('segmentado (1.2)', 1.2), ('volcar (1.3)', 1.3)):
+            cliente = domotica_cliente.domotica_cliente(config_cliente, ['rendimiento'])
+            cliente._VERSION_PROTOCOLO = version
+            cliente._conectar(False)
+
+            inicio = perf_counter()
+
+            for _ in range(repeticiones):
+                cliente._estado_conexion = comun.estados_conexion.CONECTADO
+                cliente._domotica_cliente__listar()
+
+            resultados.append(f'{nombre}: {(perf_counter() - inicio) / repeticiones * 1000:7.3f} ms')
+
+            cliente._desconectar()
+
+        servidor._multiplexor.detener()
+        hilo.join(1)
+
+        for escucha in servidor._escuchas:
+            escucha.close()
+
+        print(f"\t{cantidad:4d} puertos:\t" + "\t".join(resultados))
+
+
+def _operar_salidas(salidas, canal, operaciones, latencias):
+    ''' Cliente de la prueba de salidas: alterna escrituras y consultas de estado sobre su propio puerto
+    '''
+
+    propias = []
+
+    for i in range(operaciones):
+        inicio = perf_counter()
+
+        if i % 2:
+            salidas.leer(canal)
+
+        else:
+            salidas.escribir(canal, i % 4 == 0)
+
+        propias.append(perf_counter() - inicio)
+
+    latencias.extend(propias)
+
+
+def prueba_salidas(argv):
+    ''' Compara un semáforo global y la lectura de los puertos frente a semáforos por puerto y la sombra de las salidas, con muchos clientes a la vez
+        - Parámetros opcionales: cantidad de clientes (cada uno con su puerto), de operaciones por cliente y retardo (en µs) de cada acceso al hardware
+        - Necesita poder importar comun
+    '''
+
+    import comun                                                                            # Funciones comunes a varios sistemas
+
+    clientes = int(argv[0]) if len(argv) > 0 else 16
+    operaciones = int(argv[1]) if len(argv) > 1 else 400
+    retardo = float(argv[2]) / 1000000 if len(argv) > 2 else 0.0001
+
+    print(f'Salidas: {clientes} clientes simultáneos, {operaciones} operaciones (mitad escrituras, mitad estados) por cliente, {retardo * 1000000:.0f} µs por acceso')
+
+    for nombre in ('semáforo global', 'por puerto'):
+        gpio = hardware.controlador_simulado(retardo)
+
+        if nombre == 'semáforo global':
+            salidas = _salidas_semaforo_global(gpio)
+
+        else:
+            salidas = comun.gestor_salidas(gpio)
+
+            for canal in range(clientes):
+                salidas.registrar(canal, 0)
+
+        latencias = []
+        hilos = [Thread(target = _operar_salidas, args = (salidas, canal, operaciones, latencias)) for canal in range(clientes)]
+
+        inicio = perf_counter()
+
+        for hilo in hilos:
+            hilo.start()
+
+        for hilo in hilos:
+            hilo.join()
+
+        total = perf_counter() - inicio
+
+        latencias.sort()
+
+        print(f"\t{nombre}:\t{clientes * operaciones / total:10.0f} operaciones/s\tmediana: {latencias[len(latencias) // 2] * 1000000:9.1f} µs\tpercentil 99: {latencias[len(latencias) * 99 // 100] * 1000000:9.1f} µs")
+
+
+def prueba_mascaras(argv):
+    ''' Compara el tiempo de encender y apagar todas las salidas puerto a puerto frente a una única escritura múltiple con las máscaras de cada tipo
+        - Parámetros opcionales: retardo (en µs) de cada acceso al hardware y cantidades de puertos a probar
+    '''
+
+    import comun                                                                            # Funciones comunes a varios sistemas
+
+    retardo = float(argv[0]) / 1000000 if len(argv) > 0 else 0.00002
+    cantidades = [int(cantidad) for cantidad in argv[1:]] if len(argv) > 1 else [8, 32, 128, 512]
+    repeticiones = 20
+
+    print(f'Máscaras: {retardo * 1000000:.0f} µs por acceso, {repeticiones} conmutaciones (encender y apagar) por medida')
+
+    for cantidad in cantidades:
+        gpio = hardware.controlador_simulado(retardo)
+        salidas = comun.gestor_salidas(gpio)
+
+        for canal in range(cantidad):
+            salidas.registrar(canal, gpio.LOW)
+
+        encendido = dict.fromkeys(range(cantidad), gpio.HIGH)
+        apagado = dict.fromkeys(range(cantidad), gpio.LOW)
+
+        resultados = []
+
+        for nombre in ('puerto a puerto', 'máscara'):
+            gpio.accesos = 0
+
+            inicio = perf_counter()
+
+            for _ in range(repeticiones):
+                for niveles in (encendido, apagado):
+                    if nombre == 'puerto a puerto':                                         # Réplica de apagado() y test() originales: una escritura por puerto
+                        for canal, nivel in niveles.items():
+                            salidas.escribir(canal, nivel)
+
+                    else:
+                        salidas.escribir_varios(niveles)
+
+            resultados.append(f'{nombre}: {(perf_counter() - inicio) / (repeticiones * 2) * 1000:8.3f} ms ({gpio.accesos // (repeticiones * 2)} accesos)')
+
+        print(f"\t{cantidad:4d} puertos:\t" + "\t".join(resultados))
+
+
+def prueba_configuracion(argv):
+    ''' Compara la memoria de los puertos en listas anidadas frente a la configuración compilada, y el coste de cada vuelta de un bucle como el de temperatura
+        - Parámetros opcionales: cantidades de puertos a probar
+    '''
+
+    import comun                                                                            # Funciones comunes a varios sistemas
+    import config                                                                           # Constantes de los tipos de puerto
+
+    cantidades = [int(cantidad) for cantidad in argv] if len(argv) > 0 else [8, 64, 512]
+    repeticiones = 200
+    tipos = (config.config_global.LED, config.config_global.LED_PWM, config.config_global.VENTILADOR_PWM, config.config_global.RELE, config.config_global.BOTON)
+
+    print(f'Configuración: memoria de los puertos y {repeticiones} vueltas del bucle por medida')
+
+    for cantidad in cantidades:
+        gpios = [[[canal, tipos[canal % len(tipos)], None, True, f'Puerto {canal}']] for canal in range(cantidad)]
+        memoria_listas = sum(sys.getsizeof(grupo) + sum(sys.getsizeof(puerto) for puerto in grupo) for grupo in gpios)  # Sólo los contenedores, igual que en los registros
+
+        configuracion = type('configuracion', (config.config_global, ), {'FRECUENCIA': 60, 'GPIOS': gpios})
+        gpio = hardware.controlador_simulado(0)
+        pwm = {canal: gpio.PWM(canal, 60) for canal, tipo, _, _, _ in (puerto for puertos in gpios for puerto in puertos) if tipo in (configuracion.LED_PWM, configuracion.VENTILADOR_PWM)}
+
+        tracemalloc.start()
+
+        indice = comun.indice_puertos(configuracion, pwm)
+
+        memoria_indice = tracemalloc.get_traced_memory()[0]                                 # Registros más diccionarios de búsqueda y tuplas de cada tipo
+        memoria_registros = sum(sys.getsizeof(puerto) for grupo in indice.grupos() for puerto in grupo) + sum(sys.getsizeof(grupo) for grupo in indice.grupos())
+
+        tracemalloc.stop()
+
+        for canal, tipo, _, _, _ in (puerto for puertos in gpios for puerto in puertos):    # Réplica de la configuración original, con los objetos PWM escritos en ella
+            if canal in pwm:
+                gpios[canal][0][2] = pwm[canal]
+
+        salidas = comun.gestor_salidas(gpio)
+
+        for puerto in indice.salidas:
+            salidas.registrar(puerto.gpio, gpio.LOW)
+
+        leds = indice.buscar_tipo(configuracion.LED)
+        encendido = {puerto.gpio: gpio.HIGH for puerto in leds}
+        leds_pwm = indice.buscar_tipo(configuracion.LED_PWM)
+        ventiladores_pwm = indice.buscar_tipo(configuracion.VENTILADOR_PWM)
+
+        resultados = []
+
+        for nombre in ('listas', 'compilada'):
+            gpio.historial.clear()
+
+            inicio = perf_counter()
+
+            for _ in range(repeticiones):
+                if nombre == 'listas':                                                      # Réplica del bucle original: se recorren y comparan todos los puertos en cada vuelta
+                    componente = 0
+
+                    for puertos in configuracion.GPIOS:
+                        for canal, tipo, acceso, activacion, _ in puertos:
+                            if tipo == config.config_global.LED:
+                                salidas.escribir(canal, gpio.HIGH if activacion else gpio.LOW)
+
+                            elif tipo == config.config_global.LED_PWM:
+                                acceso.ChangeDutyCycle(componente % 3 * 50)
+
+                            elif tipo == config.config_global.VENTILADOR_PWM:
+                                acceso.ChangeDutyCycle(50)
+
+                            componente += 1
+
+                else:
+                    salidas.escribir_varios(encendido)
+
+                    for componente, puerto in enumerate(leds_pwm):
+                        puerto.acceso.ChangeDutyCycle(componente % 3 * 50)
+
+                    for puerto in ventiladores_pwm:
+                        puerto.acceso.ChangeDutyCycle(50)
+
+            resultados.append(f'{nombre}: {(perf_counter() - inicio) / repeticiones * 1000000:9.1f} µs/vuelta')
+
+        print(f"\t{cantidad:4d} puertos:\tlistas {memoria_listas / 1024:7.1f} KiB\tregistros {memoria_registros / 1024:7.1f} KiB (índice completo {memoria_indice / 1024:7.1f} KiB)\t" + "\t".join(resultados))
+
+
+def prueba_planificador(argv):
+    ''' Compara la deriva, el jitter y los despertares de los bucles de trabajo y pausa originales frente al planificador por plazos
+        - Parámetros opcionales: periodo (en ms) y cantidad de vueltas
+    '''
+
+    import comun                                                                            # Planificador de trabajos periódicos
+
+    periodo = float(argv[0]) / 1000 if len(argv) > 0 else 0.05
+    vueltas = int(argv[1]) if len(argv) > 1 else 40
+    periodos = (1, 1, 2, 4)                                                                 # Múltiplos del periodo de cada trabajo de la segunda medida
+
+    print(f'Planificador: {vueltas} vueltas de {periodo * 1000:.0f} ms, con un trabajo de hasta la mitad del periodo')
+
+    def resumen(inicios):
+        inicios = inicios[1:]                                                               # La primera vuelta es inmediata y las siguientes se alinean con el periodo
+        retrasos = [inicio - (inicios[0] + i * periodo) for i, inicio in enumerate(inicios)]   # Respecto a la rejilla ideal que empieza en la segunda vuelta
+        media = sum(retrasos) / len(retrasos)
+
+        return f'deriva final: {retrasos[-1] * 1000:8.2f} ms\tjitter: {(sum((retraso - media) ** 2 for retraso in retrasos) / len(retrasos)) ** 0.5 * 1000:7.2f} ms'
+
+    async def pausas():                                                                     # Réplica de los bucles originales: trabajo y pausa
+        inicios = []
+
+        for _ in range(vueltas):
+            inicios.append(monotonic())
+
+            sleep(uniform(0, periodo / 2))                                                  #     El trabajo bloquea, como la lectura de vcgencmd
+
+            await asyncio.sleep(periodo)
+
+        return inicios
+
+    async def plazos():
+        inicios = []
+        plan = comun.planificador()
+
+        def trabajo():
+            inicios.append(monotonic())
+
+            sleep(uniform(0, periodo / 2))
+
+            if len(inicios) == vueltas:
+                tarea.cancel()
+
+        tarea = asyncio.ensure_future(plan.periodico('prueba', trabajo, periodo))
+
+        try:
+            await tarea
+
+        except asyncio.CancelledError:
+            pass
+
+        return inicios
+
+    for nombre, medida in (('trabajo y pausa', pausas), ('plazos', plazos)):
+        print(f'\t{nombre + ":":20}\t{resumen(asyncio.run(medida()))}')
+
+    async def despertares(holgura, alinear):                                                # Varios trabajos a la vez, arrancados en momentos distintos
+        plan = comun.planificador(holgura)
+        tareas = []
+
+        for i, multiplo in enumerate(periodos):
+            tareas.append(asyncio.ensure_future(plan.periodico(f'trabajo {i}', lambda: None, periodo * multiplo, alinear = alinear)))
+
+            await asyncio.sleep(periodo / 7)
+
+        await asyncio.sleep(periodo * vueltas)
+
+        estadisticas = plan.estadisticas()                                                  # Antes de cancelarlos, ya que entonces se retiran
+
+        for tarea in tareas:
+            tarea.cancel()
+
+        await asyncio.gather(*tareas, return_exceptions = True)
+
+        return estadisticas['despertares'], sum(trabajo['ejecuciones'] for trabajo in estadisticas['trabajos'].values())
+
+    print(f"\t{len(periodos)} trabajos a la vez, con periodos de {', '.join(str(multiplo) for multiplo in periodos)} veces el dado (con trabajo y pausa, un despertar por vuelta):")
+
+    for nombre, holgura, alinear in (('sin alinear', 0.0, False), ('con holgura', periodo / 4, False), ('alineados', 0.0, True)):
+        cantidad, ejecuciones = asyncio.run(despertares(holgura, alinear))
+
+        print(f'\t\t{nombre + ":":16}{cantidad:5d} despertares para {ejecuciones:5d} vueltas')
+
+
+def prueba_pwm(argv):
+    ''' Compara el consumo de CPU, en reposo, de las salidas PWM por software (un hilo por salida, como RPi.GPIO) frente a las generadas por hardware a través de /sys/class/pwm
+        - Parámetros opcionales: duración (en s) de cada medida, frecuencia (en Hz) y cantidad de salidas
+        - Las salidas por hardware usan un árbol falso de /sys/class/pwm, ya que, una vez arrancadas, no dependen del procesador
+    '''
+
+    duracion = float(argv[0]) if len(argv) > 0 else 3.0
+    frecuencia = float(argv[1]) if len(argv) > 1 else 60
+    cantidad = int(argv[2]) if len(argv) > 2 else 4                                        # Como temperatura: tres leds y un ventilador
+
+    print(f'PWM: {cantidad} salidas al 50 % a {frecuencia:.0f} Hz, {duracion:.1f} s por medida')
+
+    with TemporaryDirectory() as directorio:
+        raiz = hardware.sysfs_pwm_simulado(directorio, 1, cantidad)
+
+        medidas = (
+            ('en reposo, sin salidas', lambda: []),
+            ('software', lambda: [hardware.pwm_software(hardware.controlador_simulado(0), canal, frecuencia) for canal in range(cantidad)]),
+            ('hardware (sysfs)', lambda: [hardware.pwm_hardware(canal, frecuencia, {canal: (0, canal)}, raiz) for canal in range(cantidad)]),
+        )
+
+        for nombre, crear in medidas:
+            salidas = crear()
+
+            for salida in salidas:                                                          # El arranque no cuenta: sólo se mide el reposo, con las salidas ya en marcha
+                salida.start(50)
+
+            inicio, inicio_cpu = perf_counter(), process_time()                             # Tiempo de CPU de todo el proceso, con los hilos de las salidas por software
+
+            sleep(duracion)
+
+            tiempo, tiempo_cpu = perf_counter() - inicio, process_time() - inicio_cpu
+
+            for salida in salidas:
+                salida.stop()
+
+            print(f'\t{nombre + ":":24}\t{tiempo_cpu / tiempo * 100:6.2f} % de CPU' + (f'\t{tiempo_cpu / tiempo / len(salidas) * 100:6.2f} % por salida' if salidas else ''))
+
+
+def prueba_pulsos(argv):
+    ''' Compara la pulsación original, que duerme dentro del manejador, frente a la programada en los temporizadores del multiplexor
+        - Parámetros opcionales: cantidad de clientes simultáneos, de pulsaciones por cliente y duración (en ms) de cada pulsación
+    '''
+
+    clientes = int(argv[0]) if len(argv) > 0 else 20
+    comandos = int(argv[1]) if len(argv) > 1 else 5
+    duracion = int(argv[2]) if len(argv) > 2 else 50
+
+    print(f'Pulsos: {clientes} clientes simultáneos, {comandos} pulsaciones por cliente de {duracion} ms')
+
+    for nombre in ('bloqueante', 'programado'):
+        escucha = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        escucha.bind(('127.0.0.1', 0))
+        escucha.listen(socket.SOMAXCONN)
+
+        retrasos = []                                                                       # Diferencia entre el plazo de cada apagado y el momento en que realmente se produce
+
+        def apagar(plazo):
+            retrasos.append(monotonic() - plazo)
+
+        def procesar(sesion, comando):                                                      # @UnusedVariable
+            if comando[0:11] == 'desconectar':
+                return None
+
+            segundos = int(comando.split()[2]) / 1000
+
+            if nombre == 'bloqueante':                                                      # Réplica del pulsar() original: encender, dormir y apagar
+                sleep(segundos)
+
+            else:
+                multiplexado.programar(segundos, partial(apagar, monotonic() + segundos))
+
+            return 'ok: ejecutado'
+
+        multiplexado = multiplexor.servidor_multiplexado(escucha, procesar, 1.1)
+        servidor = Thread(target = multiplexado.bucle, daemon = True)
+        servidor.start()
+
+        total, tiempos = _lanzar_clientes(escucha.getsockname()[1], clientes, comandos, 0, f'pulsar 4 {duracion}'.encode('utf_8'))
+
+        sleep(duracion / 1000 * 2)                                                          # Se deja vencer a los últimos apagados
+
+        multiplexado.detener()
+        servidor.join(1)
+
+        tiempos.sort()
+
+        print(f"\t{nombre}:\t{clientes * comandos / total:10.1f} pulsaciones/s\tmediana por cliente: {tiempos[len(tiempos) // 2] * 1000:9.2f} ms\tpeor: {tiempos[-1] * 1000:9.2f} ms", end = '')
+
+        if retrasos:
+            retrasos.sort()
+
+            print(f"\tretraso de los apagados: mediana {retrasos[len(retrasos) // 2] * 1000:.3f} ms, peor {retrasos[-1] * 1000:.3f} ms", end = '')
+
+        print()
+
+
+def prueba_segmentado(argv):
+    ''' Compara el envío de comandos uno a uno (un viaje de ida y vuelta por comando) frente al envío segmentado del protocolo 1.2
+        - Parámetros opcionales: cantidad de comandos por lote y de lotes
+    '''
+
+    comandos = int(argv[0]) if len(argv) > 0 else 32
+    lotes    = int(argv[1]) if len(argv) > 1 else 200
+
+    escucha = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    escucha.bind(('127.0.0.1', 0))
+    escucha.listen(socket.SOMAXCONN)
+
+    multiplexado = multiplexor.servidor_multiplexado(escucha, _procesar_eco_enmarcado, 1.2)
+    servidor = Thread(target = multiplexado.bucle, daemon = True)
+    servidor.start()
+
+    sc = socket.create_connection(escucha.getsockname())
+    entrada = protocolo.bufer_entrada(True)
+
+    def recibir(cantidad):
+        recibidos = 0
+
+        while recibidos < cantidad:
+            entrada.anyadir(sc.recv(protocolo.TAMANYO_BUFER))
+
+            recibidos += sum(1 for _ in entrada.mensajes())
+
+    print(f'Segmentado: lotes de {comandos} comandos, {lotes} lotes')
+
+    inicio = perf_counter()
+
+    for _ in range(lotes):
+        for _ in range(comandos):
+            sc.sendall(protocolo.enmarcar('encender 4'))
+            recibir(1)
+
+    uno_a_uno = perf_counter() - inicio
+
+    lote = b''.join(protocolo.enmarcar('encender 4') for _ in range(comandos))
+
+    inicio = perf_counter()
+
+    for _ in range(lotes):
+        sc.sendall(lote)
+        recibir(comandos)
+
+    segmentado = perf_counter() - inicio
+
+    sc.close()
+    multiplexado.detener()
+    servidor.join(1)
+
+    print(f"\tuno a uno:\t{uno_a_uno / lotes * 1000:8.3f} ms/lote\t{comandos * lotes / uno_a_uno:10.0f} comandos/s")
+    print(f"\tsegmentado:\t{segmentado / lotes * 1000:8.3f} ms/lote\t{comandos * lotes / segmentado:10.0f} comandos/s")
+
+
+def _medir_procesos(sistemas):
+    ''' Lanza un intérprete que importa, construye y arranca (con el controlador simulado y sin bloqueos) los sistemas dados, y devuelve su tiempo total hasta estar listo y su memoria residente (en KiB)
+    '''
+
+    codigo = (
+                'import sys, hardware\n'
+                "hardware.controlador('simulado')\n"
+                f'for nombre in {tuple(sistemas)!r}:\n'
+                '    modulo = __import__(nombre)\n'
+                '    getattr(modulo, nombre)(modulo.config, None).arranque()\n'
+                "print([linea.split()[1] for linea in open('/proc/self/status') if linea.startswith('VmRSS:')][0])\n"
+             )
+
+    inicio = perf_counter()
+
+    resultado = run([sys.executable, '-c', codigo], capture_output = True, text = True, cwd = os.path.dirname(os.path.abspath(__file__)))
+
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1] if resultado.stderr.strip() else f'código de salida {resultado.returncode}')
+
+    return perf_counter() - inicio, int(resultado.stdout.split()[-1])
+
+
+def prueba_supervisor(argv):
+    ''' Compara la memoria residente y el tiempo de arranque de un proceso por sistema frente a un único proceso, como el del supervisor, que los aloja a todos
+        - Parámetros opcionales: sistemas a alojar (por defecto, los de la configuración del supervisor)
+    '''
+
+    import config                                                                           # Sistemas alojados por defecto
+
+    sistemas = argv if len(argv) > 0 else list(config.supervisor_config.SISTEMAS)
+
+    print(f"Supervisor: {', '.join(sistemas)}")
+
+    tiempo_total = memoria_total = 0
+
+    for sistema in sistemas:
+        try:
+            tiempo, memoria = _medir_procesos((sistema, ))
+
+        except RuntimeError as e:
+            print(f'\t{sistema}:\timposible arrancarlo ({e})')
+
+            return
+
+        tiempo_total += tiempo
+        memoria_total += memoria
+
+        print(f'\t{sistema + ":":20}\t{memoria / 1024:7.1f} MiB\t{tiempo * 1000:8.1f} ms')
+
+    tiempo, memoria = _medir_procesos(sistemas)
+
+    print(f'\tun proceso por sistema:\t{memoria_total / 1024:7.1f} MiB\t{tiempo_total * 1000:8.1f} ms')
+    print(f'\tun único proceso:\t{memoria / 1024:7.1f} MiB\t{tiempo * 1000:8.1f} ms\t(ahorro: {(memoria_total - memoria) / 1024:.1f} MiB, {(1 - memoria / memoria_total) * 100:.0f} %)')
+
+
+def prueba_historial(argv):
+    ''' Compara el coste de guardar cada muestra reescribiendo todo el historial en un archivo frente al búfer circular proyectado en memoria, y mide las consultas por ventana de éste
+        - Parámetros opcionales: capacidad del historial y cantidad de muestras a guardar
+    '''
+
+    import historial                                                                        # Historial de muestras en un búfer circular
+
+    capacidad = int(argv[0]) if len(argv) > 0 else 10080
+    muestras = int(argv[1]) if len(argv) > 1 else 100
+
+    print(f'Historial: {capacidad} muestras de capacidad, {muestras} muestras guardadas', '(con NumPy)' if historial.numpy is not None else '(sin NumPy)')
+
+    generador = Random(0)
+    datos = [(float(i * 60), 40 + generador.random() * 30, generador.random(), generador.randrange(4)) for i in range(capacidad + muestras)]
+
+    with TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'reescritura')
+        lista = list(datos[:capacidad])                                                     # Réplica ingenua: la lista completa en memoria, que se reescribe entera en cada muestra
+
+        inicio = perf_counter()
+
+        for muestra in datos[capacidad:]:
+            lista.append(muestra)
+            del lista[0]
+
+            with open(ruta, 'w') as archivo:
+                archivo.write(repr(lista))
+
+        tiempo_reescritura = perf_counter() - inicio
+
+        circular = historial.historial(os.path.join(directorio, 'circular'), capacidad)
+
+        for muestra in datos[:capacidad]:
+            circular.anyadir(*muestra)
+
+        inicio = perf_counter()
+
+        for muestra in datos[capacidad:]:
+            circular.anyadir(*muestra)
+
+        tiempo_circular = perf_counter() - inicio
+
+        print(f'	Reescritura completa:	{tiempo_reescritura / muestras * 1000000:10.1f} µs por muestra')
+        print(f'	Búfer circular:		{tiempo_circular / muestras * 1000000:10.1f} µs por muestra')
+
+        ultimo = datos[-1][0]
+
+        for nombre, segundos in (('1 hora', 3600), ('1 día', 86400), ('completo', None)):
+            desde = ultimo - segundos if segundos else None
+            repeticiones = 20
+
+            inicio = perf_counter()
+
+            for _ in range(repeticiones):
+                resumen = circular.estadisticas(desde)
+
+            tiempo = (perf_counter() - inicio) / repeticiones
+
+            inicio = perf_counter()
+
+            for _ in range(repeticiones):
+                circular.estadisticas(desde, percentiles = ())
+
+            tiempo_sin = (perf_counter() - inicio) / repeticiones
+
+            print(f'	Consulta ({nombre}, {resumen["muestras"]} muestras):	{tiempo * 1000:8.2f} ms con percentiles	{tiempo_sin * 1000:8.2f} ms sin ellos')
+
+        circular.cerrar()
+
+
+def prueba_termometro(argv):
+    ''' Compara las muestras por segundo y el coste de CPU por muestra de cada fuente de la temperatura: vcgencmd (un proceso por muestra) frente a la zona térmica leída con pread() sobre un descriptor abierto
+        - Parámetros opcionales: cantidad de muestras (las fuentes que lanzan un proceso por muestra toman la centésima parte)
+    '''
+
+    import termometro                                                                       # Fuentes de la temperatura
+
+    muestras = int(argv[0]) if len(argv) > 0 else 20000
+
+    print(f'Termómetro: {muestras} muestras por fuente')
+
+    def cpu():                                                                              # Tiempo de CPU del proceso y de sus hijos, para contar también el de los procesos lanzados
+        tiempos = os.times()
+
+        return tiempos.user + tiempos.system + tiempos.children_user + tiempos.children_system
+
+    def abrir_y_cerrar(ruta):                                                               # Réplica de una lectura ingenua, que abre y cierra el archivo en cada muestra
+        def leer():
+            with open(ruta, 'rb') as archivo:
+                return int(archivo.read()) / 1000
+
+        return leer
+
+    with TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'temp')
+        falso = termometro.termometro('archivo', ruta = ruta)
+
+        replica = os.path.join(directorio, 'vcgencmd')                                      # Réplica de vcgencmd, por si no se está en una Raspberry Pi: mismo formato de salida y un proceso por muestra
+
+        with open(replica, 'w') as archivo:
+            archivo.write("#!/bin/sh\necho \"temp=48.3'C\"\n")
+
+        os.chmod(replica, 0o755)
+
+        fuentes = [
+            ('archivo (pread)', falso.leer, muestras),
+            ('archivo (abrir y cerrar)', abrir_y_cerrar(ruta), muestras),
+        ]
+
+        if os.path.exists(termometro.RUTA_ZONA.format(0)):
+            fuentes.append(('sysfs (pread)', termometro.termometro('sysfs').leer, muestras))
+            fuentes.append(('sysfs (abrir y cerrar)', abrir_y_cerrar(termometro.RUTA_ZONA.format(0)), muestras))
+
+        else:
+            print('\tsysfs:\tsin zonas térmicas en este sistema')
+
+        if os.path.exists(termometro.CMD_COMANDO):
+            fuentes.append(('vcgencmd', termometro.termometro('vcgencmd').leer, max(1, muestras // 100)))
+
+        else:
+            fuentes.append(('vcgencmd (réplica)', termometro.termometro('vcgencmd', ruta = replica).leer, max(1, muestras // 100)))
+
+        for nombre, leer, cantidad in fuentes:
+            leer()                                                                          # Una primera lectura, fuera de la medida
+
+            inicio, inicio_cpu = perf_counter(), cpu()
+
+            for _ in range(cantidad):
+                leer()
+
+            tiempo, tiempo_cpu = perf_counter() - inicio, cpu() - inicio_cpu
+
+            print(f'\t{nombre + ":":28}\t{cantidad / tiempo:10.0f} muestras/s\t{tiempo_cpu / cantidad * 1000000:9.1f} µs de CPU por muestra')
+
+        falso.cerrar()
+
+
+def _trazas_temperatura(muestras):
+    ''' Genera trazas de temperatura deterministas, de una muestra por segundo: reposo estable, ruido alrededor de un umbral, una rampa de subida y bajada y escalones de carga
+    '''
+
+    azar = Random(0)
+
+    return {
+        'reposo': [42 + azar.gauss(0, 0.1) for _ in range(muestras)],
+        'umbral': [50 + azar.gauss(0, 0.6) for _ in range(muestras)],
+        'rampa': [35 + 35 * (1 - abs(2 * i / muestras - 1)) + azar.gauss(0, 0.4) for i in range(muestras)],
+        'carga': [(62 if ((i + 43) // 150) % 2 else 44) + azar.gauss(0, 0.8) for i in range(muestras)],
+    }
+
+
+def prueba_ventilador(argv):
+    ''' Reproduce trazas de temperatura en el cálculo original del ventilador (recorrido de la curva y arranque bloqueante) y en los reguladores de ventilador.py, y compara su coste y sus oscilaciones
+        - Parámetros opcionales: archivo con una traza grabada (una temperatura por línea, de una muestra por segundo) o cantidad de muestras de las trazas generadas
+    '''
+
+    import config                                                                           # Curva, umbrales y constantes del regulador
+    import ventilador                                                                       # Reguladores del ventilador y etapas de temperatura
+
+    configuracion = config.temperatura_config
+
+    if len(argv) > 0 and not(argv[0].isdigit()):
+        with open(argv[0]) as archivo:
+            trazas = {os.path.basename(argv[0]): [float(linea) for linea in archivo if linea.strip()]}
+
+    else:
+        trazas = _trazas_temperatura(int(argv[0]) if len(argv) > 0 else 3600)
+
+    print(f'Ventilador: curva de {len(configuracion.VELOCIDADES)} puntos, umbrales {configuracion.TEMPERATURAS}, histéresis de {configuracion.HISTERESIS} grados, arranque de {configuracion.TIEMPO_ARRANQUE} s')
+
+    class original(object):                                                                 # Réplica del cálculo original: recorrido lineal de la curva, etapas sin histéresis y arranque que bloquea el bucle
+        def __init__(self):
+            self.fin_arranque = None
+            self.velocidad = 0
+            self.bloqueado = 0
+
+        def etapa(self, temperatura):
+            for etapa, umbral in enumerate(configuracion.TEMPERATURAS):
+                if temperatura < umbral:
+                    return etapa
+
+            return len(configuracion.TEMPERATURAS)
+
+        def actualizar(self, temperatura, instante):                                        # @UnusedVariable
+            igual = mayor = menor = False
+
+            for i, velocidades in enumerate(configuracion.VELOCIDADES):
+                if velocidades[0] < temperatura:
+                    menor = i
+
+                elif velocidades[0] == temperatura:
+                    igual = i
+
+                    break
+
+                elif velocidades[0] > temperatura:
+                    mayor = i
+
+                    break
+
+            arranque = self.velocidad == 0
+
+            if igual is False:
+                if mayor is False:
+                    self.velocidad = configuracion.VELOCIDADES[len(configuracion.VELOCIDADES) - 1][1]
+
+                elif menor is False:
+                    self.velocidad = configuracion.VELOCIDADES[0][1]
+
+                else:
+                    self.velocidad = round(((temperatura - configuracion.VELOCIDADES[menor][0]) / (configuracion.VELOCIDADES[mayor][0] - configuracion.VELOCIDADES[menor][0])) * (configuracion.VELOCIDADES[mayor][1] - configuracion.VELOCIDADES[menor][1]) + configuracion.VELOCIDADES[menor][1], 2)
+
+                if self.velocidad > 0 and self.velocidad < configuracion.VELOCIDAD_MINIMA:
+                    self.velocidad = configuracion.VELOCIDAD_MINIMA
+
+            else:
+                self.velocidad = configuracion.VELOCIDADES[igual][1]
+
+            if arranque:                                                                    # Lo que el bucle original dormía, con el ventilador al máximo
+                self.bloqueado += configuracion.TIEMPO_ARRANQUE
+
+            return self.velocidad
+
+    controles = (
+        ('original', lambda: (original(), None)),
+        ('curva', lambda: (ventilador.control_ventilador(ventilador.curva(configuracion.VELOCIDADES, configuracion.VELOCIDAD_MINIMA), configuracion.TIEMPO_ARRANQUE), ventilador.etapas(configuracion.TEMPERATURAS))),
+        ('curva con histéresis', lambda: (ventilador.control_ventilador(ventilador.curva(configuracion.VELOCIDADES, configuracion.VELOCIDAD_MINIMA, configuracion.HISTERESIS), configuracion.TIEMPO_ARRANQUE), ventilador.etapas(configuracion.TEMPERATURAS, configuracion.HISTERESIS))),
+        ('pid', lambda: (ventilador.control_ventilador(ventilador.pid(*configuracion.PID, velocidad_minima = configuracion.VELOCIDAD_MINIMA), configuracion.TIEMPO_ARRANQUE), ventilador.etapas(configuracion.TEMPERATURAS, configuracion.HISTERESIS))),
+    )
+
+    for nombre_traza, traza in trazas.items():
+        print(f'\t{nombre_traza} ({len(traza)} muestras, de {min(traza):.1f} a {max(traza):.1f} grados):')
+
+        for nombre, crear in controles:
+            control, etapas = crear()
+            etapa = etapas.etapa if etapas else control.etapa
+            cambios_velocidad = cambios_etapa = arranques = 0
+            anterior_velocidad = anterior_etapa = None
+
+            inicio = perf_counter()
+
+            for instante, temperatura in enumerate(traza):
+                actual_etapa = etapa(temperatura)
+                parado = control.velocidad == 0
+                control.actualizar(temperatura, instante)
+
+                if parado and control.velocidad > 0:
+                    arranques += 1
+
+                if control.velocidad != anterior_velocidad:
+                    cambios_velocidad += 1
+                    anterior_velocidad = control.velocidad
+
+                if actual_etapa != anterior_etapa:
+                    cambios_etapa += 1
+                    anterior_etapa = actual_etapa
+
+            tiempo = perf_counter() - inicio
+
+            print(f"\t\t{nombre + ':':22}{tiempo / len(traza) * 1000000:6.2f} µs/muestra\t{cambios_velocidad:5d} cambios de velocidad\t{cambios_etapa:5d} cambios de etapa\t{arranques:4d} arranques\t{getattr(control, 'bloqueado', 0):5d} s de bucle bloqueado")
+
+
+def prueba_muestreo(argv):
+    ''' Reproduce trazas de temperatura con muestreo fijo (cada 60 s, como el original, y cada PAUSA_MINIMA) y con el muestreo adaptativo de ventilador.py, y compara las muestras tomadas frente a la latencia de reacción
+        - Parámetros opcionales: archivo con una traza grabada (una temperatura por línea, de una muestra por segundo) o cantidad de muestras de las trazas generadas
+        - La latencia de reacción es lo que tarda en verse cada cambio de etapa que se vería muestreando cada segundo; el desfase, la diferencia entre la temperatura real y la última muestreada
+    '''
+
+    import config                                                                           # Pausas, umbrales y constantes del muestreo
+    import ventilador                                                                       # Muestreo adaptativo y etapas de temperatura
+
+    configuracion = config.temperatura_config
+
+    if len(argv) > 0 and not(argv[0].isdigit()):
+        with open(argv[0]) as archivo:
+            trazas = {os.path.basename(argv[0]): [float(linea) for linea in archivo if linea.strip()]}
+
+    else:
+        trazas = _trazas_temperatura(int(argv[0]) if len(argv) > 0 else 3600)
+
+    pausa_original = 60                                                                     # Periodo fijo de temperatura.py antes del muestreo adaptativo
+    minimo = configuracion.PAUSA_MINIMA or 5
+
+    print(f'Muestreo: pausa de {minimo} a {configuracion.PAUSA} s, variación de {configuracion.VARIACION_MUESTREO} grados, umbrales {configuracion.TEMPERATURAS}')
+
+    class fijo(object):                                                                     # Muestreo de periodo fijo, como el original
+        def __init__(self, periodo):
+            self.periodo = periodo
+
+        def actualizar(self, temperatura, instante):                                        # @UnusedVariable
+            return self.periodo
+
+    def adaptativo(maximo):                                                                 # Muestreo adaptativo con la configuración, salvo la pausa máxima, aunque esté desactivado en ella
+        class configuracion_muestreo(configuracion):
+            PAUSA = maximo
+            PAUSA_MINIMA = minimo
+
+        return lambda: ventilador.muestreo(configuracion_muestreo)
+
+    muestreos = [
+        (f'fijo ({pausa_original} s, original)', lambda: fijo(pausa_original)),
+        (f'fijo ({minimo} s)', lambda: fijo(minimo)),
+        (f'adaptativo (máx. {pausa_original} s)', adaptativo(pausa_original)),
+    ]
+
+    if configuracion.PAUSA != pausa_original:
+        muestreos.append((f'adaptativo (máx. {configuracion.PAUSA} s)', adaptativo(configuracion.PAUSA)))
+
+    for nombre_traza, traza in trazas.items():
+        print(f'\t{nombre_traza} ({len(traza)} s, de {min(traza):.1f} a {max(traza):.1f} grados):')
+
+        etapas = ventilador.etapas(configuracion.TEMPERATURAS, configuracion.HISTERESIS)    # Cambios de etapa de referencia, muestreando cada segundo
+        referencia = []
+        anterior = None
+
+        for instante, temperatura in enumerate(traza):
+            etapa = etapas.etapa(temperatura)
+
+            if anterior is not None and etapa != anterior:
+                referencia.append(instante)
+
+            anterior = etapa
+
+        for nombre, crear in muestreos:
+            muestreo = crear()
+            tomadas = []
+            instante = 0
+
+            while instante < len(traza):                                                    # Cada muestra se toma en el primer segundo de la traza tras su plazo
+                tomadas.append(instante)
+
+                instante += max(1, ceil(muestreo.actualizar(traza[instante], instante) - 1e-9))
+
+            latencias = []
+            j = 0
+
+            for cambio in referencia:                                                       # Primera muestra tomada en el cambio o después
+                while j < len(tomadas) and tomadas[j] < cambio:
+                    j += 1
+
+                latencias.append((tomadas[j] if j < len(tomadas) else len(traza)) - cambio)
+
+            desfases = []
+            j = 0
+
+            for instante, temperatura in enumerate(traza):                                  # Diferencia con la última temperatura muestreada
+                while j + 1 < len(tomadas) and tomadas[j + 1] <= instante:
+                    j += 1
+
+                desfases.append(abs(temperatura - traza[tomadas[j]]))
+
+            latencia = f'{sum(latencias) / len(latencias):6.1f} s de media, {max(latencias):4d} s como máximo' if latencias else f'{"sin cambios de etapa":>36}'
+
+            print(f'\t\t{nombre + ":":28}{len(tomadas):6d} muestras ({len(tomadas) / len(traza) * 100:5.1f} %)\tlatencia {latencia}\tdesfase {sum(desfases) / len(desfases):5.2f} grados de media, {max(desfases):5.2f} como máximo')
+
+
+def prueba_transporte(argv):
+    ''' Compara la latencia de ida y vuelta y el caudal de comandos enmarcados sobre TCP frente a un socket de dominio UNIX, con ruta y abstracto
+        - Parámetros opcionales: cantidad de viajes de ida y vuelta y de comandos por lote (para el caudal)
+    '''
+
+    viajes   = int(argv[0]) if len(argv) > 0 else 5000
+    comandos = int(argv[1]) if len(argv) > 1 else 32
+
+    print(f'Transporte: {viajes} viajes de ida y vuelta, lotes de {comandos} comandos')
+
+    with TemporaryDirectory() as directorio:
+        transportes = (
+            ('TCP', socket.AF_INET, ('127.0.0.1', 0)),
+            ('UNIX (ruta)', socket.AF_UNIX, os.path.join(directorio, 'domotica.sock')),
+            ('UNIX (abstracto)', socket.AF_UNIX, '\0domotica-rendimiento-' + str(os.getpid())),
+        )
+
+        for nombre, familia, direccion in transportes:
+            escucha = socket.socket(familia, socket.SOCK_STREAM)
+            escucha.bind(direccion)
+            escucha.listen(socket.SOMAXCONN)
+
+            multiplexado = multiplexor.servidor_multiplexado(escucha, _procesar_eco_enmarcado, 1.2)
+            servidor = Thread(target = multiplexado.bucle, daemon = True)
+            servidor.start()
+
+            sc = socket.socket(familia, socket.SOCK_STREAM)
+            sc.connect(escucha.getsockname())
+
+            entrada = protocolo.bufer_entrada(True)
+            orden = protocolo.enmarcar('estado 4')
+
+            def recibir(cantidad):
+                recibidos = 0
+
+                while recibidos < cantidad:
+                    entrada.anyadir(sc.recv(protocolo.TAMANYO_BUFER))
+
+                    recibidos += sum(1 for _ in entrada.mensajes())
+
+            latencias = []
+
+            for _ in range(viajes):
+                inicio = perf_counter()
+
+                sc.sendall(orden)
+                recibir(1)
+
+                latencias.append(perf_counter() - inicio)
+
+            lote = orden * comandos
+            lotes = max(1, viajes // comandos)
+
+            inicio = perf_counter()
+
+            for _ in range(lotes):
+                sc.sendall(lote)
+                recibir(comandos)
+
+            caudal = comandos * lotes / (perf_counter() - inicio)
+
+            sc.close()
+            multiplexado.detener()
+            servidor.join(1)
+            escucha.close()
+
+            latencias.sort()
+
+            print(f"\t{nombre}:\tmediana: {latencias[len(latencias) // 2] * 1000000:8.1f} µs\tp99: {latencias[int(len(latencias) * 0.99)] * 1000000:8.1f} µs\t{caudal:10.0f} comandos/s")
+
+
+PRUEBAS         = {
+                    'configuracion': prueba_configuracion,
+                    'despacho': prueba_despacho,
+                    'entradas': prueba_entradas,
+                    'escrituras': prueba_escrituras,
+                    'eventos': prueba_eventos,
+                    'historial': prueba_historial,
+                    'listado': prueba_listado,
+                    'llamadas': prueba_llamadas,
+                    'mascaras': prueba_mascaras,
+                    'muestreo': prueba_muestreo,
+                    'planificador': prueba_planificador,
+                    'pulsos': prueba_pulsos,
+                    'pwm': prueba_pwm,
+                    'salidas': prueba_salidas,
+                    'segmentado': prueba_segmentado,
+                    'servidor': prueba_servidor,
+                    'supervisor': prueba_supervisor,
+                    'termometro': prueba_termometro,
+                    'transporte': prueba_transporte,
+                    'ventilador': prueba_ventilador,
+                  }
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in PRUEBAS:
+        print('Uso: python3 rendimiento.py <prueba> [parámetros]')
+        print('Pruebas disponibles:')
+
+        for nombre, prueba in sorted(PRUEBAS.items()):
+            print(f"\t{nombre}:\t{prueba.__doc__.strip().splitlines()[0]}")
+
+        sys.exit(errno.EINVAL)
+
+    PRUEBAS[argv[1]](argv[2:])
+
+
+if __name__ == '__main__':
+    main(sys.argv)
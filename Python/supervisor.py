@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : supervisor.py
+# Description   : Sistema que aloja en un único proceso, cada uno en su propio hilo, los sistemas que de otra forma serían servicios independientes
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.3.1
+# Usage         : python3 supervisor.py [sistema...]
+# Notes         : Sin parámetros, aloja los sistemas de la variable de configuración SISTEMAS (por defecto, cpu, domotica_servidor, reiniciar_router y temperatura)
+#                 Todos comparten el intérprete, los módulos importados, la configuración y el controlador de los puertos GPIO, por lo que la memoria necesaria es mucho menor que con un proceso por sistema
+#                 Si un sistema falla, se vuelve a arrancar tras una espera que se duplica con cada fallo seguido (entre ESPERA_MINIMA y ESPERA_MAXIMA segundos)
+#                 Las señales las recibe el supervisor, que las reparte entre los sistemas según la variable senyales de cada uno; "SIGTERM" los cierra todos
+#                 Cada INFORME segundos (y al cerrarse) muestra, por sistema, su estado, sus reinicios y su tiempo de CPU, junto con la memoria del proceso y las escrituras en los puertos GPIO de salida, hechas y suprimidas
+
+
+DEBUG           = False
+DEBUG_REMOTO    = False
+
+
+import errno                                                                                            # Códigos de error
+import importlib                                                                                        # Importación de módulos por su nombre
+import os                                                                                               # Funcionalidades varias del sistema operativo
+import signal                                                                                           # Manejo de señales
+import sys                                                                                              # Funcionalidades varias del sistema
+from threading import Event, Thread, get_native_id                                                      # Capacidades multihilo
+from time import monotonic, thread_time                                                                 # Reloj monotónico y tiempo de CPU del hilo actual
+
+import comun                                                                                            # Funciones comunes a varios sistemas
+import hardware                                                                                         # Controlador de los puertos GPIO, compartido por todos los sistemas
+from pid import bloqueo                                                                                 # Módulo propio para bloquear la ejecución de más de una instancia
+
+if DEBUG_REMOTO:
+    import pydevd                                                                                       # Depuración remota
+    from pydevd_file_utils import setup_client_server_paths                                             # Configuración de las rutas Eclipse ➡
+
+try:
+    from config import supervisor_config as config                                                      # Configuración
+
+except ImportError:
+    print('Error: Archivo de configuración no encontrado', file = sys.stderr)
+    sys.exit(errno.ENOENT)
+
+
+ESPERA_CIERRE   = 5                                                                                     # Tiempo máximo (en segundos) que se espera a que un sistema asíncrono se cierre por sí mismo
+SENYALES        = ('SIGHUP', 'SIGUSR1', 'SIGUSR2')                                                      # Señales que se reparten entre los sistemas; SIGTERM y SIGINT los cierran todos
+
+
+def memoria_residente(pid = 'self'):
+    ''' Devuelve la memoria residente (RSS), en KiB, de un proceso (por defecto, el actual) o None si no puede saberse
+    '''
+
+    try:
+        with open(f'/proc/{pid}/status') as archivo:
+            for linea in archivo:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1])
+
+    except OSError:
+        pass
+
+    return None
+
+
+def tiempo_cpu_hilo(id_nativo):
+    ''' Devuelve el tiempo de CPU (usuario más sistema, en segundos) consumido por un hilo del proceso actual o None si no puede saberse
+    '''
+
+    try:
+        with open(f'/proc/self/task/{id_nativo}/stat') as archivo:
+            campos = archivo.read().rsplit(')', 1)[1].split()                                           # Tras el nombre, entre paréntesis, el estado es el campo 3; utime y stime, el 14 y el 15
+
+    except OSError:
+        return None
+
+    return (int(campos[11]) + int(campos[12])) / os.sysconf('SC_CLK_TCK')
+
+
+class tarea(object):
+    ''' Clase que guarda el estado de cada sistema alojado por el supervisor
+    '''
+
+    def __init__(self, modulo, espera):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+            - "modulo" es el nombre del módulo del sistema, cuya clase principal se llama igual
+            - "espera" es la espera inicial antes de volver a arrancarlo si falla
+        '''
+
+        self.app            = False
+        self.cpu            = 0.0                                                                       # Tiempo de CPU de las ejecuciones ya terminadas
+        self.espera         = espera
+        self.hilo           = False
+        self.id_nativo      = None
+        self.inicio         = 0.0
+        self.modulo         = modulo
+        self.nombre         = modulo + '.py'                                                            # El mismo nombre que si se ejecutase por separado, para compartir su bloqueo
+        self.proximo        = 0.0                                                                       # Instante (monotónico) del próximo intento de arranque
+        self.reinicios      = 0
+
+
+    def tiempo_cpu(self):
+        ''' Devuelve el tiempo de CPU total del sistema, contando el de sus ejecuciones anteriores
+        '''
+
+        actual = tiempo_cpu_hilo(self.id_nativo) if self.hilo and self.id_nativo else None
+
+        return self.cpu + (actual or 0.0)
+
+
+class supervisor(object):
+    ''' Clase del sistema que aloja, en hilos de un único proceso, varios sistemas
+    '''
+
+    def __init__(self, config, nombre, sistemas = None):
+        ''' Constructor de la clase:
+            - Inicializa las variables
+            - "sistemas" es la lista de módulos a alojar (por defecto, los de la configuración)
+        '''
+
+        self._bloqueo       = bloqueo(nombre)
+        self._config        = config
+        self._informe       = 0.0                                                                       # Instante (monotónico) del próximo informe
+        self._salir         = Event()
+        self._tareas        = [tarea(modulo, config.ESPERA_MINIMA) for modulo in (sistemas or config.SISTEMAS)]
+
+
+    def _arrancar(self, actual):
+        ''' Importa (sólo la primera vez), construye y arranca un sistema, y lanza su bucle en un hilo propio
+            - Si no puede hacerse, se programa un nuevo intento
+        '''
+
+        try:
+            modulo = importlib.import_module(actual.modulo)                                             # Un módulo ya importado no se vuelve a cargar
+            actual.app = getattr(modulo, actual.modulo)(modulo.config, actual.nombre)
+            actual.app._alojado = True                                                                  # Así, al recargar su configuración, no sustituirá las señales del supervisor
+
+            error = actual.app.arranque()
+
+        except (Exception, SystemExit) as e:                                                            # Los módulos salen con sys.exit() si les falta algo al importarse
+            print(f'Error: Imposible arrancar {actual.nombre}: {e!r}', file = sys.stderr)
+
+            error = True
+
+        self._asignar_senyales()                                                                        # El constructor del sistema habrá asignado las suyas, que se sustituyen por las del supervisor
+
+        if error:
+            if actual.app:                                                                              # Si llegó a construirse, se deshace lo que haya hecho su arranque (el bloqueo, los puertos GPIO, ...)
+                self._cerrar(actual)
+
+            self._programar_reinicio(actual)
+
+        else:
+            if DEBUG:
+                print(f'Supervisor #{os.getpid()}\tArrancando {actual.nombre}')
+
+            actual.inicio = monotonic()
+            actual.hilo = Thread(target = self._ejecutar, args = (actual, ), name = actual.modulo, daemon = True)
+            actual.hilo.start()
+
+
+    def _asignar_senyales(self):
+        ''' Asigna las señales del supervisor
+        '''
+
+        for senyal in SENYALES:
+            signal.signal(getattr(signal, senyal), self._repartir_senyal)
+
+        signal.signal(signal.SIGINT, self._sig_cerrar)
+        signal.signal(signal.SIGTERM, self._sig_cerrar)
+
+
+    def _cerrar(self, actual):
+        ''' Cierra un sistema, sin que un fallo al hacerlo afecte al resto
+            - Los sistemas asíncronos en marcha se detienen de forma cooperativa, esperando a que terminen su bucle
+        '''
+
+        try:
+            if actual.hilo and isinstance(actual.app, comun.app_asincrona):                             # Los sistemas asíncronos se cierran solos al cancelarse su bucle
+                actual.app.detener()
+                actual.hilo.join(ESPERA_CIERRE)
+
+            else:
+                actual.app.cerrar()
+
+        except Exception as e:
+            print(f'Error: Imposible cerrar {actual.nombre}: {e!r}', file = sys.stderr)
+
+        actual.app = False
+
+
+    def _ejecutar(self, actual):
+        ''' Cuerpo del hilo de cada sistema: ejecuta su bucle y, al terminar (normalmente, por un fallo), anota su tiempo de CPU
+        '''
+
+        actual.id_nativo = get_native_id()
+
+        try:
+            if isinstance(actual.app, comun.app_asincrona):                                             # Cada sistema asíncrono tiene su propio bucle de eventos, en su hilo
+                actual.app.ejecutar()
+
+            else:
+                actual.app.bucle()
+
+        except Exception as e:
+            print(f'Error: {actual.nombre} ha fallado: {e!r}', file = sys.stderr)
+
+        finally:
+            actual.cpu += thread_time()
+            actual.id_nativo = None
+
+
+    def _programar_reinicio(self, actual):
+        ''' Programa el próximo arranque de un sistema, duplicando la espera si ha fallado poco después del anterior
+        '''
+
+        if actual.inicio and monotonic() - actual.inicio >= self._config.TIEMPO_ESTABLE:                # Si llevaba tiempo funcionando, el fallo no es consecuencia del anterior
+            actual.espera = self._config.ESPERA_MINIMA
+
+        print(f'Info: {actual.nombre} se volverá a arrancar en {actual.espera} segundos', file = sys.stderr)
+
+        actual.proximo = monotonic() + actual.espera
+        actual.espera = min(actual.espera * 2, self._config.ESPERA_MAXIMA)
+
+
+    def _repartir_senyal(self, signum, frame):
+        ''' Manejador de las señales que se reparten: cada sistema en marcha la procesa con la función que tenga asignada en su configuración
+        '''
+
+        nombre = signal.Signals(signum).name
+
+        for actual in self._tareas:
+            if actual.hilo:
+                funcion = getattr(actual.app._config, 'senyales', {}).get(nombre)                       # @UndefinedVariable
+
+                if funcion and funcion != 'sig_cerrar':
+                    if isinstance(actual.app, comun.app_asincrona):                                     # Los sistemas asíncronos la atienden dentro de su bucle de eventos
+                        actual.app.recibir_senyal(signum)
+
+                    else:
+                        getattr(actual.app, '_' + funcion)(signum, frame)
+
+
+    def _sig_cerrar(self, signum, frame):                                                               # @UnusedVariable
+        ''' Funcion "wrapper" para el procesamiento de la señal de cierre
+        '''
+
+        self.cerrar()
+        os._exit(0)
+
+
+    def arranque(self):
+        ''' Comprueba que no haya otro supervisor en ejecución y, si no, establece el bloqueo
+        '''
+
+        if not(self._bloqueo.comprobar()):
+            if self._bloqueo.bloquear():
+                self._asignar_senyales()
+
+                return 0
+
+            else:
+                print(f'Error: No se puede bloquear {self._bloqueo.nombre()}', file = sys.stderr)
+
+                return errno.EACCES
+
+        else:
+            print(f'Error: Ya se ha iniciado una instancia de {self._bloqueo.nombre()}', file = sys.stderr)
+
+            return errno.EEXIST
+
+
+    def bucle(self):
+        ''' Vigila los sistemas alojados: arranca los que no estén en marcha cuando venza su espera y muestra los informes periódicos
+            - Se ejecuta en el hilo principal, ya que las señales sólo pueden asignarse desde él
+        '''
+
+        try:
+            while not(self._salir.is_set()):
+                ahora = monotonic()
+
+                for actual in self._tareas:
+                    if actual.hilo and not(actual.hilo.is_alive()):                                     # El bucle de un sistema sólo termina si ha fallado
+                        actual.reinicios += 1
+
+                        self._cerrar(actual)
+
+                        actual.hilo = False
+                        self._programar_reinicio(actual)
+
+                    if not(actual.hilo) and ahora >= actual.proximo:
+                        self._arrancar(actual)
+
+                if self._config.INFORME and ahora >= self._informe:
+                    if self._informe:
+                        self.informe()
+
+                    self._informe = ahora + self._config.INFORME
+
+                self._salir.wait(1)
+
+        except KeyboardInterrupt:
+            self.cerrar()
+
+            return
+
+
+    def cerrar(self):
+        ''' Muestra el informe final, cierra todos los sistemas alojados y desbloquea el supervisor
+        '''
+
+        self._salir.set()
+
+        self.informe()                                                                                  # Antes de cerrarlos, mientras aún pueden informar de sus trabajos
+
+        for actual in self._tareas:
+            if actual.hilo:
+                self._cerrar(actual)
+
+        self._bloqueo.desbloquear()
+
+
+    def informe(self):
+        ''' Muestra, por sistema, su estado, sus reinicios, su tiempo de CPU y, si es asíncrono, las estadísticas de sus trabajos periódicos, junto con la memoria residente del proceso y las escrituras en las salidas
+        '''
+
+        memoria = memoria_residente()
+        salidas = comun.gestor_salidas.compartido(hardware.controlador(getattr(self._config, 'CONTROLADOR_GPIO', None))).estadisticas()
+
+        print(f'Supervisor: {len(self._tareas)} sistemas, ' + (f'{memoria / 1024:.1f} MiB de memoria residente' if memoria else 'memoria residente desconocida'))
+        print(f"\tsalidas: {salidas['escritas']} escrituras ({salidas['suprimidas']} suprimidas), PWM: {salidas['escritas_pwm']} escrituras ({salidas['suprimidas_pwm']} suprimidas)")
+
+        for actual in self._tareas:
+            print(f"\t{actual.nombre:24}{'en marcha' if actual.hilo else 'detenido':12}{actual.reinicios:4d} reinicios{actual.tiempo_cpu():10.2f} s de CPU")
+
+            estadisticas = actual.app.estadisticas() if actual.hilo and isinstance(actual.app, comun.app_asincrona) else None
+
+            if estadisticas:                                                                            # Los sistemas asíncronos informan también de sus trabajos periódicos
+                for nombre, trabajo in estadisticas['trabajos'].items():
+                    print(f"\t\t{nombre}: {trabajo['ejecuciones']} vueltas, retraso medio {trabajo['retraso_medio'] * 1000:.1f} ms (máximo {trabajo['retraso_maximo'] * 1000:.1f} ms, jitter {trabajo['jitter'] * 1000:.1f} ms), {trabajo['perdidos']} plazos perdidos, {trabajo['desbordes']} desbordes")
+
+
+    def __del__(self):
+        ''' Destructor de la clase: Ya que su ejecución no está asegurada, no hace nada
+        '''
+
+        pass
+
+
+def main(argv):
+    if DEBUG_REMOTO:
+        setup_client_server_paths(config.PYDEV_REMOTE_PATHS)
+
+        pydevd.settrace(config.IP_DEP_REMOTA, trace_only_current_thread = False)
+
+    app = supervisor(config, os.path.basename(argv[0]), argv[1:])
+
+    err = app.arranque()
+
+    if err == 0:
+        app.bucle()
+
+    else:
+        sys.exit(err)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
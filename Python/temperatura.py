@@ -5,15 +5,19 @@
 # Title         : temperatura.py
 # Description   : Sistema indicador led de la temperatura del procesador en tiempo real. Utiliza tantos leds como GPIOs se le indiquen, siendo el último el de "alarma".
 # Author        : Veltys
-# Date          : 2021-10-15
-# Version       : 3.1.0
+# Date          : 2026-10-18
+# Version       : 3.10.0
 # Usage         : python3 temperatura.py
 # Notes         : Mandándole la señal "SIGUSR1", el sistema pasa a "modo test", lo cual enciende todos los leds, para comprobar su funcionamiento
 #                 Mandándole la señal "SIGUSR2", el sistema pasa a "modo apagado", lo cual apaga todos los leds hasta que esta misma señal sea recibida de nuevo
+#                 Mandándole la señal "SIGHUP", el sistema recarga la configuración sin reiniciarse
+#                 Su bucle es una corrutina (comun.app_asincrona), por lo que puede compartir un bucle de eventos con otros sistemas
+#                 La velocidad del ventilador se calcula con la curva de VELOCIDADES (precalculada) o con un regulador PID, según MODO_VENTILADOR (ventilador.py), con histéresis y con un arranque que no detiene el bucle
+#                 La temperatura se lee de la fuente indicada en la variable de configuración TERMOMETRO (termometro.py); por defecto, de la zona térmica del núcleo, sin lanzar ningún proceso
+#                 La pausa entre muestras se adapta, entre PAUSA_MINIMA y PAUSA, a la pendiente de la temperatura y a su distancia a los umbrales (ventilador.muestreo_adaptativo)
+#                 Cada muestra (instante, temperatura, velocidad del ventilador y etapa) se guarda en el historial de la variable de configuración HISTORIAL (historial.py), que puede consultarse con "historial.py" o con el comando "historial" del servidor de domótica
 
 
-CMD_COMANDO     = '/usr/bin/vcgencmd'
-CMD_PARAMETROS  = 'measure_temp'
 DEBUG           = False
 DEBUG_REMOTO    = False
 ESTADO_FRESCO   = 0
@@ -23,12 +27,13 @@ ESTADO_ALARMA   = 3
 
 import errno                                                                                            # Códigos de error
 import os                                                                                               # Funcionalidades varias del sistema operativo
-from subprocess import check_output                                                                     # Llamadas a programas externos, recuperando su respuesta
 import sys                                                                                              # Funcionalidades varias del sistema
-from time import sleep                                                                                  # Para hacer pausas
+from time import time                                                                                   # Instante de cada muestra
 
-import RPi.GPIO as GPIO                                                                                 # Acceso a los pines GPIO
 import comun                                                                                            # Funciones comunes a varios sistemas
+import historial                                                                                        # Historial de muestras en un búfer circular
+import termometro                                                                                       # Fuentes de la temperatura del procesador
+import ventilador                                                                                       # Control del ventilador y etapas de temperatura
 
 if DEBUG_REMOTO:
     import pydevd                                                                                       # Depuración remota
@@ -42,113 +47,189 @@ except ImportError:
     sys.exit(errno.ENOENT)
 
 
-class temperatura(comun.app):
+class temperatura(comun.app_asincrona):
     ''' Clase del servidor del sistema indicador led de la temperatura del procesador en tiempo real
     '''
 
     def __init__(self, config, nombre):
         ''' Constructor de la clase:
             - Llama al constructor de la clase padre
+            - Inicializa el estado que se conserva entre vueltas
         '''
 
         super().__init__(config, nombre)
 
+        self._arranque          = None                                                                  # Fin programado del arranque en curso del ventilador
+        self._control           = None                                                                  # El control del ventilador y las etapas de temperatura se construirán en la primera vuelta
+        self._etapas            = None
+        self._historial         = None                                                                  # El historial se abrirá en la primera vuelta; False si está desactivado o no ha podido abrirse
+        self._indice_pwm        = None                                                                  # Índice de puertos para el que se han precalculado los de cada tipo
+        self._leds_pwm          = ()
+        self._muestreo          = None                                                                  # El muestreo adaptativo se construirá en la primera vuelta; False si está desactivado
+        self._termometro        = None                                                                  # La fuente de la temperatura se abrirá en la primera vuelta
+        self._ventiladores_pwm  = ()
 
-    def bucle(self):
-        ''' Realiza en bucle las tareas asignadas a este sistema
+
+    def _cancelar_arranque(self):
+        ''' Cancela el fin programado del arranque del ventilador, si lo hay
+        '''
+
+        if self._arranque is not None:
+            self._arranque.cancel()
+
+            self._arranque = None
+
+
+    def _cerrar_historial(self):
+        ''' Cierra el historial, si está abierto, para que la siguiente vuelta lo vuelva a abrir
+        '''
+
+        if self._historial:
+            self._historial.cerrar()
+
+        self._historial = None
+
+
+    def _completar_recarga(self, anterior, cambios):                                                    # @UnusedVariable
+        ''' Aplica, tras recargar la configuración, los cambios que afectan a este sistema:
+            - Si ha cambiado la fuente de la temperatura, cierra la actual, para que la siguiente vuelta abra la nueva
+            - Si ha cambiado el historial, lo cierra, para que la siguiente vuelta abra el nuevo
+            - Si ha cambiado el muestreo o alguno de sus umbrales, lo descarta, para que la siguiente vuelta lo construya de nuevo
+            - Si ha cambiado el control del ventilador o las etapas, los descarta, para que la siguiente vuelta los construya de nuevo (sin arranque en curso)
+        '''
+
+        if self._termometro and cambios & {'RUTA_TERMOMETRO', 'TERMOMETRO', 'ZONA_TERMICA'}:
+            self._termometro.cerrar()
+
+            self._termometro = None
+
+        if cambios & {'CAPACIDAD_HISTORIAL', 'HISTORIAL'}:
+            self._cerrar_historial()
+
+        if cambios & {'MODO_VENTILADOR', 'PAUSA', 'PAUSA_MINIMA', 'PID', 'TEMPERATURAS', 'VARIACION_MUESTREO', 'VELOCIDADES'}:
+            self._muestreo = None
+
+        if cambios & {'HISTERESIS', 'MODO_VENTILADOR', 'PID', 'TEMPERATURAS', 'TIEMPO_ARRANQUE', 'VELOCIDAD_MINIMA', 'VELOCIDADES'}:
+            self._cancelar_arranque()
+
+            self._control = None
+            self._etapas = None
+
+
+    def _anotar(self, temperatura, velocidad, estado):
+        ''' Guarda la muestra en el historial, abriéndolo si aún no lo está
+            - Si está desactivado o no puede abrirse, se avisa una sola vez y se sigue sin él
         '''
 
-        velocidad = 0                                                                                   # Es necesario establecer la velocidad actual de rotación del ventilador
+        if self._historial is None:
+            if not(self._config.HISTORIAL):
+                self._historial = False
 
-        try:
-            while True:                                                                                 # Se ejecutará siempre, ya que las condiciones de parada son externas
-                if not(self._modo_apagado):                                                             #     Si no se ha activado el "modo apagado"
-                    temperatura = check_output([CMD_COMANDO, CMD_PARAMETROS])                           #         Se lee la temperatura de la CPU
-                    temperatura = float(temperatura[5:-3])                                              #         Se convierte a un valor numérico
+            else:
+                try:
+                    self._historial = historial.historial(self._config.HISTORIAL, self._config.CAPACIDAD_HISTORIAL)
 
-                    if temperatura < self._config.TEMPERATURAS[0]:                                      #         Se comprueba si está por debajo del valor mínimo
-                        estado = ESTADO_FRESCO                                                          #             Se asigna la coordenada corespondiente para el posterior acceso a la lista de colores de los leds
+                except (OSError, ValueError) as e:
+                    print(f'Aviso: Historial {self._config.HISTORIAL} no disponible ({e}); se continuará sin él', file = sys.stderr)
 
-                    elif temperatura < self._config.TEMPERATURAS[1]:                                    #         Se comprueba si está por debajo del valor medio
-                        estado = ESTADO_TEMPLADO                                                        #             Se asigna la coordenada corespondiente para el posterior acceso a la lista de colores de los leds
+                    self._historial = False
 
-                    elif temperatura < self._config.TEMPERATURAS[2]:                                    #         Se comprueba si está por debajo del valor máximo
-                        estado = ESTADO_CALIENTE                                                        #             Se asigna la coordenada corespondiente para el posterior acceso a la lista de colores de los leds
+        if self._historial:
+            self._historial.anyadir(time(), temperatura, velocidad, estado)
 
-                    else:                                                                               #         Está igual o por encima del valor máximo
-                        estado = ESTADO_ALARMA                                                          #             Se asigna la coordenada corespondiente para el posterior acceso a la lista de colores de los leds
 
-                    igual = mayor = menor = False                                                       #         Inicialización de variables
+    def _fijar_ventiladores(self, velocidad):
+        ''' Cambia el ciclo de ejecución de todos los ventiladores PWM a la velocidad dada (de 0 a 1)
+        '''
 
-                    for i, velocidades in enumerate(self._config.VELOCIDADES):                          #         Se recorre la tupla de temperaturas y velocidades
-                        if velocidades[0] < temperatura:                                                #             Cáculo del elemento menor
-                            menor = i
+        for puerto in self._ventiladores_pwm:
+            puerto.acceso.ChangeDutyCycle(velocidad * 100)
 
-                        elif velocidades[0] == temperatura:                                             #             Cáculo del elemento igual
-                            igual = i
 
-                            break
+    def _terminar_arranque(self):
+        ''' Llamada del bucle de eventos al terminar el arranque del ventilador: lo pone a la velocidad calculada
+        '''
 
-                        elif velocidades[0] > temperatura:                                              #             Cáculo del elemento mayor, si no hay igual
-                            mayor = i
+        self._arranque = None
+
+        self._fijar_ventiladores(self._control.terminar_arranque())
+
+
+    async def _vuelta(self):
+        ''' Realiza una vuelta de las tareas asignadas a este sistema
+            - Con muestreo adaptativo, devuelve los segundos hasta la siguiente vuelta, que el planificador usa en lugar de PAUSA
+        '''
 
-                            break
+        if self._indice_pwm is not self._indice:                                                        # Precálculo, fuera del bucle, de los puertos de cada tipo; sólo se repite si una recarga cambia los puertos
+            self._indice_pwm = self._indice
+            self._leds_pwm = self._indice.buscar_tipo(self._config.LED_PWM)
+            self._ventiladores_pwm = self._indice.buscar_tipo(self._config.VENTILADOR_PWM)
 
-                    if velocidad == 0:                                                                  #         Antes de (re)calcular la velocidad es necesario saber si el ventilador está parado
-                        arranque = True                                                                 #             Será necesario hacer un arranque de éste
+        if not(self._modo_apagado):                                                                     # Si no se ha activado el "modo apagado"
+            if self._termometro is None:                                                                #     Se abre la fuente de la temperatura, que se conserva entre vueltas
+                self._termometro = termometro.termometro(self._config.TERMOMETRO, self._config.ZONA_TERMICA, self._config.RUTA_TERMOMETRO)
 
-                    else:                                                                               #         Si no
-                        arranque = False                                                                #             No será necesario el arranque
+            if self._control is None:                                                                   #     Se construyen el control del ventilador, con su tabla precalculada, y las etapas de temperatura
+                self._control = ventilador.control_ventilador(ventilador.regulador(self._config), self._config.TIEMPO_ARRANQUE)
+                self._etapas = ventilador.etapas(self._config.TEMPERATURAS, self._config.HISTERESIS)
 
-                    if igual is False:                                                                  #         Si no existe un elemento igual, puede que haya que interpolar
-                        if mayor is False:                                                              #         Si valor mayor no se ha modificado e igual tampoco, se está ante un valor mayor que el máximo
-                            velocidad = self._config.VELOCIDADES[len(self._config.VELOCIDADES) - 1][1]  #             Se establece la velocidad al final de los puntos
+            if self._muestreo is None:                                                                  #     Y el muestreo adaptativo, si está activado
+                self._muestreo = ventilador.muestreo(self._config) or False
 
-                        elif menor is False:                                                            #         Si valor menor no se ha modificado e igual tampoco, se está ante un valor menor que el mínimo
-                            velocidad = self._config.VELOCIDADES[0][1]                                  #             Se establece la velocidad al inicial de los puntos
+            if self._termometro.BLOQUEANTE:                                                             #     Si leerla supone lanzar un proceso (vcgencmd), se hace fuera del bucle de eventos
+                temperatura = await self._bucle_eventos.run_in_executor(None, self._termometro.leer)
 
-                        else:                                                                           #         En cualquier otro caso, se habrá de interpolar
-                            velocidad = ((temperatura - self._config.VELOCIDADES[menor][0]) / (self._config.VELOCIDADES[mayor][0] - self._config.VELOCIDADES[menor][0])) * (self._config.VELOCIDADES[mayor][1] - self._config.VELOCIDADES[menor][1]) + self._config.VELOCIDADES[menor][1]
-                            velocidad = round(velocidad, 2)
+            else:                                                                                       #     Si no, es una única lectura de un descriptor ya abierto
+                temperatura = self._termometro.leer()
 
-                        if velocidad > 0 and velocidad < self._config.VELOCIDAD_MINIMA:                 #         Ya calculada la velocidad, si ésta es menor que el mínimo que el ventilador requiere para su funcionamiento
-                            velocidad = self._config.VELOCIDAD_MINIMA                                   #             Se pondrá al mínimo de éste
+            estado = self._etapas.etapa(temperatura)                                                    #     Etapa de temperatura, para los colores de los leds, que sólo baja si la temperatura queda por debajo de su umbral menos la histéresis
+            velocidad = self._control.actualizar(temperatura, self._bucle_eventos.time())               #     Velocidad del ventilador, que es el máximo si éste está arrancando
 
-                    else:                                                                               #         Si sí
-                        velocidad = self._config.VELOCIDADES[igual][1]                                  #             Se almacena su valor para posterior uso
+            if self._config.LED in self._mascaras:                                                      #     Los leds simples (se asume el de alarma, por ser el único no modulado con PWM), todos a la vez
+                self._salidas.escribir_varios(self._mascaras[self._config.LED].encendido if estado >= ESTADO_ALARMA else self._mascaras[self._config.LED].apagado)
 
-                    componente = 0                                                                      #         Contador de ciclos del bucle
+            for componente, puerto in enumerate(self._leds_pwm):                                        #     Se recorre la lista de leds PWM
+                puerto.acceso.ChangeDutyCycle(self._config.COLORES[estado][componente] * 100)           #         Se cambia el ciclo de ejecución en función de la cordenada anteriormente asignada
 
-                    for puertos in self._config.GPIOS:                                                  #         Se recorre la lista de leds
-                        for gpio, tipo, acceso, activacion, _ in puertos:
-                            if tipo == config.LED:                                                      #             Si se está ante un led (se asume el de alarma, por ser el único no modulado con PWM)
-                                if estado >= ESTADO_ALARMA:                                             #                 Si hay que activarlo
-                                    GPIO.output(gpio, GPIO.HIGH if activacion else GPIO.LOW)            #                     Se activa
+            self._fijar_ventiladores(velocidad)                                                         #     Se cambia el ciclo de ejecución de los ventiladores PWM
 
-                                else:                                                                   #                 Si no
-                                    GPIO.output(gpio, GPIO.LOW if activacion else GPIO.HIGH)            #                     Se desactiva
+            self._anotar(temperatura, velocidad, estado)                                                #     Se guarda la muestra en el historial
 
-                            elif tipo == config.LED_PWM:                                                #             Si se está ante un led PWM
-                                acceso.ChangeDutyCycle(self._config.COLORES[estado][componente] * 100)  #                 Se cambia el ciclo de ejecución en función de la cordenada anteriormente asignada
+            if self._control.fin_arranque is not None and self._arranque is None:                       #     Si el ventilador acaba de arrancar, se programa el fin del arranque, sin esperarlo
+                self._arranque = self._bucle_eventos.call_at(self._control.fin_arranque, self._terminar_arranque)
 
-                            elif tipo == config.VENTILADOR_PWM:                                         #             Si se está ante un ventilador PWM
-                                if arranque:                                                            #                 Si el ventilador ha estado parado, se realizará un arranque del mismo
-                                    acceso.ChangeDutyCycle(100)                                         #                     Poniéndolo al 100% de velocidad
-                                    sleep(1)                                                           #                     Durante un segundo
+            elif self._control.fin_arranque is None and self._arranque is not None:                     #     Si el ventilador se ha parado durante el arranque, éste se cancela
+                self._arranque.cancel()
 
-                                acceso.ChangeDutyCycle(velocidad * 100)                                 #                 Se cambia el ciclo de ejecución en función de la cordenada anteriormente asignada
+                self._arranque = None
+
+            if self._muestreo:                                                                          #     Con muestreo adaptativo, se devuelve la pausa hasta la siguiente muestra
+                return self._muestreo.actualizar(temperatura, self._bucle_eventos.time())
+
+
+    async def bucle(self):
+        ''' Realiza periódicamente, por plazos, las tareas asignadas a este sistema
+        '''
+
+        await self._periodico(self._vuelta, lambda: self._config.PAUSA)                                 # El periodo se lee en cada vuelta, para seguir a la configuración si se recarga; con muestreo adaptativo, cada vuelta devuelve el suyo
+
+
+    def cerrar(self):
+        ''' Realiza las operaciones necesarias para el cierre del sistema:
+            - Cancela el fin del arranque del ventilador, si está programado, y cierra la fuente de la temperatura y el historial
+            - Llama a la función de cierre de la clase padre
+        '''
 
-                            else:                                                                       #             Si se está ante cualquier otro
-                                pass                                                                    #                 No se hace nada, ya que esto sería un caso que no debería de darse
+        self._cancelar_arranque()
 
-                            componente += 1                                                             #         Aumento del contador
+        if self._termometro:
+            self._termometro.cerrar()
 
-                sleep(self._config.PAUSA)                                                               #     Pausa hasta la nueva comprobación
+            self._termometro = None
 
-        except KeyboardInterrupt:
-            self.cerrar()
+        self._cerrar_historial()
 
-            return
+        super().cerrar()
 
 
     def __del__(self):
@@ -170,7 +251,7 @@ def main(argv):
     err = app.arranque()
 
     if err == 0:
-        app.bucle()
+        app.ejecutar()
 
     else:
         sys.exit(err)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : termometro.py
+# Description   : Módulo auxiliar que abstrae la lectura de la temperatura del procesador, con fuentes intercambiables
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.0.0
+# Usage         : import termometro | from termometro import <clase>
+# Notes         : Todas las fuentes ofrecen la misma interfaz: leer(), que devuelve la temperatura en grados centígrados, y cerrar()
+#                 Fuentes disponibles: "sysfs" (zona térmica del núcleo, leída con pread() sobre un descriptor que se mantiene abierto), "vcgencmd" (un proceso por lectura) y "archivo" (falsa, respaldada por un archivo, para pruebas)
+#                 La fuente se elige con la variable de configuración TERMOMETRO; por defecto, "sysfs" si la zona térmica existe y, si no, "vcgencmd"
+
+
+DEBUG           = False
+
+
+import os                                                                                   # Funcionalidades varias del sistema operativo
+from subprocess import check_output                                                         # Lanzamiento de nuevos procesos
+from tempfile import mkstemp                                                                # Archivos temporales
+
+
+CMD_COMANDO     = '/usr/bin/vcgencmd'
+CMD_PARAMETROS  = 'measure_temp'
+RUTA_ZONA       = '/sys/class/thermal/thermal_zone{}/temp'                                  # Ruta del valor (en milésimas de grado) de cada zona térmica
+TAMANYO_LECTURA = 16                                                                        # Bytes a leer de cada valor, de sobra para las milésimas de grado y el salto de línea
+
+
+class termometro_sysfs(object):
+    ''' Fuente que lee la temperatura de una zona térmica del núcleo
+        - El archivo se abre una sola vez y cada lectura es un único pread() desde su comienzo, sin abrir, buscar ni cerrar nada
+    '''
+
+    BLOQUEANTE  = False                                                                     # Si es cierto, leer() puede tardar lo suficiente como para tener que llamarse fuera del bucle de eventos
+
+    def __init__(self, zona = 0, ruta = None):
+        ''' Constructor de la clase:
+            - Abre el valor de la zona térmica dada o, si se da, el de la ruta indicada
+        '''
+
+        self._descriptor    = None                                                          # Por si la apertura falla, para que el destructor no tenga nada que cerrar
+        self._ruta          = ruta or RUTA_ZONA.format(zona)
+        self._descriptor    = os.open(self._ruta, os.O_RDONLY | os.O_CLOEXEC)
+
+
+    def cerrar(self):
+        ''' Cierra el descriptor, si sigue abierto
+        '''
+
+        if self._descriptor is not None:
+            os.close(self._descriptor)
+
+            self._descriptor = None
+
+
+    def leer(self):
+        ''' Devuelve la temperatura, en grados centígrados
+            - El núcleo vuelve a generar el valor en cada lectura desde el comienzo, así que no hace falta reabrir el archivo
+        '''
+
+        return int(os.pread(self._descriptor, TAMANYO_LECTURA, 0)) / 1000
+
+
+    def __del__(self):
+        ''' Destructor de la clase:
+            - Cierra el descriptor
+        '''
+
+        self.cerrar()
+
+
+class termometro_vcgencmd(object):
+    ''' Fuente que lee la temperatura ejecutando "vcgencmd measure_temp", tal y como se hacía originalmente
+        - Cada lectura supone lanzar un proceso, así que sólo se recomienda si la zona térmica no está disponible
+    '''
+
+    BLOQUEANTE  = True
+
+    def __init__(self, zona = 0, ruta = None):                                              # @UnusedVariable
+        ''' Constructor de la clase:
+            - Usa el programa de la ruta dada o, por defecto, el de CMD_COMANDO
+        '''
+
+        self._comando       = ruta or CMD_COMANDO
+
+
+    def cerrar(self):
+        ''' Nada que cerrar
+        '''
+
+        pass
+
+
+    def leer(self):
+        ''' Devuelve la temperatura, en grados centígrados, a partir de una salida como "temp=48.3'C"
+        '''
+
+        return float(check_output((self._comando, CMD_PARAMETROS))[5:-3])
+
+
+class termometro_archivo(termometro_sysfs):
+    ''' Fuente falsa, para pruebas: un archivo normal con el mismo formato que el de una zona térmica, cuyo valor puede cambiarse con fijar()
+        - Se lee exactamente igual que la zona térmica real
+    '''
+
+    def __init__(self, zona = 0, ruta = None, grados = 40.0):                               # @UnusedVariable
+        ''' Constructor de la clase:
+            - Si no se da una ruta, crea un archivo temporal, que se borra al cerrar la fuente
+            - Si el archivo no existe o se ha creado, le da el valor inicial indicado
+        '''
+
+        self._temporal = ruta is None
+
+        if self._temporal:
+            descriptor, ruta = mkstemp(prefix = 'termometro-')
+            os.close(descriptor)
+
+        if self._temporal or not(os.path.exists(ruta)):
+            self._escribir(ruta, grados)
+
+        super().__init__(ruta = ruta)
+
+
+    @staticmethod
+    def _escribir(ruta, grados):
+        ''' Escribe en el archivo el valor dado, en milésimas de grado, sin reemplazarlo por otro, para que el descriptor abierto lo siga viendo
+        '''
+
+        with open(ruta, 'w') as archivo:
+            archivo.write(f'{round(grados * 1000)}\n')
+
+
+    def cerrar(self):
+        ''' Cierra el descriptor y, si el archivo era temporal, lo borra
+        '''
+
+        super().cerrar()
+
+        if self._temporal:
+            try:
+                os.unlink(self._ruta)
+
+            except FileNotFoundError:
+                pass
+
+            self._temporal = False
+
+
+    def fijar(self, grados):
+        ''' Cambia la temperatura que devolverán las siguientes lecturas
+        '''
+
+        self._escribir(self._ruta, grados)
+
+
+TERMOMETROS     = {
+                    'archivo'   : termometro_archivo,
+                    'sysfs'     : termometro_sysfs,
+                    'vcgencmd'  : termometro_vcgencmd,
+                  }
+
+
+def termometro(nombre = None, zona = 0, ruta = None):
+    ''' Crea y devuelve una fuente de temperatura
+        - "nombre" es uno de los de TERMOMETROS; por defecto, "sysfs" si la zona térmica dada existe y, si no, "vcgencmd"
+        - "ruta" sustituye a la de la zona térmica (o a la del programa, en el caso de "vcgencmd")
+    '''
+
+    if nombre is None:
+        nombre = 'sysfs' if os.path.exists(ruta or RUTA_ZONA.format(zona)) else 'vcgencmd'
+
+    fuente = TERMOMETROS[nombre](zona = zona, ruta = ruta)
+
+    if DEBUG:
+        print('Termómetro #', os.getpid(), "\tUsando la fuente ", type(fuente).__name__, sep = '')
+
+    return fuente
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+# Title         : ventilador.py
+# Description   : Módulo auxiliar que calcula la velocidad del ventilador, la etapa de temperatura y el momento de la siguiente muestra a partir de cada una, con curva precalculada o regulador PID, histéresis, arranque no bloqueante y muestreo adaptativo
+# Author        : Veltys
+# Date          : 2026-10-18
+# Version       : 1.1.0
+# Usage         : import ventilador | from ventilador import <clase>
+# Notes         : Ninguna clase toca los puertos ni espera: reciben la temperatura (y el instante de la muestra) y devuelven qué aplicar, para que el bucle que las use no se bloquee y para poder reproducir con ellas trazas grabadas
+#                 Reguladores disponibles: "curva" (interpolación en la tabla de VELOCIDADES, precalculada) y "pid" (lazo cerrado hacia una temperatura objetivo)
+#                 El muestreo adaptativo acorta la pausa entre muestras cuando la temperatura cambia deprisa o está cerca de un umbral y la alarga, exponencialmente, cuando está estable
+
+
+from bisect import bisect_left, bisect_right                                                # Búsqueda binaria en listas ordenadas
+
+
+def _ajustar(velocidad, velocidad_minima):
+    ''' Redondea la velocidad a dos decimales, la limita a [0, 1] y, si no es nula pero queda por debajo del mínimo que el ventilador necesita para girar, la sube a éste
+    '''
+
+    velocidad = round(min(max(velocidad, 0.0), 1.0), 2)
+
+    if 0 < velocidad < velocidad_minima:
+        velocidad = velocidad_minima
+
+    return velocidad
+
+
+class curva(object):
+    ''' Regulador por curva: interpola la velocidad entre los puntos temperatura - velocidad dados
+        - Las temperaturas, las velocidades y las pendientes de cada tramo se precalculan al construirlo, así que cada muestra es una búsqueda binaria y una multiplicación
+        - Con histéresis, la velocidad sube en cuanto sube la temperatura, pero sólo baja cuando ésta ha bajado más de la histéresis desde la última que la hizo subir, para que el ventilador no oscile con la temperatura
+    '''
+
+    def __init__(self, puntos, velocidad_minima = 0.0, histeresis = 0.0):
+        ''' Constructor de la clase:
+            - Ordena los puntos por temperatura y precalcula la tabla de búsqueda
+        '''
+
+        puntos = sorted(puntos)
+
+        self._histeresis        = histeresis
+        self._pendientes        = tuple((puntos[i + 1][1] - puntos[i][1]) / (puntos[i + 1][0] - puntos[i][0]) if puntos[i + 1][0] != puntos[i][0] else 0.0 for i in range(len(puntos) - 1))
+        self._referencia        = None                                                      # Temperatura con la que se calculó la velocidad actual
+        self._temperaturas      = tuple(temperatura for temperatura, _ in puntos)
+        self._velocidad         = 0.0
+        self._velocidad_minima  = velocidad_minima
+        self._velocidades       = tuple(velocidad for _, velocidad in puntos)
+
+
+    def calcular(self, temperatura):
+        ''' Devuelve la velocidad que corresponde a la temperatura dada según la curva, sin histéresis ni estado
+            - Igual que la interpolación original: por debajo del primer punto o por encima del último, la velocidad de éste; en un punto exacto, la suya, sin ajustar al mínimo
+        '''
+
+        i = bisect_left(self._temperaturas, temperatura)
+
+        if i < len(self._temperaturas) and self._temperaturas[i] == temperatura:            # En un punto exacto (el primero, si hay varios iguales)
+            return self._velocidades[i]
+
+        if i == 0:                                                                          # Si no, "i" es la del primer punto por encima; si es el primero, se está por debajo de todos
+            velocidad = self._velocidades[0]
+
+        elif i == len(self._temperaturas):                                                  # Por encima del último
+            velocidad = self._velocidades[-1]
+
+        else:                                                                               # Entre dos puntos, se interpola
+            velocidad = self._velocidades[i - 1] + (temperatura - self._temperaturas[i - 1]) * self._pendientes[i - 1]
+
+        return _ajustar(velocidad, self._velocidad_minima)
+
+
+    def reiniciar(self):
+        ''' Olvida la temperatura de referencia, para que la siguiente muestra se aplique sin histéresis
+        '''
+
+        self._referencia = None
+
+
+    def velocidad(self, temperatura, instante = None):                                      # @UnusedVariable
+        ''' Devuelve la velocidad del ventilador para la temperatura dada, aplicando la histéresis
+        '''
+
+        if self._referencia is None or temperatura > self._referencia or temperatura < self._referencia - self._histeresis:
+            self._referencia = temperatura
+            self._velocidad = self.calcular(temperatura)
+
+        return self._velocidad
+
+
+class pid(object):
+    ''' Regulador PID: ajusta la velocidad para llevar la temperatura a la objetivo
+        - El error es la temperatura menos la objetivo, así que, a más calor, más velocidad
+        - La derivada se toma sobre la temperatura (no sobre el error), y la integral sólo acumula mientras la salida no está saturada, para que no se dispare
+        - Parado, el ventilador no arranca hasta que la salida alcanza su velocidad mínima; girando, no se para hasta que la salida llega a cero, para que no arranque y pare una y otra vez
+    '''
+
+    def __init__(self, objetivo, kp, ki, kd, velocidad_minima = 0.0):
+        ''' Constructor de la clase:
+            - Guarda la temperatura objetivo, las constantes y el mínimo del ventilador
+        '''
+
+        self._anterior          = None                                                      # Temperatura e instante de la muestra anterior
+        self._integral          = 0.0
+        self._kd                = kd
+        self._ki                = ki
+        self._kp                = kp
+        self._objetivo          = objetivo
+        self._velocidad         = 0.0
+        self._velocidad_minima  = velocidad_minima
+
+
+    def reiniciar(self):
+        ''' Vacía la integral, olvida la muestra anterior y da el ventilador por parado
+        '''
+
+        self._anterior = None
+        self._integral = 0.0
+        self._velocidad = 0.0
+
+
+    def velocidad(self, temperatura, instante):
+        ''' Devuelve la velocidad del ventilador para la temperatura dada, tomada en el instante dado (en segundos, de un reloj monotónico)
+        '''
+
+        error = temperatura - self._objetivo
+        derivada = 0.0
+        incremento = 0.0
+
+        if self._anterior is not None and instante > self._anterior[1]:
+            intervalo = instante - self._anterior[1]
+            derivada = (temperatura - self._anterior[0]) / intervalo
+            incremento = error * intervalo
+
+        salida = self._kp * error + self._ki * (self._integral + incremento) + self._kd * derivada
+
+        if 0.0 < salida < 1.0 or (salida >= 1.0 and incremento < 0) or (salida <= 0.0 and incremento > 0):  # Integración condicional: si la salida está saturada, sólo se acumula lo que la desatura
+            self._integral += incremento
+
+        self._anterior = (temperatura, instante)
+
+        if self._velocidad == 0.0 and salida < self._velocidad_minima:                      # Parado, sigue parado mientras la salida no alcance el mínimo
+            return 0.0
+
+        self._velocidad = _ajustar(salida, self._velocidad_minima)
+
+        return self._velocidad
+
+
+class etapas(object):
+    ''' Etapa de temperatura (la fila de COLORES de los leds) con histéresis
+        - Se sube de etapa en cuanto se alcanza su umbral, pero sólo se baja cuando la temperatura queda más de la histéresis por debajo de él
+    '''
+
+    def __init__(self, umbrales, histeresis = 0.0):
+        ''' Constructor de la clase:
+            - Guarda los umbrales de cada etapa, ordenados, y la histéresis
+        '''
+
+        self._etapa         = None
+        self._histeresis    = histeresis
+        self._umbrales      = tuple(sorted(umbrales))
+
+
+    def etapa(self, temperatura):
+        ''' Devuelve la etapa (de 0 a la cantidad de umbrales) que corresponde a la temperatura dada
+        '''
+
+        etapa = bisect_right(self._umbrales, temperatura)
+
+        if self._etapa is not None and etapa < self._etapa:                                 # Para bajar, la temperatura ha de quedar por debajo del umbral menos la histéresis
+            etapa = min(self._etapa, bisect_right(self._umbrales, temperatura + self._histeresis))
+
+        self._etapa = etapa
+
+        return etapa
+
+
+class control_ventilador(object):
+    ''' Control completo del ventilador: el regulador elegido más el arranque
+        - Cuando el ventilador pasa de parado a girar, se pone al máximo durante el tiempo de arranque y, después, a la velocidad calculada
+        - Ese tiempo no se espera aquí: actualizar() devuelve qué aplicar ya y fin_arranque, el instante en que ha de volver a aplicarse velocidad
+    '''
+
+    def __init__(self, regulador, arranque = 0.0):
+        ''' Constructor de la clase:
+            - Guarda el regulador y el tiempo de arranque (en segundos)
+        '''
+
+        self._arranque      = arranque
+        self._regulador     = regulador
+        self.fin_arranque   = None                                                          # Instante en que termina el arranque en curso, o None si no hay ninguno
+        self.velocidad      = 0.0                                                           # Velocidad calculada, la que tendrá el ventilador tras el arranque
+
+
+    def actualizar(self, temperatura, instante):
+        ''' Calcula la velocidad para la muestra dada y devuelve la que ha de aplicarse en este momento (el máximo, si el ventilador está arrancando)
+        '''
+
+        anterior = self.velocidad
+
+        self.velocidad = self._regulador.velocidad(temperatura, instante)
+
+        if self.velocidad == 0.0:                                                           # Si el ventilador se para, se interrumpe el arranque en curso, si lo hay
+            self.fin_arranque = None
+
+        elif anterior == 0.0 and self._arranque > 0:                                        # Si estaba parado y ha de girar, arranca al máximo
+            self.fin_arranque = instante + self._arranque
+
+        elif self.fin_arranque is not None and instante >= self.fin_arranque:               # Si el arranque ya ha terminado, se olvida
+            self.fin_arranque = None
+
+        return 1.0 if self.fin_arranque is not None else self.velocidad
+
+
+    def terminar_arranque(self):
+        ''' Da por terminado el arranque en curso y devuelve la velocidad que ha de aplicarse ya
+        '''
+
+        self.fin_arranque = None
+
+        return self.velocidad
+
+
+class muestreo_adaptativo(object):
+    ''' Periodo de muestreo adaptativo, entre un mínimo y un máximo
+        - Se busca que, entre una muestra y la siguiente, la temperatura no cambie más de la variación dada ni cruce un umbral: con la pendiente de las dos últimas muestras, el periodo es lo que tardaría en recorrer la menor de ambas distancias
+        - Cerca de un umbral (a menos de "cercania" grados), el periodo queda además limitado en proporción a la distancia, aunque la temperatura esté estable, para no tardar en ver que lo cruza
+        - Si hace falta muestrear más a menudo, el periodo se acorta en el acto; si no, se alarga multiplicándolo por el factor dado en cada muestra, hasta el máximo
+        - Los cambios de hasta "ruido" grados entre dos muestras no cuentan para la pendiente, para que las fluctuaciones de la lectura no mantengan el periodo al mínimo
+    '''
+
+    def __init__(self, umbrales, minimo, maximo, variacion = 1.0, factor = 2.0, ruido = None, cercania = None):
+        ''' Constructor de la clase:
+            - Guarda los umbrales (las temperaturas en que cambia la etapa o la pendiente de la curva), los periodos mínimo y máximo (en segundos) y los parámetros de la adaptación
+            - Por defecto, el ruido es la cuarta parte de la variación y la cercanía, el triple
+        '''
+
+        self._anterior      = None                                                          # Temperatura e instante de la muestra anterior
+        self._cercania      = 3 * variacion if cercania is None else cercania
+        self._factor        = factor
+        self._maximo        = maximo
+        self._minimo        = min(minimo, maximo)
+        self._ruido         = variacion / 4 if ruido is None else ruido
+        self._umbrales      = tuple(sorted(set(umbrales)))
+        self._variacion     = variacion
+        self.periodo        = self._minimo                                                  # Segundos hasta la siguiente muestra; se empieza por el mínimo, hasta conocer la pendiente
+
+
+    def _distancia(self, temperatura):
+        ''' Devuelve la distancia (en grados) de la temperatura dada al umbral más cercano, o infinito si no hay umbrales
+        '''
+
+        i = bisect_left(self._umbrales, temperatura)
+
+        return min((abs(temperatura - umbral) for umbral in self._umbrales[max(i - 1, 0):i + 1]), default = float('inf'))
+
+
+    def actualizar(self, temperatura, instante):
+        ''' Devuelve los segundos que han de pasar, tras la muestra dada, tomada en el instante dado (en segundos, de un reloj monotónico), hasta la siguiente
+        '''
+
+        distancia = self._distancia(temperatura)
+        objetivo = self._maximo
+
+        if distancia < self._cercania:                                                      # Cerca de un umbral, el periodo se limita en proporción a la distancia
+            objetivo = self._minimo + (self._maximo - self._minimo) * distancia / self._cercania
+
+        if self._anterior is not None and instante > self._anterior[1]:
+            pendiente = max(abs(temperatura - self._anterior[0]) - self._ruido, 0.0) / (instante - self._anterior[1])
+
+            if pendiente > 0:                                                               # Tiempo que, a este ritmo, tardaría en cambiar la variación dada o en llegar al umbral
+                objetivo = min(objetivo, min(self._variacion, max(distancia, self._ruido)) / pendiente)
+
+        if objetivo < self.periodo:                                                         # Para acortarlo, en el acto
+            self.periodo = max(objetivo, self._minimo)
+
+        else:                                                                               # Para alargarlo, exponencialmente
+            self.periodo = min(self.periodo * self._factor, objetivo, self._maximo)
+
+        self._anterior = (temperatura, instante)
+
+        return self.periodo
+
+
+    def reiniciar(self):
+        ''' Olvida la muestra anterior y vuelve al periodo mínimo
+        '''
+
+        self._anterior = None
+        self.periodo = self._minimo
+
+
+def muestreo(config):
+    ''' Devuelve el muestreo adaptativo indicado en las variables de configuración PAUSA_MINIMA, PAUSA (el periodo máximo) y VARIACION_MUESTREO, o None si PAUSA_MINIMA no está definida (periodo fijo)
+        - Los umbrales son los de las etapas (TEMPERATURAS) y, según el modo del ventilador, los puntos de la curva (VELOCIDADES) o la temperatura objetivo del PID
+    '''
+
+    if not(config.PAUSA_MINIMA):
+        return None
+
+    umbrales = tuple(config.TEMPERATURAS) + ((config.PID[0], ) if config.MODO_VENTILADOR == 'pid' else tuple(temperatura for temperatura, _ in config.VELOCIDADES))
+
+    return muestreo_adaptativo(umbrales, config.PAUSA_MINIMA, config.PAUSA, config.VARIACION_MUESTREO)
+
+
+def regulador(config):
+    ''' Devuelve el regulador del modo indicado en la variable de configuración MODO_VENTILADOR ('curva' o 'pid'), con el resto de sus variables
+    '''
+
+    if config.MODO_VENTILADOR == 'pid':
+        return pid(*config.PID, velocidad_minima = config.VELOCIDAD_MINIMA)
+
+    elif config.MODO_VENTILADOR == 'curva':
+        return curva(config.VELOCIDADES, config.VELOCIDAD_MINIMA, config.HISTERESIS)
+
+    else:
+        raise ValueError(f"MODO_VENTILADOR debería ser 'curva' o 'pid', no {config.MODO_VENTILADOR!r}")
@@ -21,7 +21,8 @@ scripts[3]='domotica_cliente'
 scripts[4]='domotica_servidor'
 scripts[5]='reiniciar_router'
 scripts[6]='sonda_dht11'
-scripts[7]='temperatura'
+scripts[7]='supervisor'
+scripts[8]='temperatura'
 
 arrancables[0]='cpu'
 arrancables[1]='domotica_servidor'
@@ -31,6 +32,15 @@ arrancables[3]='temperatura'
 dependencias[0]='config.py'
 dependencias[1]='comun.py'
 dependencias[2]='pid.py'
+dependencias[3]='multiplexor.py'
+dependencias[4]='protocolo.py'
+dependencias[5]='entradas.py'
+dependencias[6]='llamadas.py'
+dependencias[7]='hardware.py'
+dependencias[8]='configuracion.py'
+dependencias[9]='termometro.py'
+dependencias[10]='ventilador.py'
 
 dep_ejecutables[0]='internet.py'
 dep_ejecutables[1]='indice_gpio.py'
+dep_ejecutables[2]='historial.py'